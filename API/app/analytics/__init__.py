@@ -0,0 +1,4 @@
+from .store import AnalyticsUnavailable, SnapshotStore, snapshot_store
+from . import queries
+
+__all__ = ["AnalyticsUnavailable", "SnapshotStore", "snapshot_store", "queries"]
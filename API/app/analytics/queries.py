@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import Any, Literal
+
+Granularity = Literal["month", "quarter", "year"]
+
+# Every query filters on the ``year`` partition column first, so DuckDB only
+# opens the Parquet files of the requested years.
+_SCOPE = """
+    vehicle_id IN (SELECT unnest(CAST($vehicle_ids AS VARCHAR[])))
+    AND year BETWEEN $from_year AND $to_year
+"""
+
+
+def _params(vehicle_ids: list[str], start_date: date, end_date: date, **extra: Any) -> dict[str, Any]:
+    return {
+        "vehicle_ids": vehicle_ids,
+        "from_year": start_date.year,
+        "to_year": end_date.year,
+        "start_date": start_date,
+        "end_date": end_date,
+        **extra,
+    }
+
+
+def _rows(cursor: Any) -> list[dict[str, Any]]:
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def cost_trends(
+    cursor: Any,
+    vehicle_ids: list[str],
+    start_date: date,
+    end_date: date,
+    granularity: Granularity,
+) -> list[dict[str, Any]]:
+    """Expense totals per period and category."""
+    cursor.execute(
+        f"""
+        SELECT
+            CAST(date_trunc($granularity, expense_date) AS DATE) AS period,
+            category,
+            sum(amount) AS total,
+            count(*) AS entries
+        FROM expenses
+        WHERE {_SCOPE}
+          AND expense_date BETWEEN $start_date AND $end_date
+        GROUP BY ALL
+        ORDER BY period, category
+        """,
+        _params(vehicle_ids, start_date, end_date, granularity=granularity),
+    )
+    return _rows(cursor)
+
+
+def fuel_price_history(
+    cursor: Any,
+    vehicle_ids: list[str],
+    start_date: date,
+    end_date: date,
+    granularity: Granularity,
+    fuel: str | None = None,
+) -> list[dict[str, Any]]:
+    """Volume-weighted average, min and max price per period and fuel."""
+    cursor.execute(
+        f"""
+        SELECT
+            CAST(date_trunc($granularity, CAST(filled_at AS DATE)) AS DATE) AS period,
+            fuel,
+            CAST(sum(price_per_unit * volume) / sum(volume) AS DECIMAL(10,3)) AS avg_price,
+            min(price_per_unit) AS min_price,
+            max(price_per_unit) AS max_price,
+            sum(volume) AS volume,
+            count(*) AS fuelings
+        FROM fuelings
+        WHERE {_SCOPE}
+          AND CAST(filled_at AS DATE) BETWEEN $start_date AND $end_date
+          AND ($fuel IS NULL OR fuel = $fuel)
+        GROUP BY ALL
+        ORDER BY period, fuel
+        """,
+        _params(vehicle_ids, start_date, end_date, granularity=granularity, fuel=fuel),
+    )
+    return _rows(cursor)
+
+
+def cost_per_km(
+    cursor: Any,
+    vehicle_ids: list[str],
+    start_date: date,
+    end_date: date,
+) -> list[dict[str, Any]]:
+    """
+    Per vehicle: all expenses, fuel expenses, distance driven (odometer span
+    of fuelings and services in the range) and cost per km.
+    """
+    cursor.execute(
+        f"""
+        WITH distance AS (
+            SELECT vehicle_id, max(odometer_km) - min(odometer_km) AS distance_km
+            FROM (
+                SELECT vehicle_id, year, CAST(filled_at AS DATE) AS day, odometer_km
+                FROM fuelings
+                UNION ALL
+                SELECT vehicle_id, year, service_date, odometer_km
+                FROM services
+                WHERE odometer_km IS NOT NULL
+            ) readings
+            WHERE {_SCOPE}
+              AND day BETWEEN $start_date AND $end_date
+            GROUP BY vehicle_id
+        ),
+        costs AS (
+            SELECT
+                vehicle_id,
+                sum(amount) AS total_cost,
+                coalesce(sum(amount) FILTER (WHERE category = 'FUEL'), 0) AS fuel_cost
+            FROM expenses
+            WHERE {_SCOPE}
+              AND expense_date BETWEEN $start_date AND $end_date
+            GROUP BY vehicle_id
+        )
+        SELECT
+            vehicle_id,
+            coalesce(c.total_cost, 0) AS total_cost,
+            coalesce(c.fuel_cost, 0) AS fuel_cost,
+            d.distance_km,
+            CAST(c.total_cost / nullif(d.distance_km, 0) AS DECIMAL(12,4)) AS cost_per_km
+        FROM costs c
+        FULL JOIN distance d USING (vehicle_id)
+        ORDER BY vehicle_id
+        """,
+        _params(vehicle_ids, start_date, end_date),
+    )
+    return _rows(cursor)
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from app.config import settings
+
+SNAPSHOT_TABLES = ("fuelings", "expenses", "services")
+SUCCESS_MARKER = "_SUCCESS"
+
+
+class AnalyticsUnavailable(Exception):
+    """No published snapshot, or DuckDB is not installed."""
+
+
+class SnapshotStore:
+    """
+    Embedded DuckDB over the Parquet snapshot published by
+    ``scripts/snapshot_parquet.py`` (``<root>/current``).
+
+    One in-memory DuckDB database per process holds views over the snapshot
+    files; each request gets its own cursor. When a newer snapshot is
+    published, the next request builds a new database and swaps it in
+    (queries running on the old one keep their files - the snapshot script
+    keeps the previous snapshot).
+    """
+
+    def __init__(self, root: str | Path, threads: int) -> None:
+        self.root = Path(root)
+        self.threads = threads
+        self._lock = threading.Lock()
+        self._snapshot: Path | None = None
+        self._snapshot_at: datetime | None = None
+        self._connection: Any = None
+
+    def _open(self, snapshot: Path) -> Any:
+        try:
+            import duckdb
+        except ImportError as exc:
+            raise AnalyticsUnavailable("DuckDB is not installed.") from exc
+
+        connection = duckdb.connect(":memory:", config={"threads": self.threads})
+        # Timestamps are bucketed in UTC, like the exports.
+        connection.execute("SET GLOBAL TimeZone = 'UTC'")
+        for table in SNAPSHOT_TABLES:
+            files = (snapshot / table / "**" / "*.parquet").as_posix().replace("'", "''")
+            connection.execute(
+                f"CREATE VIEW {table} AS "
+                f"SELECT * FROM read_parquet('{files}', hive_partitioning = true, "
+                f"hive_types = {{'year': SMALLINT}})"
+            )
+        return connection
+
+    def cursor(self) -> tuple[Any, datetime]:
+        """Return (DuckDB cursor, snapshot timestamp) for the current snapshot."""
+        link = self.root / "current"
+        marker = link / SUCCESS_MARKER
+        if not marker.is_file():
+            raise AnalyticsUnavailable("No analytics snapshot has been published yet.")
+        snapshot = link.resolve()
+
+        with self._lock:
+            if snapshot != self._snapshot:
+                # The previous database is released once its last cursor is closed.
+                self._connection = self._open(snapshot)
+                self._snapshot = snapshot
+                self._snapshot_at = datetime.fromisoformat((snapshot / SUCCESS_MARKER).read_text().strip())
+            return self._connection.cursor(), self._snapshot_at
+
+
+snapshot_store = SnapshotStore(settings.analytics_dir, settings.analytics_threads)
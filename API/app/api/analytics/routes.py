@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+from typing import Any, Callable, Literal
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.analytics import AnalyticsUnavailable, queries, snapshot_store
+from app.api.deps import get_db, get_current_user_id
+from .schemas import CostPerKmOut, CostTrendsOut, FuelPricesOut
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+EARLIEST_DATE = date(1970, 1, 1)
+
+
+def _vehicle_scope(db: Session, user_id: UUID, vehicle_id: UUID | None) -> list[str]:
+    """
+    Vehicles the analytics may cover: the requested one (404 without access)
+    or all vehicles of the user. This is the only Postgres query of an
+    analytics request.
+    """
+    try:
+        if vehicle_id is not None:
+            existing = db.execute(
+                text("SELECT * FROM car_app.fn_get_vehicle(:user_id, :vehicle_id)"),
+                {"user_id": user_id, "vehicle_id": vehicle_id},
+            ).mappings().first()
+
+            if existing is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Vehicle not found or no permission",
+                )
+            return [str(vehicle_id)]
+
+        ids = db.execute(
+            text("SELECT id FROM car_app.fn_get_user_vehicles(:user_id)"),
+            {"user_id": user_id},
+        ).scalars().all()
+        return [str(id_) for id_ in ids]
+    finally:
+        db.rollback()
+
+
+def _run(query: Callable[..., list[dict[str, Any]]], *args: Any) -> tuple[list[dict[str, Any]], Any]:
+    try:
+        cursor, snapshot_at = snapshot_store.cursor()
+    except AnalyticsUnavailable as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Analytics are not available yet.",
+        ) from exc
+
+    try:
+        return query(cursor, *args), snapshot_at
+    except Exception as exc:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Unexpected server error.",
+        ) from exc
+    finally:
+        cursor.close()
+
+
+@router.get("/cost-trends", response_model=CostTrendsOut)
+def get_cost_trends(
+    vehicle_id: UUID | None = Query(default=None, description="Omit for all vehicles"),
+    start_date: date = Query(default=EARLIEST_DATE),
+    end_date: date = Query(default_factory=date.today),
+    granularity: Literal["month", "quarter", "year"] = "month",
+    db: Session = Depends(get_db, scope="function"),
+    current_user_id: UUID = Depends(get_current_user_id),
+) -> CostTrendsOut:
+    """
+    Expense totals per period and category, for one or all vehicles.
+
+    Served from the nightly Parquet snapshot (see ``snapshot_at``), not from
+    the live database.
+    """
+    vehicle_ids = _vehicle_scope(db, current_user_id, vehicle_id)
+    points, snapshot_at = _run(queries.cost_trends, vehicle_ids, start_date, end_date, granularity)
+    return CostTrendsOut(snapshot_at=snapshot_at, granularity=granularity, points=points)
+
+
+@router.get("/fuel-prices", response_model=FuelPricesOut)
+def get_fuel_prices(
+    vehicle_id: UUID | None = Query(default=None, description="Omit for all vehicles"),
+    start_date: date = Query(default=EARLIEST_DATE),
+    end_date: date = Query(default_factory=date.today),
+    granularity: Literal["month", "quarter", "year"] = "month",
+    fuel: Literal["Petrol", "Diesel", "LPG", "CNG", "EV", "H2"] | None = None,
+    db: Session = Depends(get_db, scope="function"),
+    current_user_id: UUID = Depends(get_current_user_id),
+) -> FuelPricesOut:
+    """
+    Fuel price history (volume-weighted average, min, max) per period and
+    fuel, from the nightly Parquet snapshot.
+    """
+    vehicle_ids = _vehicle_scope(db, current_user_id, vehicle_id)
+    points, snapshot_at = _run(queries.fuel_price_history, vehicle_ids, start_date, end_date, granularity, fuel)
+    return FuelPricesOut(snapshot_at=snapshot_at, granularity=granularity, points=points)
+
+
+@router.get("/cost-per-km", response_model=CostPerKmOut)
+def get_cost_per_km(
+    vehicle_id: UUID | None = Query(default=None, description="Omit for all vehicles"),
+    start_date: date = Query(default=EARLIEST_DATE),
+    end_date: date = Query(default_factory=date.today),
+    db: Session = Depends(get_db, scope="function"),
+    current_user_id: UUID = Depends(get_current_user_id),
+) -> CostPerKmOut:
+    """
+    Cost per km per vehicle (all expenses / odometer span of fuelings and
+    services) and for the whole fleet, from the nightly Parquet snapshot.
+    """
+    vehicle_ids = _vehicle_scope(db, current_user_id, vehicle_id)
+    vehicles, snapshot_at = _run(queries.cost_per_km, vehicle_ids, start_date, end_date)
+
+    total_cost = sum((v["total_cost"] for v in vehicles), Decimal(0))
+    distance_km = sum((v["distance_km"] or Decimal(0) for v in vehicles), Decimal(0))
+    return CostPerKmOut(
+        snapshot_at=snapshot_at,
+        vehicles=vehicles,
+        total_cost=total_cost,
+        distance_km=distance_km,
+        cost_per_km=(total_cost / distance_km).quantize(Decimal("0.0001")) if distance_km else None,
+    )
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+from decimal import Decimal
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+
+class AnalyticsOut(BaseModel):
+    snapshot_at: datetime = Field(description="Data is as of this nightly snapshot")
+
+
+class CostTrendPoint(BaseModel):
+    period: date
+    category: str
+    total: Decimal
+    entries: int
+
+
+class CostTrendsOut(AnalyticsOut):
+    """Expense totals per period and category"""
+    granularity: str
+    points: list[CostTrendPoint]
+
+
+class FuelPricePoint(BaseModel):
+    period: date
+    fuel: str
+    avg_price: Decimal = Field(description="Volume-weighted average price per unit")
+    min_price: Decimal
+    max_price: Decimal
+    volume: Decimal
+    fuelings: int
+
+
+class FuelPricesOut(AnalyticsOut):
+    """Fuel price history per period and fuel"""
+    granularity: str
+    points: list[FuelPricePoint]
+
+
+class VehicleCostPerKm(BaseModel):
+    vehicle_id: UUID
+    total_cost: Decimal
+    fuel_cost: Decimal
+    distance_km: Decimal | None = None
+    cost_per_km: Decimal | None = None
+
+
+class CostPerKmOut(AnalyticsOut):
+    """Cost per km per vehicle and for all vehicles together"""
+    vehicles: list[VehicleCostPerKm]
+    total_cost: Decimal
+    distance_km: Decimal
+    cost_per_km: Decimal | None = None
@@ -25,7 +25,7 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 @router.post("/register", response_model=UserOut, status_code=status.HTTP_201_CREATED)
 def register_user(
     payload: UserCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
 ) -> UserOut:
     """
     Rejestracja nowego użytkownika.
@@ -100,7 +100,7 @@ def register_user(
 @router.post("/login", response_model=Token)
 def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
 ) -> Token:
     """
     Logowanie użytkownika.
@@ -149,7 +149,7 @@ def login(
 @router.post("/refresh", response_model=Token)
 def refresh_access_token(
     payload: RefreshTokenRequest,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
 ) -> Token:
     """
     Odświeżenie access tokenu na podstawie refresh tokenu.
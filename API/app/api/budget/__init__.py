@@ -1,3 +1,3 @@
-from .routes import router
+from .routes import router, account_router
 
-__all__ = ["router"]
+__all__ = ["router", "account_router"]
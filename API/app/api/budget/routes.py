@@ -9,16 +9,57 @@ from sqlalchemy import text
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import DBAPIError
 
-from app.api.deps import get_db, get_current_user_id
+from app.api.deps import (
+    VehicleAccess,
+    get_current_user_id,
+    get_db,
+    get_read_db,
+    get_vehicle_access,
+    vehicle_access_from_row,
+)
+from app.db.pipeline import execute_pipelined
 from .schemas import (
     MonthlyBudgetForecast,
     BudgetForecastResponse,
     BudgetStatistics,
     ScheduledServiceDetail,
+    FleetMonthlyTotal,
+    VehicleBudgetForecast,
+    UserBudgetForecastResponse,
+    BudgetScenarioRequest,
+    BudgetScenariosResponse,
+    ScenarioForecast,
+    ScenarioMonth,
 )
+from .engine import Scenario, forecast, load_budget_data
 
 
 router = APIRouter(prefix="/vehicles/{vehicle_id}/budget", tags=["budget"])
+account_router = APIRouter(prefix="/users/me/budget", tags=["budget"])
+
+
+def _parse_forecast(row) -> MonthlyBudgetForecast:
+    """Convert a fn_predict_monthly_budget row (or its cached JSON form)."""
+    scheduled_details = [
+        ScheduledServiceDetail(
+            rule_id=detail['rule_id'],
+            name=detail['name'],
+            cost=float(detail['cost']),
+            date=detail['date'],
+            confidence=detail['confidence']
+        )
+        for detail in row['scheduled_maintenance_details'] or []
+    ]
+
+    return MonthlyBudgetForecast(
+        month=row['month'],
+        regular_costs=float(row['regular_costs']),
+        scheduled_maintenance=float(row['scheduled_maintenance']),
+        scheduled_maintenance_details=scheduled_details,
+        irregular_buffer=float(row['irregular_buffer']),
+        total_predicted=float(row['total_predicted']),
+        confidence_level=row['confidence_level']
+    )
 
 
 @router.get("/forecast", response_model=BudgetForecastResponse)
@@ -26,7 +67,7 @@ def get_budget_forecast(
     vehicle_id: UUID,
     months_ahead: int = Query(default=6, ge=1, le=24, description="Number of months to forecast"),
     include_irregular: bool = Query(default=False, description="Include buffer for irregular expenses"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
 ) -> BudgetForecastResponse:
     """
@@ -40,32 +81,15 @@ def get_budget_forecast(
     The forecast uses intelligent classification to exclude large one-time expenses
     from regular cost predictions while including them in the buffer calculation.
     """
-    # Verify user has access to this vehicle
-    existing = db.execute(
-        text("SELECT * FROM car_app.fn_get_vehicle(:user_id, :vehicle_id)"),
-        {"user_id": current_user_id, "vehicle_id": vehicle_id},
-    ).mappings().first()
-
-    if existing is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Vehicle not found or no permission",
-        )
-    
-    # Get average monthly mileage for context
-    try:
-        avg_mileage = db.execute(
-            text("SELECT car_app.fn_get_avg_monthly_mileage(:vehicle_id)"),
-            {"vehicle_id": vehicle_id}
-        ).scalar()
-        avg_mileage = float(avg_mileage) if avg_mileage else 0.0
-    except Exception:
-        avg_mileage = 0.0
-    
-    # Get budget forecast
+    # Access check, average mileage and forecast go out in one pipeline
     try:
-        rows = db.execute(
-            text("""
+        existing, mileage, rows = execute_pipelined(db, [
+            ("SELECT id FROM car_app.fn_get_vehicle(:user_id, :vehicle_id)",
+             {"user_id": current_user_id, "vehicle_id": vehicle_id}),
+            ("SELECT car_app.fn_get_avg_monthly_mileage(:vehicle_id) AS avg_mileage",
+             {"vehicle_id": vehicle_id}),
+            (
+                """
                 SELECT 
                     month,
                     regular_costs,
@@ -79,13 +103,14 @@ def get_budget_forecast(
                     :months_ahead,
                     :include_irregular
                 )
-            """),
-            {
-                "vehicle_id": vehicle_id,
-                "months_ahead": months_ahead,
-                "include_irregular": include_irregular,
-            }
-        ).mappings().all()
+                """,
+                {
+                    "vehicle_id": vehicle_id,
+                    "months_ahead": months_ahead,
+                    "include_irregular": include_irregular,
+                },
+            ),
+        ])
     except DBAPIError as exc:
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
@@ -96,37 +121,16 @@ def get_budget_forecast(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Unexpected error: {str(exc)}"
         ) from exc
-    
-    # Parse results
-    forecasts = []
-    for row in rows:
-        # Parse scheduled maintenance details from JSONB
-        details_json = row['scheduled_maintenance_details']
-        scheduled_details = []
-        
-        if details_json:
-            for detail in details_json:
-                scheduled_details.append(
-                    ScheduledServiceDetail(
-                        rule_id=detail['rule_id'],
-                        name=detail['name'],
-                        cost=float(detail['cost']),
-                        date=detail['date'],
-                        confidence=detail['confidence']
-                    )
-                )
-        
-        forecasts.append(
-            MonthlyBudgetForecast(
-                month=row['month'],
-                regular_costs=float(row['regular_costs']),
-                scheduled_maintenance=float(row['scheduled_maintenance']),
-                scheduled_maintenance_details=scheduled_details,
-                irregular_buffer=float(row['irregular_buffer']),
-                total_predicted=float(row['total_predicted']),
-                confidence_level=row['confidence_level']
-            )
+
+    if not existing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Vehicle not found or no permission",
         )
+
+    avg_mileage = float(mileage[0]["avg_mileage"] or 0) if mileage else 0.0
+    
+    forecasts = [_parse_forecast(row) for row in rows]
     
     return BudgetForecastResponse(
         vehicle_id=vehicle_id,
@@ -137,10 +141,81 @@ def get_budget_forecast(
     )
 
 
+@router.post("/scenarios", response_model=BudgetScenariosResponse)
+def evaluate_budget_scenarios(
+    vehicle_id: UUID,
+    payload: BudgetScenarioRequest,
+    db: Session = Depends(get_db, scope="function"),
+    current_user_id: UUID = Depends(get_current_user_id),
+) -> BudgetScenariosResponse:
+    """
+    Evaluate what-if scenarios against the vehicle's budget forecast.
+
+    Each scenario may change the monthly mileage, the fuel price (in percent)
+    or skip scheduled services. The cost history is loaded once and all
+    scenarios, plus the unchanged baseline, are computed together by the
+    vectorized engine (``engine.forecast``).
+    """
+    try:
+        data = load_budget_data(db, current_user_id, vehicle_id)
+    except DBAPIError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Database error while loading budget data."
+        ) from exc
+    finally:
+        db.rollback()
+
+    if data is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Vehicle not found or no permission",
+        )
+
+    scenarios = [Scenario()] + [
+        Scenario(
+            monthly_km=item.monthly_km,
+            fuel_price_change_pct=item.fuel_price_change_pct,
+            skip_rule_ids=frozenset(item.skip_rule_ids),
+        )
+        for item in payload.scenarios
+    ]
+    result = forecast(data, scenarios, payload.months_ahead, payload.include_irregular)
+
+    totals = result.total_predicted.sum(axis=1)
+    forecasts = [
+        ScenarioForecast(
+            name=name,
+            monthly_km=float(result.monthly_km[s]),
+            months=[
+                ScenarioMonth(
+                    month=month,
+                    regular_costs=float(result.regular_costs[s, m]),
+                    scheduled_maintenance=float(result.scheduled_maintenance[s, m]),
+                    irregular_buffer=float(result.irregular_buffer[s, m]),
+                    total_predicted=float(result.total_predicted[s, m]),
+                )
+                for m, month in enumerate(result.months)
+            ],
+            total=float(totals[s]),
+            difference=float(totals[s] - totals[0]),
+        )
+        for s, name in enumerate(["baseline"] + [item.name for item in payload.scenarios])
+    ]
+
+    return BudgetScenariosResponse(
+        vehicle_id=vehicle_id,
+        forecast_months=payload.months_ahead,
+        include_irregular=payload.include_irregular,
+        baseline=forecasts[0],
+        scenarios=forecasts[1:],
+    )
+
+
 @router.get("/statistics", response_model=BudgetStatistics)
 def get_budget_statistics(
     vehicle_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
 ) -> BudgetStatistics:
     """
@@ -150,55 +225,61 @@ def get_budget_statistics(
     - Total and average regular expenses
     - Total and average irregular expenses
     - Largest single expense
-    """
-    # Verify user has access to this vehicle
-    existing = db.execute(
-        text("SELECT * FROM car_app.fn_get_vehicle(:user_id, :vehicle_id)"),
-        {"user_id": current_user_id, "vehicle_id": vehicle_id},
-    ).mappings().first()
 
-    if existing is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Vehicle not found or no permission",
-        )
-    
-    # Get statistics
+    The access check (fn_resolve_vehicle_access) is part of the statistics
+    query, so the request costs one statement; without access the
+    statistics are not computed.
+    """
     try:
         stats = db.execute(
             text("""
-                WITH monthly_stats AS (
+                SELECT access.user_exists, access.role, st.*
+                FROM car_app.fn_resolve_vehicle_access(:user_id, :vehicle_id) AS access
+                LEFT JOIN LATERAL (
+                    WITH monthly_stats AS (
+                        SELECT 
+                            DATE_TRUNC('month', expense_date) as month,
+                            SUM(CASE WHEN expense_type = 'REGULAR' THEN amount ELSE 0 END) as monthly_regular,
+                            SUM(CASE WHEN expense_type IN ('IRREGULAR_MEDIUM', 'IRREGULAR_LARGE') THEN amount ELSE 0 END) as monthly_irregular,
+                            MAX(amount) as largest_amount
+                        FROM car_app.expenses
+                        WHERE access.role IS NOT NULL
+                          AND vehicle_id = :vehicle_id
+                          AND expense_date >= CURRENT_DATE - INTERVAL '12 months'
+                        GROUP BY DATE_TRUNC('month', expense_date)
+                    )
                     SELECT 
-                        DATE_TRUNC('month', expense_date) as month,
-                        SUM(CASE WHEN expense_type = 'REGULAR' THEN amount ELSE 0 END) as monthly_regular,
-                        SUM(CASE WHEN expense_type IN ('IRREGULAR_MEDIUM', 'IRREGULAR_LARGE') THEN amount ELSE 0 END) as monthly_irregular,
-                        MAX(amount) as largest_amount
-                    FROM car_app.expenses
-                    WHERE vehicle_id = :vehicle_id
-                      AND expense_date >= CURRENT_DATE - INTERVAL '12 months'
-                    GROUP BY DATE_TRUNC('month', expense_date)
-                )
-                SELECT 
-                    (SELECT COALESCE(SUM(amount), 0) FROM car_app.expenses 
-                     WHERE vehicle_id = :vehicle_id 
-                     AND expense_type = 'REGULAR' 
-                     AND expense_date >= CURRENT_DATE - INTERVAL '12 months') as total_regular,
-                    (SELECT COALESCE(SUM(amount), 0) FROM car_app.expenses 
-                     WHERE vehicle_id = :vehicle_id 
-                     AND expense_type IN ('IRREGULAR_MEDIUM', 'IRREGULAR_LARGE')
-                     AND expense_date >= CURRENT_DATE - INTERVAL '12 months') as total_irregular,
-                    ROUND(COALESCE(AVG(monthly_regular), 0)) as avg_regular,
-                    ROUND(COALESCE(SUM(monthly_irregular) / GREATEST(COUNT(*) FILTER (WHERE monthly_irregular > 0), 1), 0) * 0.15) as avg_irregular,
-                    MAX(largest_amount) as largest_expense,
-                    (SELECT category FROM car_app.expenses e2 
-                     WHERE e2.vehicle_id = :vehicle_id 
-                     AND e2.expense_date >= CURRENT_DATE - INTERVAL '12 months'
-                     ORDER BY amount DESC LIMIT 1) as largest_category
-                FROM monthly_stats
+                        (SELECT COALESCE(SUM(amount), 0) FROM car_app.expenses 
+                         WHERE vehicle_id = :vehicle_id 
+                         AND expense_type = 'REGULAR' 
+                         AND expense_date >= CURRENT_DATE - INTERVAL '12 months') as total_regular,
+                        (SELECT COALESCE(SUM(amount), 0) FROM car_app.expenses 
+                         WHERE vehicle_id = :vehicle_id 
+                         AND expense_type IN ('IRREGULAR_MEDIUM', 'IRREGULAR_LARGE')
+                         AND expense_date >= CURRENT_DATE - INTERVAL '12 months') as total_irregular,
+                        ROUND(COALESCE(AVG(monthly_regular), 0)) as avg_regular,
+                        ROUND(COALESCE(SUM(monthly_irregular) / GREATEST(COUNT(*) FILTER (WHERE monthly_irregular > 0), 1), 0) * 0.15) as avg_irregular,
+                        MAX(largest_amount) as largest_expense,
+                        (SELECT category FROM car_app.expenses e2 
+                         WHERE e2.vehicle_id = :vehicle_id 
+                         AND e2.expense_date >= CURRENT_DATE - INTERVAL '12 months'
+                         ORDER BY amount DESC LIMIT 1) as largest_category
+                    FROM monthly_stats
+                    -- without access: expenses are not scanned and no statistics row is built
+                    HAVING access.role IS NOT NULL
+                ) AS st ON TRUE
             """),
-            {"vehicle_id": vehicle_id}
-        ).mappings().first()
-        
+            {"user_id": current_user_id, "vehicle_id": vehicle_id}
+        ).mappings().one()
+    except DBAPIError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Database error while fetching statistics"
+        ) from exc
+
+    vehicle_access_from_row(stats, current_user_id, vehicle_id)
+
+    try:
         return BudgetStatistics(
             total_regular_last_12m=float(stats['total_regular']),
             total_irregular_last_12m=float(stats['total_irregular']),
@@ -207,11 +288,6 @@ def get_budget_statistics(
             largest_expense_last_12m=float(stats['largest_expense']) if stats['largest_expense'] else None,
             largest_expense_category=stats['largest_category']
         )
-    except DBAPIError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail="Database error while fetching statistics"
-        ) from exc
     except Exception as exc:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -222,8 +298,9 @@ def get_budget_statistics(
 @router.post("/classify-expenses", status_code=status.HTTP_200_OK)
 def classify_vehicle_expenses(
     vehicle_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
+    access: VehicleAccess = Depends(get_vehicle_access),
 ) -> dict:
     """
     Manually trigger classification of expenses for this vehicle.
@@ -234,18 +311,6 @@ def classify_vehicle_expenses(
     
     Useful after importing bulk data or when you want to refresh classifications.
     """
-    # Verify user has access to this vehicle (OWNER or EDITOR required for modifications)
-    existing = db.execute(
-        text("SELECT * FROM car_app.fn_get_vehicle(:user_id, :vehicle_id)"),
-        {"user_id": current_user_id, "vehicle_id": vehicle_id},
-    ).mappings().first()
-
-    if existing is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Vehicle not found or no permission",
-        )
-    
     # Run classification
     try:
         result = db.execute(
@@ -284,3 +349,77 @@ def classify_vehicle_expenses(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Unexpected error: {str(exc)}"
         ) from exc
+
+
+@account_router.get("/forecast", response_model=UserBudgetForecastResponse)
+def get_user_budget_forecast(
+    months_ahead: int = Query(default=6, ge=1, le=24, description="Number of months to forecast"),
+    include_irregular: bool = Query(default=False, description="Include buffer for irregular expenses"),
+    db: Session = Depends(get_db, scope="function"),
+    current_user_id: UUID = Depends(get_current_user_id),
+) -> UserBudgetForecastResponse:
+    """
+    Budget forecast for every vehicle the user can access, with monthly totals.
+
+    One call to ``fn_predict_user_budget``: vehicles whose cached forecast is
+    still valid (same day, no change to their expenses, fuelings, reminders,
+    services or odometer entries since) are served from the cache, the rest
+    are recomputed in one statement and cached.
+    """
+    try:
+        rows = db.execute(
+            text("""
+                SELECT vehicle_id, vehicle_name, avg_monthly_mileage, forecast, from_cache
+                FROM car_app.fn_predict_user_budget(
+                    :user_id,
+                    :months_ahead,
+                    :include_irregular
+                )
+            """),
+            {
+                "user_id": current_user_id,
+                "months_ahead": months_ahead,
+                "include_irregular": include_irregular,
+            }
+        ).mappings().all()
+        db.commit()
+    except DBAPIError as exc:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Database error while fetching budget forecast."
+        ) from exc
+    except Exception as exc:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Unexpected server error."
+        ) from exc
+
+    vehicles = []
+    totals: dict[date, FleetMonthlyTotal] = {}
+    for row in rows:
+        forecasts = [_parse_forecast(month) for month in row['forecast']]
+        vehicles.append(
+            VehicleBudgetForecast(
+                vehicle_id=row['vehicle_id'],
+                vehicle_name=row['vehicle_name'],
+                avg_monthly_mileage=float(row['avg_monthly_mileage']),
+                cached=row['from_cache'],
+                forecasts=forecasts,
+            )
+        )
+
+        for month_forecast in forecasts:
+            total = totals.setdefault(month_forecast.month, FleetMonthlyTotal(month=month_forecast.month))
+            total.regular_costs += month_forecast.regular_costs
+            total.scheduled_maintenance += month_forecast.scheduled_maintenance
+            total.irregular_buffer += month_forecast.irregular_buffer
+            total.total_predicted += month_forecast.total_predicted
+
+    return UserBudgetForecastResponse(
+        forecast_months=months_ahead,
+        include_irregular=include_irregular,
+        vehicles=vehicles,
+        totals=[totals[month] for month in sorted(totals)],
+    )
@@ -57,3 +57,82 @@ class BudgetStatistics(BaseModel):
     avg_monthly_irregular: float
     largest_expense_last_12m: float | None
     largest_expense_category: str | None
+
+
+class VehicleBudgetForecast(BaseModel):
+    """Budget forecast of one vehicle in the cross-vehicle forecast"""
+    vehicle_id: UUID
+    vehicle_name: str
+    avg_monthly_mileage: float
+    cached: bool = Field(
+        description="Served from the forecast cache (no relevant change since it was computed today)"
+    )
+    forecasts: list[MonthlyBudgetForecast]
+
+
+class FleetMonthlyTotal(BaseModel):
+    """Forecast for a single month summed over all vehicles"""
+    month: date
+    regular_costs: float = 0.0
+    scheduled_maintenance: float = 0.0
+    irregular_buffer: float = 0.0
+    total_predicted: float = 0.0
+
+
+class UserBudgetForecastResponse(BaseModel):
+    """Budget forecast for all vehicles of the user"""
+    forecast_months: int
+    include_irregular: bool
+    vehicles: list[VehicleBudgetForecast]
+    totals: list[FleetMonthlyTotal]
+
+
+class BudgetScenario(BaseModel):
+    """What-if assumptions; omitted fields keep the historical values"""
+    name: str = Field(min_length=1, max_length=80)
+    monthly_km: float | None = Field(
+        default=None,
+        ge=0,
+        description="Monthly mileage instead of the historical average",
+    )
+    fuel_price_change_pct: float = Field(
+        default=0.0,
+        ge=-100,
+        le=1000,
+        description="Fuel price change in percent, e.g. 10 or -5",
+    )
+    skip_rule_ids: list[UUID] = Field(
+        default_factory=list,
+        description="Reminder rules whose scheduled services are skipped",
+    )
+
+
+class BudgetScenarioRequest(BaseModel):
+    months_ahead: int = Field(default=6, ge=1, le=24)
+    include_irregular: bool = False
+    scenarios: list[BudgetScenario] = Field(min_length=1, max_length=100)
+
+
+class ScenarioMonth(BaseModel):
+    month: date
+    regular_costs: float
+    scheduled_maintenance: float
+    irregular_buffer: float
+    total_predicted: float
+
+
+class ScenarioForecast(BaseModel):
+    """Forecast of a single scenario"""
+    name: str
+    monthly_km: float
+    months: list[ScenarioMonth]
+    total: float = Field(description="Sum of total_predicted over the forecast")
+    difference: float = Field(description="total minus the baseline total")
+
+
+class BudgetScenariosResponse(BaseModel):
+    vehicle_id: UUID
+    forecast_months: int
+    include_irregular: bool
+    baseline: ScenarioForecast
+    scenarios: list[ScenarioForecast]
@@ -1,25 +1,128 @@
 from collections.abc import Generator
+from dataclasses import dataclass
 from uuid import UUID
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError
 from sqlalchemy import text
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, sessionmaker
 
-from app.db.session import SessionLocal
+from app.config import settings
+from app.db.replica import write_stickiness
+from app.db.session import ReplicaSessionLocal, SessionLocal, replica_engine
+from app.core.cache import invalidate_on_commit
+from app.core.metrics import metrics
+from app.core.deadlines import route_deadline_ms
 from app.core.security import decode_access_token
 from app.api.users.schemas import TokenPayload, UserOut
 
 bearer_scheme = HTTPBearer()
 
+_READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
 
-def get_db() -> Generator[Session, None, None]:
-    db = SessionLocal()
+
+def get_db(request: Request) -> Generator[Session, None, None]:
+    """
+    Sesja żądania. Połączenie z puli jest pobierane dopiero przy pierwszym
+    zapytaniu (żądania odrzucone wcześniej, np. 401/422, nie zajmują go
+    wcale) i wraca do puli po commit/rollback.
+    Trasy używają Depends(get_db, scope="function"): sesja jest zamykana
+    zaraz po powrocie z endpointu, jeszcze przed serializacją i wysłaniem
+    odpowiedzi. Wszystkie zależności tej samej trasy muszą podawać ten sam
+    scope, inaczej FastAPI utworzy drugą sesję.
+    """
+    user_id = _token_user_id(request)
+    # Po zapisie odczyty użytkownika przez chwilę idą na główny serwer
+    # (oznaczane także na końcu, żeby okno liczyło się od commitu)
+    is_write = user_id is not None and request.method not in _READ_METHODS
+    if is_write:
+        write_stickiness.mark(user_id)
+    db = _open_session(SessionLocal, request, user_id)
+    # Zapis w obrębie pojazdu unieważnia po commicie jego wpisy w cache odpowiedzi
+    vehicle_id = request.path_params.get("vehicle_id")
+    if vehicle_id is not None and request.method not in _READ_METHODS:
+        invalidate_on_commit(db, f"vehicle:{vehicle_id}")
+    try:
+        yield db
+    finally:
+        close_session(db, request)
+        if is_write:
+            write_stickiness.mark(user_id)
+
+
+def get_read_db(request: Request) -> Generator[Session, None, None]:
+    """
+    Sesja dla endpointów tylko do odczytu: replika (DB_REPLICA_HOST), chyba że
+    użytkownik zapisywał coś w ostatnich DB_REPLICA_STICKY_SECONDS sekundach
+    - wtedy główny serwer, żeby widział własne zmiany.
+    """
+    user_id = _token_user_id(request)
+    use_replica = replica_engine is not None and not (user_id is not None and write_stickiness.is_sticky(user_id))
+    db = _open_session(ReplicaSessionLocal if use_replica else SessionLocal, request, user_id)
     try:
         yield db
     finally:
-        db.close()
+        close_session(db, request)
+
+
+def open_streaming_session(request: Request) -> Session:
+    """
+    Sesja dla StreamingResponse, która czyta z bazy już po zakończeniu
+    zależności żądania. Ustawiana jak w get_db (kontekst RLS, limit czasu
+    trasy); generator odpowiedzi zamyka ją przez close_session.
+    """
+    return _open_session(SessionLocal, request, _token_user_id(request))
+
+
+def _open_session(factory: sessionmaker, request: Request, user_id: UUID | None) -> Session:
+    db = factory()
+    # Kontekst RLS i limit czasu trasy nakłada listener after_begin (app.db.session)
+    if settings.db_rls_enabled and user_id is not None:
+        db.info["rls_user_id"] = user_id
+    deadline_ms = route_deadline_ms(request)
+    if deadline_ms is not None:
+        db.info["statement_timeout_ms"] = deadline_ms
+    return db
+
+
+def close_session(db: Session, request: Request) -> None:
+    queries = db.info.get("query_count", 0)
+    db.close()
+    if queries:
+        route = request.scope.get("route")
+        metrics.observe("db_queries_per_request", queries, route=getattr(route, "name", "unknown"))
+
+
+def _token_user_id(request: Request) -> UUID | None:
+    """
+    Id użytkownika z nagłówka Authorization (kontekst RLS, wybór repliki);
+    None, gdy żaden z tych trybów nie jest włączony.
+    Nie zgłasza błędów - brak lub zły token obsługuje get_current_user_id,
+    a sesja bez użytkownika działa na roli właściciela tabel.
+    """
+    if not settings.db_rls_enabled and replica_engine is None:
+        return None
+
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return UUID(TokenPayload(**decode_access_token(token)).sub)
+    except (JWTError, TypeError, ValueError):
+        return None
+
+
+def ensure_vehicle_access(db: Session, user_id: UUID, vehicle_id: UUID) -> None:
+    """
+    404, gdy użytkownik nie ma dostępu do pojazdu (resolve_vehicle_access).
+    W trybie RLS sprawdzenie jest pomijane - polityki car_app same
+    odfiltrowują dane cudzych pojazdów.
+    """
+    if settings.db_rls_enabled:
+        return
+
+    resolve_vehicle_access(db, user_id, vehicle_id)
 
 
 def get_current_user_id(
@@ -56,7 +159,7 @@ def get_current_user_id(
 
 
 def get_current_user(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
 ) -> UserOut:
     """
@@ -76,3 +179,69 @@ def get_current_user(
         )
 
     return UserOut.model_validate(row)
+
+
+@dataclass(frozen=True)
+class VehicleAccess:
+    user_id: UUID
+    vehicle_id: UUID
+    role: str  # OWNER, EDITOR, VIEWER
+
+    @property
+    def can_write(self) -> bool:
+        return self.role in ("OWNER", "EDITOR")
+
+
+def resolve_vehicle_access(db: Session, user_id: UUID, vehicle_id: UUID) -> VehicleAccess:
+    """
+    Istnienie użytkownika i jego rola w pojeździe jednym zapytaniem
+    (fn_resolve_vehicle_access): 401, gdy użytkownika z tokenu nie ma już
+    w bazie, 404, gdy nie ma dostępu do pojazdu.
+    """
+    row = db.execute(
+        text("SELECT user_exists, role FROM car_app.fn_resolve_vehicle_access(:user_id, :vehicle_id)"),
+        {"user_id": user_id, "vehicle_id": vehicle_id},
+    ).one()
+    return vehicle_access_from_row(row, user_id, vehicle_id)
+
+
+def vehicle_access_from_row(row, user_id: UUID, vehicle_id: UUID) -> VehicleAccess:
+    """
+    VehicleAccess z kolumn user_exists, role (fn_resolve_vehicle_access),
+    także gdy trasa dołącza je do własnego zapytania, żeby nie płacić
+    osobnego round tripu za sprawdzenie dostępu.
+    """
+    if not row.user_exists:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if row.role is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Vehicle not found or no permission",
+        )
+    return VehicleAccess(user_id=user_id, vehicle_id=vehicle_id, role=row.role)
+
+
+def get_vehicle_access(
+    vehicle_id: UUID,
+    db: Session = Depends(get_db, scope="function"),
+    current_user_id: UUID = Depends(get_current_user_id),
+) -> VehicleAccess:
+    """
+    Dostęp do pojazdu z parametru ścieżki {vehicle_id} dla tras zapisujących.
+    Wynik jest cache'owany w obrębie żądania, więc kolejne zależności
+    trasy nie wysyłają zapytania ponownie.
+    """
+    return resolve_vehicle_access(db, current_user_id, vehicle_id)
+
+
+def get_read_vehicle_access(
+    vehicle_id: UUID,
+    db: Session = Depends(get_read_db, scope="function"),
+    current_user_id: UUID = Depends(get_current_user_id),
+) -> VehicleAccess:
+    """Jak get_vehicle_access, na sesji get_read_db (tras tylko do odczytu)."""
+    return resolve_vehicle_access(db, current_user_id, vehicle_id)
@@ -3,12 +3,15 @@ from __future__ import annotations
 from typing import List
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, Query, status
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError, DataError, DBAPIError
 
 from app.api.deps import get_db, get_current_user_id
+from app.core.etag import collection_etag, is_not_modified, not_modified, with_etag
+from app.core.idempotency import Idempotency, idempotency
+from app.core.serialization import json_list_response
 from .schemas import ExpenseCreate, ExpenseOut, ExpenseUpdate, ExpenseSummary
 
 
@@ -18,12 +21,17 @@ router = APIRouter(tags=["expenses"])
 @router.get("/vehicles/{vehicle_id}/expenses", response_model=List[ExpenseOut])
 def list_expenses(
     vehicle_id: UUID,
+    request: Request,
     from_date: str | None = Query(default=None),
     to_date: str | None = Query(default=None),
     category: str | None = Query(default=None),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
-) -> list[ExpenseOut]:
+) -> Response:
+    etag = collection_etag(db, current_user_id, vehicle_id, "expenses")
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+
     try:
         rows = db.execute(
             text(
@@ -36,16 +44,21 @@ def list_expenses(
     except Exception as exc:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Unexpected server error.") from exc
 
-    return [ExpenseOut.model_validate(row) for row in rows]
+    return with_etag(json_list_response(ExpenseOut, rows), etag)
 
 
 @router.post("/vehicles/{vehicle_id}/expenses", response_model=ExpenseOut, status_code=status.HTTP_201_CREATED)
 def create_expense(
     vehicle_id: UUID,
     payload: ExpenseCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
-) -> ExpenseOut:
+    idem: Idempotency = Depends(idempotency("create_expense")),
+) -> ExpenseOut | Response:
+    replay = idem.begin()
+    if replay is not None:
+        return replay
+
     params = {
         "p_user_id": current_user_id,
         "p_vehicle_id": vehicle_id,
@@ -63,6 +76,7 @@ def create_expense(
             ),
             params,
         ).mappings().first()
+        idem.save(status.HTTP_201_CREATED, ExpenseOut, row)
         db.commit()
     except IntegrityError as exc:
         db.rollback()
@@ -87,7 +101,7 @@ def create_expense(
 def update_expense(
     expense_id: UUID,
     payload: ExpenseUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
 ) -> ExpenseOut:
     patch = payload.model_dump(exclude_unset=True)
@@ -132,7 +146,7 @@ def update_expense(
 @router.delete("/expenses/{expense_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_expense(
     expense_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
 ) -> None:
     try:
@@ -159,7 +173,7 @@ def get_expenses_summary(
     vehicle_id: UUID,
     from_date: str | None = Query(default=None),
     to_date: str | None = Query(default=None),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
 ) -> ExpenseSummary:
     try:
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import tempfile
+from typing import IO, Any, Iterator
+
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import TextClause
+
+ROW_GROUP_SIZE = 50_000
+SPOOL_MAX_SIZE = 16 * 1024 * 1024
+READ_CHUNK_SIZE = 64 * 1024
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.file",
+}
+
+
+def _pyarrow() -> tuple[Any, Any]:
+    """pyarrow is only needed for the columnar formats, so it is imported on demand."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Parquet/Arrow export is not available on this server.",
+        ) from exc
+    return pyarrow, pyarrow.parquet
+
+
+def _schema(pa: Any, data_type: str) -> Any:
+    """Arrow schema per export data type; decimals keep the precision of the database columns."""
+    timestamp = pa.timestamp("us", tz="UTC")
+    odometer = pa.decimal128(10, 1)
+    money = pa.decimal128(12, 2)
+    unit = pa.decimal128(10, 3)
+
+    fields = {
+        "fuelings": [
+            ("Date & Time", timestamp),
+            ("Odometer (km)", odometer),
+            ("Volume (L)", unit),
+            ("Price per Unit", unit),
+            ("Total Cost", pa.decimal128(21, 6)),  # numeric(10,3) * numeric(10,3)
+            ("Fuel Type", pa.string()),
+            ("Driving Cycle", pa.string()),
+            ("Full Tank", pa.bool_()),
+            ("Note", pa.string()),
+        ],
+        "services": [
+            ("Service Date", pa.date32()),
+            ("Service Type", pa.string()),
+            ("Odometer (km)", odometer),
+            ("Total Cost", money),
+            ("Reference/Invoice", pa.string()),
+            ("Note", pa.string()),
+        ],
+        "expenses": [
+            ("Expense Date", pa.date32()),
+            ("Category", pa.string()),
+            ("Amount", money),
+            ("Type", pa.string()),
+            ("Note", pa.string()),
+        ],
+        "odometer": [
+            ("Date & Time", timestamp),
+            ("Odometer (km)", odometer),
+            ("Source", pa.string()),
+        ],
+    }[data_type]
+    return pa.schema(fields)
+
+
+def _iter_file(file: IO[bytes]) -> Iterator[bytes]:
+    try:
+        while chunk := file.read(READ_CHUNK_SIZE):
+            yield chunk
+    finally:
+        file.close()
+
+
+def write_columnar(
+    db: Session,
+    statement: TextClause,
+    params: dict,
+    data_type: str,
+    fmt: str,
+    file: IO[bytes],
+) -> None:
+    """
+    Run an export query and write its rows to ``file`` as Parquet or Arrow IPC.
+
+    Rows are fetched from a server-side cursor ROW_GROUP_SIZE at a time and
+    each batch is written as one row group / record batch, so only one batch
+    is held in memory.
+    """
+    pa, pq = _pyarrow()
+    schema = _schema(pa, data_type)
+
+    result = db.execute(
+        statement,
+        params,
+        execution_options={"stream_results": True, "yield_per": ROW_GROUP_SIZE},
+    )
+    if list(result.keys()) != schema.names:
+        raise RuntimeError(f"Export columns of {data_type} do not match the columnar schema.")
+
+    sink = pa.PythonFile(file, mode="w")
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_file(sink, schema)
+
+    with writer:
+        for rows in result.partitions():
+            columns = zip(*rows)
+            writer.write_batch(
+                pa.record_batch(
+                    [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                    schema=schema,
+                )
+            )
+
+
+def columnar_response(
+    db: Session,
+    statement: TextClause,
+    params: dict,
+    data_type: str,
+    fmt: str,
+    filename: str,
+) -> StreamingResponse:
+    """
+    Export as a Parquet / Arrow download. The file is built in a
+    SpooledTemporaryFile (Parquet needs its footer written before the
+    response can start).
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    try:
+        write_columnar(db, statement, params, data_type, fmt, spool)
+        size = spool.tell()
+        spool.seek(0)
+    except BaseException:
+        spool.close()
+        raise
+
+    return StreamingResponse(
+        _iter_file(spool),
+        media_type=MEDIA_TYPES[fmt],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Content-Length": str(size),
+        },
+    )
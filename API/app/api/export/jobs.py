@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import csv
+import io
+import logging
+from typing import IO
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import TextClause
+
+from app.config import settings
+from app.core.file_store import file_store
+from app.db.session import SessionLocal
+from .columnar import ROW_GROUP_SIZE, write_columnar
+from .queries import EXPORT_QUERIES
+
+logger = logging.getLogger(__name__)
+
+
+def write_csv(db: Session, statement: TextClause, params: dict, file: IO[bytes]) -> None:
+    """Write the export rows as a CSV file (same columns and values as the CSV export)."""
+    result = db.execute(
+        statement,
+        params,
+        execution_options={"stream_results": True, "yield_per": ROW_GROUP_SIZE},
+    )
+    output = io.TextIOWrapper(file, encoding="utf-8", newline="")
+    writer = csv.writer(output)
+    writer.writerow(result.keys())
+    for rows in result.partitions():
+        writer.writerows(["" if value is None else str(value) for value in row] for row in rows)
+    output.flush()
+    output.detach()
+
+
+def _finish(db: Session, job_id: UUID, status: str, **values) -> None:
+    db.execute(
+        text(
+            """
+            UPDATE car_app.export_jobs
+            SET status = :status,
+                file_sha256 = :file_sha256,
+                file_size = :file_size,
+                error = :error,
+                finished_at = now()
+            WHERE id = :job_id
+            """
+        ),
+        {"job_id": job_id, "status": status, "file_sha256": None, "file_size": None, "error": None, **values},
+    )
+    db.commit()
+
+
+def run_export_job(job_id: UUID) -> None:
+    """
+    Background task: run the export query once and put the artifact in the file store.
+
+    Runs in its own session, in a REPEATABLE READ READ ONLY transaction, and
+    afterwards removes store files older than EXPORT_TTL_HOURS.
+    """
+    db = SessionLocal()
+    try:
+        job = db.execute(
+            text(
+                """
+                UPDATE car_app.export_jobs
+                SET status = 'RUNNING'
+                WHERE id = :job_id
+                  AND status = 'PENDING'
+                RETURNING vehicle_id, data_type, format, start_date, end_date
+                """
+            ),
+            {"job_id": job_id},
+        ).mappings().first()
+        db.commit()
+        if job is None:
+            return
+
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        db.execute(text("SET TRANSACTION READ ONLY"))
+        statement = text(EXPORT_QUERIES[job["data_type"]])
+        params = {
+            "vehicle_id": job["vehicle_id"],
+            "start_date": job["start_date"],
+            "end_date": job["end_date"],
+        }
+
+        with file_store.writer() as file:
+            if job["format"] == "csv":
+                write_csv(db, statement, params, file)
+            else:
+                write_columnar(db, statement, params, job["data_type"], job["format"], file)
+            db.rollback()
+            sha256, size = file_store.store(file)
+
+        _finish(db, job_id, "COMPLETED", file_sha256=sha256, file_size=size)
+    except HTTPException as exc:
+        db.rollback()
+        _finish(db, job_id, "FAILED", error=str(exc.detail))
+    except Exception:
+        logger.exception("Export job %s failed", job_id)
+        db.rollback()
+        _finish(db, job_id, "FAILED", error="Unexpected error while exporting.")
+    finally:
+        db.close()
+
+    file_store.prune(settings.export_ttl_hours * 3600)
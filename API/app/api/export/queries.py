@@ -0,0 +1,64 @@
+# CSV columns per data type, shared by the single-vehicle export and the ZIP export.
+FUELING_COLUMNS = """
+    filled_at AT TIME ZONE 'UTC' as "Date & Time",
+    odometer_km as "Odometer (km)",
+    volume as "Volume (L)",
+    price_per_unit as "Price per Unit",
+    (volume * price_per_unit) as "Total Cost",
+    fuel::text as "Fuel Type",
+    driving_cycle::text as "Driving Cycle",
+    full_tank as "Full Tank",
+    note as "Note"
+"""
+
+SERVICE_COLUMNS = """
+    service_date as "Service Date",
+    service_type::text as "Service Type",
+    odometer_km as "Odometer (km)",
+    total_cost as "Total Cost",
+    reference as "Reference/Invoice",
+    note as "Note"
+"""
+
+EXPENSE_COLUMNS = """
+    expense_date as "Expense Date",
+    category::text as "Category",
+    amount as "Amount",
+    expense_type as "Type",
+    note as "Note"
+"""
+
+# Single-vehicle export queries, parameters: vehicle_id, start_date, end_date.
+EXPORT_QUERIES = {
+    "fuelings": f"""
+        SELECT {FUELING_COLUMNS}
+        FROM car_app.fuelings
+        WHERE vehicle_id = :vehicle_id
+          AND filled_at::date BETWEEN :start_date AND :end_date
+        ORDER BY filled_at DESC
+    """,
+    "services": f"""
+        SELECT {SERVICE_COLUMNS}
+        FROM car_app.services
+        WHERE vehicle_id = :vehicle_id
+          AND service_date BETWEEN :start_date AND :end_date
+        ORDER BY service_date DESC
+    """,
+    "expenses": f"""
+        SELECT {EXPENSE_COLUMNS}
+        FROM car_app.expenses
+        WHERE vehicle_id = :vehicle_id
+          AND expense_date BETWEEN :start_date AND :end_date
+        ORDER BY expense_date DESC
+    """,
+    "odometer": """
+        SELECT
+            filled_at AT TIME ZONE 'UTC' as "Date & Time",
+            odometer_km as "Odometer (km)",
+            fuel::text as "Source"
+        FROM car_app.fuelings
+        WHERE vehicle_id = :vehicle_id
+          AND filled_at::date BETWEEN :start_date AND :end_date
+        ORDER BY filled_at DESC
+    """,
+}
@@ -1,67 +1,85 @@
 from __future__ import annotations
 
-from typing import Literal
+from typing import Iterator, Literal
 from uuid import UUID
 from datetime import date
 import csv
+import io
+import re
+import zipfile
 from io import StringIO
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy import text
+from sqlalchemy.engine import RowMapping
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import DBAPIError
 
-from app.api.deps import get_db, get_current_user_id
+from app.api.deps import (
+    VehicleAccess,
+    close_session,
+    ensure_vehicle_access,
+    get_current_user_id,
+    get_db,
+    get_read_db,
+    get_vehicle_access,
+    open_streaming_session,
+)
+from app.config import settings
+from app.core.etag import is_not_modified, not_modified
+from app.core.file_store import file_store
+from .columnar import MEDIA_TYPES, columnar_response
+from .jobs import run_export_job
+from .queries import EXPENSE_COLUMNS, EXPORT_QUERIES, FUELING_COLUMNS, SERVICE_COLUMNS
+from .schemas import ExportJobCreate, ExportJobOut
 
 router = APIRouter(prefix="/vehicles/{vehicle_id}/export", tags=["export"])
+account_router = APIRouter(prefix="/users/me", tags=["export"])
+jobs_router = APIRouter(tags=["export"])
 
 
-@router.get("/{data_type}")
+@router.get("/{data_type}", response_model=None)
 def export_vehicle_data(
     vehicle_id: UUID,
     data_type: Literal["fuelings", "services", "expenses", "odometer"],
     start_date: date,
     end_date: date,
-    db: Session = Depends(get_db),
+    format: Literal["csv", "parquet", "arrow"] = Query(
+        default="csv",
+        description="csv: JSON with csv_data; parquet / arrow: typed columnar file download",
+    ),
+    db: Session = Depends(get_read_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
-) -> dict:
+) -> dict | Response:
     """
-    Export vehicle data as CSV.
+    Export vehicle data as CSV, Parquet or Arrow IPC.
     
     Supported data types:
     - fuelings: Fuel entries with consumption, price, odometer
     - services: Service records with type, cost, odometer
     - expenses: All expenses with category, amount, date
     - odometer: Odometer readings history
+
+    Parquet and Arrow files keep column types (decimals with their database
+    precision, UTC timestamps, dates, booleans) and are written in row groups
+    from a server-side cursor.
     """
     # Verify user has access to this vehicle
-    existing = db.execute(
-        text("SELECT * FROM car_app.fn_get_vehicle(:user_id, :vehicle_id)"),
-        {"user_id": current_user_id, "vehicle_id": vehicle_id},
-    ).mappings().first()
+    ensure_vehicle_access(db, current_user_id, vehicle_id)
 
-    if existing is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Vehicle not found or no permission",
-        )
+    params = {"vehicle_id": vehicle_id, "start_date": start_date, "end_date": end_date}
 
     try:
-        if data_type == "fuelings":
-            csv_data = _export_fuelings(db, vehicle_id, start_date, end_date)
-        elif data_type == "services":
-            csv_data = _export_services(db, vehicle_id, start_date, end_date)
-        elif data_type == "expenses":
-            csv_data = _export_expenses(db, vehicle_id, start_date, end_date)
-        elif data_type == "odometer":
-            csv_data = _export_odometer(db, vehicle_id, start_date, end_date)
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Unsupported data type: {data_type}",
-            )
-
-        return {"csv_data": csv_data}
+        if format != "csv":
+            filename = f"{data_type}-{start_date:%Y%m%d}-{end_date:%Y%m%d}.{format}"
+            return columnar_response(db, text(EXPORT_QUERIES[data_type]), params, data_type, format, filename)
+
+        rows = db.execute(text(EXPORT_QUERIES[data_type]), params).mappings().all()
+        return {"csv_data": _rows_to_csv(rows)}
 
+    except HTTPException:
+        raise
     except Exception as exc:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -69,93 +87,6 @@ def export_vehicle_data(
         ) from exc
 
 
-def _export_fuelings(db: Session, vehicle_id: UUID, start_date: date, end_date: date) -> str:
-    """Export fuel entries to CSV"""
-    rows = db.execute(
-        text("""
-            SELECT 
-                filled_at AT TIME ZONE 'UTC' as "Date & Time",
-                odometer_km as "Odometer (km)",
-                volume as "Volume (L)",
-                price_per_unit as "Price per Unit",
-                (volume * price_per_unit) as "Total Cost",
-                fuel::text as "Fuel Type",
-                driving_cycle::text as "Driving Cycle",
-                full_tank as "Full Tank",
-                note as "Note"
-            FROM car_app.fuelings
-            WHERE vehicle_id = :vehicle_id
-              AND filled_at::date BETWEEN :start_date AND :end_date
-            ORDER BY filled_at DESC
-        """),
-        {"vehicle_id": vehicle_id, "start_date": start_date, "end_date": end_date}
-    ).mappings().all()
-
-    return _rows_to_csv(rows)
-
-
-def _export_services(db: Session, vehicle_id: UUID, start_date: date, end_date: date) -> str:
-    """Export service records to CSV"""
-    rows = db.execute(
-        text("""
-            SELECT 
-                service_date as "Service Date",
-                service_type::text as "Service Type",
-                odometer_km as "Odometer (km)",
-                total_cost as "Total Cost",
-                reference as "Reference/Invoice",
-                note as "Note"
-            FROM car_app.services
-            WHERE vehicle_id = :vehicle_id
-              AND service_date BETWEEN :start_date AND :end_date
-            ORDER BY service_date DESC
-        """),
-        {"vehicle_id": vehicle_id, "start_date": start_date, "end_date": end_date}
-    ).mappings().all()
-
-    return _rows_to_csv(rows)
-
-
-def _export_expenses(db: Session, vehicle_id: UUID, start_date: date, end_date: date) -> str:
-    """Export expenses to CSV"""
-    rows = db.execute(
-        text("""
-            SELECT 
-                expense_date as "Expense Date",
-                category::text as "Category",
-                amount as "Amount",
-                expense_type as "Type",
-                note as "Note"
-            FROM car_app.expenses
-            WHERE vehicle_id = :vehicle_id
-              AND expense_date BETWEEN :start_date AND :end_date
-            ORDER BY expense_date DESC
-        """),
-        {"vehicle_id": vehicle_id, "start_date": start_date, "end_date": end_date}
-    ).mappings().all()
-
-    return _rows_to_csv(rows)
-
-
-def _export_odometer(db: Session, vehicle_id: UUID, start_date: date, end_date: date) -> str:
-    """Export odometer history to CSV"""
-    rows = db.execute(
-        text("""
-            SELECT 
-                filled_at AT TIME ZONE 'UTC' as "Date & Time",
-                odometer_km as "Odometer (km)",
-                fuel::text as "Source"
-            FROM car_app.fuelings
-            WHERE vehicle_id = :vehicle_id
-              AND filled_at::date BETWEEN :start_date AND :end_date
-            ORDER BY filled_at DESC
-        """),
-        {"vehicle_id": vehicle_id, "start_date": start_date, "end_date": end_date}
-    ).mappings().all()
-
-    return _rows_to_csv(rows)
-
-
 def _rows_to_csv(rows: list) -> str:
     """Convert database rows to CSV string"""
     if not rows:
@@ -171,3 +102,417 @@ def _rows_to_csv(rows: list) -> str:
         writer.writerow(row_dict)
     
     return output.getvalue()
+
+
+# ZIP export of the whole account
+
+ZIP_CHUNK_SIZE = 64 * 1024
+ZIP_FETCH_SIZE = 1000
+
+_ACCESSIBLE_VEHICLES = """
+    WITH accessible AS (
+        SELECT v.id, v.name, v.model, v.production_year, v.vin, v.plate,
+               CASE WHEN v.owner_id = :user_id THEN 'OWNER' ELSE s.role::text END AS role
+        FROM car_app.vehicles v
+        LEFT JOIN car_app.vehicle_shares s
+          ON s.vehicle_id = v.id
+         AND s.user_id = :user_id
+        WHERE v.owner_id = :user_id
+           OR s.user_id IS NOT NULL
+    )
+"""
+
+# Entry name -> query. Rows carry vehicle_id / vehicle_name (not written to the
+# CSV) and are ordered by vehicle, so each vehicle's file is written in one go
+# while a single query per data type covers every vehicle.
+_ZIP_ENTRIES = {
+    "fuelings.csv": f"""
+        SELECT a.id AS vehicle_id, a.name AS vehicle_name, {FUELING_COLUMNS}
+        FROM accessible a
+        JOIN car_app.fuelings t ON t.vehicle_id = a.id
+        ORDER BY a.id, t.filled_at DESC
+    """,
+    "services.csv": f"""
+        SELECT a.id AS vehicle_id, a.name AS vehicle_name, t.id AS "Service ID", {SERVICE_COLUMNS}
+        FROM accessible a
+        JOIN car_app.services t ON t.vehicle_id = a.id
+        ORDER BY a.id, t.service_date DESC
+    """,
+    "service_items.csv": """
+        SELECT
+            a.id AS vehicle_id,
+            a.name AS vehicle_name,
+            t.id AS "Service ID",
+            t.service_date AS "Service Date",
+            i.part_name AS "Part Name",
+            i.part_number AS "Part Number",
+            i.quantity AS "Quantity",
+            i.unit_price AS "Unit Price"
+        FROM accessible a
+        JOIN car_app.services t ON t.vehicle_id = a.id
+        JOIN car_app.service_items i ON i.service_id = t.id
+        ORDER BY a.id, t.service_date DESC, i.part_name
+    """,
+    "expenses.csv": f"""
+        SELECT a.id AS vehicle_id, a.name AS vehicle_name, {EXPENSE_COLUMNS}
+        FROM accessible a
+        JOIN car_app.expenses t ON t.vehicle_id = a.id
+        ORDER BY a.id, t.expense_date DESC
+    """,
+    "odometer.csv": """
+        SELECT a.id AS vehicle_id, a.name AS vehicle_name, h.*
+        FROM accessible a
+        CROSS JOIN LATERAL (
+            SELECT
+                e.entry_date AT TIME ZONE 'UTC' AS "Date & Time",
+                e.value_km AS "Odometer (km)",
+                'Odometer entry' AS "Source",
+                e.note AS "Note"
+            FROM car_app.odometer_entries e
+            WHERE e.vehicle_id = a.id
+            UNION ALL
+            SELECT
+                f.filled_at AT TIME ZONE 'UTC',
+                f.odometer_km,
+                f.fuel::text,
+                f.note
+            FROM car_app.fuelings f
+            WHERE f.vehicle_id = a.id
+        ) h
+        ORDER BY a.id, h."Date & Time" DESC
+    """,
+    "reminders.csv": """
+        SELECT
+            a.id AS vehicle_id,
+            a.name AS vehicle_name,
+            t.name AS "Name",
+            t.description AS "Description",
+            t.category AS "Category",
+            t.service_type::text AS "Service Type",
+            t.is_recurring AS "Recurring",
+            t.due_every_days AS "Every (days)",
+            t.due_every_km AS "Every (km)",
+            t.next_due_date AS "Next Due Date",
+            t.next_due_odometer_km AS "Next Due Odometer (km)",
+            t.status::text AS "Status"
+        FROM accessible a
+        JOIN car_app.reminder_rules t ON t.vehicle_id = a.id
+        ORDER BY a.id, t.name
+    """,
+    "issues.csv": """
+        SELECT
+            a.id AS vehicle_id,
+            a.name AS vehicle_name,
+            t.title AS "Title",
+            t.description AS "Description",
+            t.priority::text AS "Priority",
+            t.status::text AS "Status",
+            t.error_codes AS "Error Codes",
+            t.created_at AT TIME ZONE 'UTC' AS "Created At",
+            t.closed_at AT TIME ZONE 'UTC' AS "Closed At"
+        FROM accessible a
+        JOIN car_app.issues t ON t.vehicle_id = a.id
+        ORDER BY a.id, t.created_at DESC
+    """,
+}
+
+_VEHICLES_ENTRY = """
+    SELECT
+        a.name AS "Name",
+        a.model AS "Model",
+        a.production_year AS "Production Year",
+        a.vin AS "VIN",
+        a.plate AS "Plate",
+        a.role AS "Role",
+        a.id AS "Vehicle ID"
+    FROM accessible a
+    ORDER BY a.name, a.id
+"""
+
+_HIDDEN_COLUMNS = ("vehicle_id", "vehicle_name")
+
+
+class _ZipSink(io.RawIOBase):
+    """Write-only, non-seekable target for ZipFile; bytes are drained by the response generator."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _vehicle_folder(row: RowMapping) -> str:
+    name = re.sub(r"[^\w.-]+", "_", row["vehicle_name"] or "").strip("_.") or "vehicle"
+    return f"{name}-{str(row['vehicle_id'])[:8]}"
+
+
+def _write_entries(
+    archive: zipfile.ZipFile,
+    sink: _ZipSink,
+    rows: Iterator[RowMapping],
+    name: str,
+    per_vehicle: bool,
+) -> Iterator[bytes]:
+    """Write ``rows`` as CSV entries (one per vehicle when ``per_vehicle``), yielding ZIP bytes as they fill up."""
+    entry = None
+    current = None
+    columns: list[str] = []
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+
+    def flush() -> None:
+        entry.write(buffer.getvalue().encode("utf-8"))
+        buffer.seek(0)
+        buffer.truncate()
+
+    for row in rows:
+        key = row["vehicle_id"] if per_vehicle else None
+        if entry is None or key != current:
+            if entry is not None:
+                flush()
+                entry.close()
+            current = key
+            path = f"{_vehicle_folder(row)}/{name}" if per_vehicle else name
+            entry = archive.open(path, "w", force_zip64=True)
+            columns = [column for column in row.keys() if column not in _HIDDEN_COLUMNS]
+            writer.writerow(columns)
+
+        writer.writerow(["" if row[column] is None else str(row[column]) for column in columns])
+        if buffer.tell() >= ZIP_CHUNK_SIZE:
+            flush()
+            yield sink.drain()
+
+    if entry is not None:
+        flush()
+        entry.close()
+    yield sink.drain()
+
+
+def _stream_account_zip(db: Session, request: Request, user_id: UUID) -> Iterator[bytes]:
+    """
+    Generate the account ZIP chunk by chunk.
+
+    Uses its own session (the response is streamed after the request's
+    dependencies are done) with one REPEATABLE READ snapshot, so all files are
+    consistent with each other. Rows come from server-side cursors in batches
+    of ZIP_FETCH_SIZE; memory does not grow with the number of vehicles.
+
+    The transaction stays open while the client downloads, so the server ends
+    it (and the connection) once it sits idle for
+    EXPORT_STREAM_IDLE_TIMEOUT_SECONDS between fetches: a stalled download
+    cannot pin a pooled connection. The client then gets a truncated archive.
+    """
+    sink = _ZipSink()
+    try:
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        db.execute(text("SET TRANSACTION READ ONLY"))
+        stream = {"stream_results": True, "yield_per": ZIP_FETCH_SIZE}
+
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            rows = db.execute(
+                text(_ACCESSIBLE_VEHICLES + _VEHICLES_ENTRY),
+                {"user_id": user_id},
+            ).mappings()
+            yield from _write_entries(archive, sink, rows, "vehicles.csv", per_vehicle=False)
+
+            for name, query in _ZIP_ENTRIES.items():
+                rows = db.execute(
+                    text(_ACCESSIBLE_VEHICLES + query),
+                    {"user_id": user_id},
+                    execution_options=stream,
+                ).mappings()
+                yield from _write_entries(archive, sink, rows, name, per_vehicle=True)
+
+        # Central directory, written when the archive is closed.
+        yield sink.drain()
+    finally:
+        db.rollback()
+        close_session(db, request)
+
+
+@account_router.get("/export.zip")
+def export_account_zip(
+    request: Request,
+    current_user_id: UUID = Depends(get_current_user_id),
+) -> StreamingResponse:
+    """
+    Export every vehicle of the account as one ZIP of CSV files.
+
+    Contains vehicles.csv and, per vehicle folder, fuelings, services, service
+    items, expenses, odometer history, reminders and issues (files without
+    rows are omitted). The archive is streamed while it is being built.
+    """
+    filename = f"car-maintenance-export-{date.today():%Y%m%d}.zip"
+    # RLS context and route deadline as in get_db; no connection is taken
+    # until the first chunk is generated.
+    db = open_streaming_session(request)
+    db.info["idle_in_transaction_timeout_ms"] = settings.export_stream_idle_timeout_seconds * 1000
+    return StreamingResponse(
+        _stream_account_zip(db, request, current_user_id),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+# Asynchronous export jobs
+
+_EXPORT_JOB_COLUMNS = """
+    id, vehicle_id, data_type, format, start_date, end_date, status,
+    file_sha256, file_size, error, created_at, finished_at, expires_at
+"""
+
+
+def _export_job_out(row: RowMapping) -> ExportJobOut:
+    completed = row["status"] == "COMPLETED"
+    return ExportJobOut.model_validate(
+        {
+            **row,
+            "etag": f'"{row["file_sha256"]}"' if completed else None,
+            "download_url": f"/export-jobs/{row['id']}/download" if completed else None,
+        }
+    )
+
+
+@jobs_router.post(
+    "/vehicles/{vehicle_id}/export-jobs",
+    response_model=ExportJobOut,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def create_export_job(
+    vehicle_id: UUID,
+    payload: ExportJobCreate,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db, scope="function"),
+    current_user_id: UUID = Depends(get_current_user_id),
+    access: VehicleAccess = Depends(get_vehicle_access),
+) -> ExportJobOut:
+    """
+    Queue an export (same data types and formats as the synchronous export).
+
+    The query runs once in the background; the file is kept in the export
+    store and downloaded from GET /export-jobs/{job_id}/download, which
+    supports Range requests so interrupted downloads can resume.
+    """
+    try:
+        row = db.execute(
+            text(
+                f"""
+                INSERT INTO car_app.export_jobs (
+                    id, user_id, vehicle_id, data_type, format, start_date, end_date, expires_at
+                )
+                VALUES (
+                    gen_random_uuid(), :user_id, :vehicle_id, :data_type, :format, :start_date, :end_date,
+                    now() + make_interval(hours => :ttl_hours)
+                )
+                RETURNING {_EXPORT_JOB_COLUMNS}
+                """
+            ),
+            {
+                "user_id": current_user_id,
+                "vehicle_id": vehicle_id,
+                **payload.model_dump(),
+                "ttl_hours": settings.export_ttl_hours,
+            },
+        ).mappings().first()
+        db.commit()
+    except DBAPIError as exc:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Database error while creating export job.",
+        ) from exc
+    except Exception as exc:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Unexpected server error.",
+        ) from exc
+
+    background_tasks.add_task(run_export_job, row["id"])
+    return _export_job_out(row)
+
+
+def _get_export_job(db: Session, user_id: UUID, job_id: UUID) -> RowMapping:
+    row = db.execute(
+        text(
+            f"""
+            SELECT {_EXPORT_JOB_COLUMNS}
+            FROM car_app.export_jobs
+            WHERE id = :job_id
+              AND user_id = :user_id
+              AND expires_at > now()
+            """
+        ),
+        {"job_id": job_id, "user_id": user_id},
+    ).mappings().first()
+
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Export job not found",
+        )
+    return row
+
+
+@jobs_router.get("/export-jobs/{job_id}", response_model=ExportJobOut)
+def get_export_job(
+    job_id: UUID,
+    db: Session = Depends(get_db, scope="function"),
+    current_user_id: UUID = Depends(get_current_user_id),
+) -> ExportJobOut:
+    """
+    Status of an export job (only the user who started it).
+    """
+    return _export_job_out(_get_export_job(db, current_user_id, job_id))
+
+
+@jobs_router.get("/export-jobs/{job_id}/download", response_class=FileResponse)
+def download_export_job(
+    job_id: UUID,
+    request: Request,
+    db: Session = Depends(get_db, scope="function"),
+    current_user_id: UUID = Depends(get_current_user_id),
+) -> Response:
+    """
+    Download the file of a completed export job.
+
+    The ETag is the SHA-256 of the file. Range / If-Range requests return only
+    the missing bytes, If-None-Match returns 304.
+    """
+    job = _get_export_job(db, current_user_id, job_id)
+    db.rollback()
+
+    if job["status"] != "COMPLETED":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Export job is {job['status']}.",
+        )
+
+    path = file_store.path(job["file_sha256"])
+    if not path.is_file():
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Export file expired, please export again.",
+        )
+
+    etag = f'"{job["file_sha256"]}"'
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+
+    filename = f"{job['data_type']}-{job['start_date']:%Y%m%d}-{job['end_date']:%Y%m%d}.{job['format']}"
+    return FileResponse(
+        path,
+        media_type=MEDIA_TYPES[job["format"]],
+        filename=filename,
+        headers={"ETag": etag, "Cache-Control": "private, max-age=0, must-revalidate"},
+    )
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import Literal
+from uuid import UUID
+
+from pydantic import BaseModel, Field, model_validator
+
+
+class ExportJobCreate(BaseModel):
+    data_type: Literal["fuelings", "services", "expenses", "odometer"]
+    format: Literal["csv", "parquet", "arrow"] = "csv"
+    start_date: date
+    end_date: date
+
+    @model_validator(mode="after")
+    def check_dates(self) -> "ExportJobCreate":
+        if self.start_date > self.end_date:
+            raise ValueError("start_date must not be after end_date")
+        return self
+
+
+class ExportJobOut(BaseModel):
+    """Status of an asynchronous export"""
+    id: UUID
+    vehicle_id: UUID
+    data_type: str
+    format: str
+    start_date: date
+    end_date: date
+    status: Literal["PENDING", "RUNNING", "COMPLETED", "FAILED"]
+    file_size: int | None = Field(default=None, description="Bytes, once COMPLETED")
+    etag: str | None = Field(default=None, description="ETag of the file (SHA-256), once COMPLETED")
+    download_url: str | None = None
+    error: str | None = None
+    created_at: datetime
+    finished_at: datetime | None = None
+    expires_at: datetime
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from typing import Literal
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import DBAPIError
+
+from app.api.deps import get_db, get_current_user_id
+from .schemas import FleetSummaryOut
+
+
+router = APIRouter(prefix="/fleet", tags=["fleet"])
+
+# Columns of fn_get_fleet_summary the list can be sorted by; the value is
+# validated by FastAPI before it is put into ORDER BY.
+SortKey = Literal[
+    "name",
+    "latest_odometer_km",
+    "last_activity_at",
+    "month_to_date_spend",
+    "avg_monthly_spend",
+    "due_reminders",
+    "next_due_date",
+]
+
+
+@router.get("/summary", response_model=FleetSummaryOut)
+def get_fleet_summary(
+    sort_by: SortKey = "name",
+    order: Literal["asc", "desc"] = "asc",
+    limit: int = Query(default=50, ge=1, le=500),
+    offset: int = Query(default=0, ge=0),
+    days_ahead: int = Query(default=30, ge=0, le=365, description="Reminder look-ahead window"),
+    db: Session = Depends(get_db, scope="function"),
+    current_user_id: UUID = Depends(get_current_user_id),
+) -> FleetSummaryOut:
+    """
+    Per-vehicle KPIs for all vehicles the user can access: latest odometer,
+    month-to-date and average monthly spend, due reminders.
+
+    Computed in one set-based query (``fn_get_fleet_summary``); past months
+    come from the ``mv_expenses_monthly`` rollup. Sorted by ``sort_by`` (ties
+    by vehicle id, nulls last) and paginated with ``limit``/``offset``.
+    """
+    direction = "DESC" if order == "desc" else "ASC"
+    try:
+        rows = db.execute(
+            text(
+                f"""
+                SELECT fs.*, count(*) OVER () AS total
+                FROM car_app.fn_get_fleet_summary(:user_id, :days_ahead) fs
+                ORDER BY fs.{sort_by} {direction} NULLS LAST, fs.vehicle_id
+                LIMIT :limit OFFSET :offset
+                """
+            ),
+            {
+                "user_id": current_user_id,
+                "days_ahead": days_ahead,
+                "limit": limit,
+                "offset": offset,
+            },
+        ).mappings().all()
+
+        if rows:
+            total = rows[0]["total"]
+        elif offset > 0:
+            # Page past the end: still report the fleet size.
+            total = db.execute(
+                text("SELECT count(*) FROM car_app.fn_get_user_vehicles(:user_id)"),
+                {"user_id": current_user_id},
+            ).scalar_one()
+        else:
+            total = 0
+    except DBAPIError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Database error while building fleet summary.",
+        ) from exc
+    except Exception as exc:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Unexpected server error.",
+        ) from exc
+
+    return FleetSummaryOut(total=total, limit=limit, offset=offset, items=rows)
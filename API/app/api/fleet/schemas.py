@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from datetime import datetime, date
+from decimal import Decimal
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+
+class FleetVehicleSummary(BaseModel):
+    """KPIs of a single vehicle in the fleet summary"""
+    vehicle_id: UUID
+    name: str
+    plate: str | None = None
+    model: str | None = None
+    production_year: int | None = None
+    user_role: str
+    latest_odometer_km: Decimal | None = None
+    last_activity_at: datetime | None = Field(
+        default=None,
+        description="Latest fueling, service or odometer entry",
+    )
+    month_to_date_spend: Decimal
+    avg_monthly_spend: Decimal = Field(
+        description="Average over the last 12 complete months"
+    )
+    due_reminders: int = Field(
+        description="Active reminders due within days_ahead or past their odometer"
+    )
+    overdue_reminders: int
+    next_due_date: date | None = None
+
+
+class FleetSummaryOut(BaseModel):
+    total: int = Field(description="Number of accessible vehicles")
+    limit: int
+    offset: int
+    items: list[FleetVehicleSummary]
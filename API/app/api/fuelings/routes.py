@@ -4,12 +4,17 @@ from typing import List
 from uuid import UUID
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError, DataError, DBAPIError
 
-from app.api.deps import get_db, get_current_user_id
+from app.api.deps import VehicleAccess, get_db, get_current_user_id, get_read_db, get_vehicle_access
+from app.core.etag import collection_etag, is_not_modified, not_modified, with_etag
+from app.core.idempotency import Idempotency, idempotency
+from app.core.serialization import json_list_response
+from app.db.locks import lock_vehicle_writes
+from app.db.transactions import run_transaction
 from app.api.vehicles.schemas import (
     FuelingCreate,
     FuelingUpdate,
@@ -27,29 +32,25 @@ router = APIRouter(tags=["fuelings"])
 )
 def list_fuelings_for_vehicle(
     vehicle_id: UUID,
+    request: Request,
     from_datetime: datetime | None = None,
     to_datetime: datetime | None = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
-) -> list[FuelingOut]:
+) -> Response:
     """
     Lista tankowań dla pojazdu.
 
     Opcjonalne parametry zapytania:
     - from_datetime: początek zakresu (filled_at >= from_datetime)
     - to_datetime:   koniec zakresu   (filled_at <= to_datetime)
-    """
 
-    existing = db.execute(
-        text("SELECT * FROM car_app.fn_get_vehicle(:user_id, :vehicle_id)"),
-        {"user_id": current_user_id, "vehicle_id": vehicle_id},
-    ).mappings().first()
+    Obsługuje If-None-Match - bez zmian w tankowaniach zwraca 304.
+    """
 
-    if existing is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Vehicle not found or no permission",
-        )
+    etag = collection_etag(db, current_user_id, vehicle_id, "fuelings")
+    if is_not_modified(request, etag):
+        return not_modified(etag)
 
     try:
         if from_datetime is None and to_datetime is None:
@@ -104,13 +105,13 @@ def list_fuelings_for_vehicle(
             detail="Unexpected server error.",
         ) from exc
 
-    return [FuelingOut.model_validate(row) for row in rows]
+    return with_etag(json_list_response(FuelingOut, rows), etag)
 
 
 @router.get("/fuelings/{fueling_id}", response_model=FuelingOut)
 def get_fueling(
     fueling_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
 ) -> FuelingOut:
     """
@@ -165,25 +166,18 @@ def get_fueling(
 def create_fueling(
     vehicle_id: UUID,
     payload: FuelingCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
-) -> FuelingOut:
+    access: VehicleAccess = Depends(get_vehicle_access),
+    idem: Idempotency = Depends(idempotency("create_fueling")),
+) -> FuelingOut | Response:
     """
     Tworzy nowe tankowanie dla pojazdu.
     Tylko OWNER/EDITOR (pilnowane w fn_create_fueling).
     """
-
-    # Sprawdzenie dostępu do pojazdu (dla czytelnego 404)
-    existing = db.execute(
-        text("SELECT * FROM car_app.fn_get_vehicle(:user_id, :vehicle_id)"),
-        {"user_id": current_user_id, "vehicle_id": vehicle_id},
-    ).mappings().first()
-
-    if existing is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Vehicle not found or no permission",
-        )
+    replay = idem.begin()
+    if replay is not None:
+        return replay
 
     data = payload.model_dump()
 
@@ -204,7 +198,8 @@ def create_fueling(
         "fuel_level_after": data.get("fuel_level_after"),
     }
 
-    try:
+    def work():
+        lock_vehicle_writes(db, vehicle_id, name="create_fueling")
         row = db.execute(
             text(
                 """
@@ -226,7 +221,13 @@ def create_fueling(
             ),
             params,
         ).mappings().first()
-        db.commit()
+        idem.save(status.HTTP_201_CREATED, FuelingOut, row)
+        return row
+
+    try:
+        row = run_transaction(db, work, name="create_fueling", on_retry=idem.reclaim)
+    except HTTPException:
+        raise
     except IntegrityError as exc:
         db.rollback()
         pgcode = getattr(getattr(exc, "orig", None), "pgcode", None)
@@ -243,12 +244,6 @@ def create_fueling(
                 detail="Invalid fueling data or constraint violation.",
             ) from exc
 
-        if pgcode == "40001":
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail="Transaction conflict, please retry.",
-            ) from exc
-
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid fueling data or constraint violation.",
@@ -289,7 +284,7 @@ def create_fueling(
 def update_fueling(
     fueling_id: UUID,
     payload: FuelingUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
 ) -> FuelingOut:
     """
@@ -336,7 +331,7 @@ def update_fueling(
         "fuel_level_after": base.get("fuel_level_after"),
     }
 
-    try:
+    def work():
         row = db.execute(
             text(
                 """
@@ -358,7 +353,12 @@ def update_fueling(
             ),
             params,
         ).mappings().first()
-        db.commit()
+        return row
+
+    try:
+        row = run_transaction(db, work, name="update_fueling")
+    except HTTPException:
+        raise
     except IntegrityError as exc:
         db.rollback()
         pgcode = getattr(getattr(exc, "orig", None), "pgcode", None)
@@ -369,12 +369,6 @@ def update_fueling(
                 detail="Invalid fueling data or constraint violation.",
             ) from exc
 
-        if pgcode == "40001":
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail="Transaction conflict, please retry.",
-            ) from exc
-
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid fueling data or constraint violation.",
@@ -413,7 +407,7 @@ def update_fueling(
 )
 def delete_fueling(
     fueling_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
 ) -> None:
     """
@@ -0,0 +1,3 @@
+from .routes import jobs_router, router
+
+__all__ = ["router", "jobs_router"]
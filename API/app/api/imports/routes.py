@@ -0,0 +1,552 @@
+from __future__ import annotations
+
+import codecs
+import csv
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Literal
+from uuid import UUID
+
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, HTTPException, Query, UploadFile, status
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError, DataError, DBAPIError
+
+from app.api.deps import get_db, get_current_user_id
+from app.config import settings
+from app.db.locks import lock_vehicle_writes
+from app.importers.runner import run_import_job
+from .schemas import ImportJobOut, ImportReport, ImportRowError
+
+router = APIRouter(prefix="/vehicles/{vehicle_id}/import", tags=["import"])
+jobs_router = APIRouter(tags=["import"])
+
+COPY_CHUNK_SIZE = 64 * 1024
+MAX_REPORTED_ERRORS = 500
+
+
+@dataclass(frozen=True)
+class ImportSpec:
+    # CSV header (as written by export/routes.py) -> staging column
+    columns: dict[str, str]
+    required: tuple[str, ...]
+    # (CSV column, message, SQL predicate on staging row `s` that is TRUE for a bad value)
+    field_checks: tuple[tuple[str, str, str], ...]
+    # INSERT INTO import_errors ... SELECT checks across rows / existing data
+    set_checks: tuple[str, ...]
+    insert_sql: str
+
+
+def _positive_number(column: str, numeric_type: str) -> str:
+    return (
+        f"NOT COALESCE(CASE WHEN pg_input_is_valid(s.{column}, '{numeric_type}') "
+        f"THEN s.{column}::numeric > 0 END, FALSE)"
+    )
+
+
+def _sql_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+_VALID_ROWS = "NOT EXISTS (SELECT 1 FROM import_errors e WHERE e.row_no = s.row_no)"
+
+SPECS: dict[str, ImportSpec] = {
+    "fuelings": ImportSpec(
+        columns={
+            "Date & Time": "filled_at",
+            "Odometer (km)": "odometer_km",
+            "Volume (L)": "volume",
+            "Price per Unit": "price_per_unit",
+            "Total Cost": "total_cost",
+            "Fuel Type": "fuel",
+            "Driving Cycle": "driving_cycle",
+            "Full Tank": "full_tank",
+            "Note": "note",
+        },
+        required=("Date & Time", "Odometer (km)", "Volume (L)", "Price per Unit", "Fuel Type", "Full Tank"),
+        field_checks=(
+            ("Date & Time", "is not a valid date/time",
+             "NOT COALESCE(pg_input_is_valid(s.filled_at, 'timestamptz'), FALSE)"),
+            ("Odometer (km)", "must be a number greater than 0", _positive_number("odometer_km", "numeric(10,1)")),
+            ("Volume (L)", "must be a number greater than 0", _positive_number("volume", "numeric(10,3)")),
+            ("Price per Unit", "must be a number greater than 0", _positive_number("price_per_unit", "numeric(10,3)")),
+            ("Fuel Type", "is not a valid fuel type",
+             "NOT COALESCE(pg_input_is_valid(s.fuel, 'car_app.fuel_type'), FALSE)"),
+            ("Fuel Type", "is not configured for this vehicle",
+             "cardinality(CAST(:allowed_fuels AS text[])) > 0"
+             " AND COALESCE(pg_input_is_valid(s.fuel, 'car_app.fuel_type'), FALSE)"
+             " AND NOT s.fuel = ANY(CAST(:allowed_fuels AS text[]))"),
+            ("Driving Cycle", "must be CITY, HIGHWAY or MIX",
+             "s.driving_cycle IS NOT NULL AND NOT pg_input_is_valid(s.driving_cycle, 'car_app.driving_cycle')"),
+            ("Full Tank", "must be true or false",
+             "NOT COALESCE(pg_input_is_valid(s.full_tank, 'boolean'), FALSE)"),
+        ),
+        set_checks=(
+            # Odometer must not go backwards in time, against existing fuelings and the file itself:
+            # a row is checked against both neighbours, so a backdated row above a later fueling is caught too.
+            f"""
+            INSERT INTO import_errors (row_no, column_name, message)
+            SELECT
+                o.row_no,
+                'Odometer (km)',
+                CASE
+                    WHEN o.odometer_km < o.prev_km
+                        THEN format('is lower than the previous fueling (%s km)', o.prev_km)
+                    ELSE format('is higher than the next fueling (%s km)', o.next_km)
+                END
+            FROM (
+                SELECT
+                    m.row_no,
+                    m.odometer_km,
+                    LAG(m.odometer_km) OVER (ORDER BY m.filled_at, m.odometer_km) AS prev_km,
+                    LEAD(m.odometer_km) OVER (ORDER BY m.filled_at, m.odometer_km) AS next_km
+                FROM (
+                    SELECT s.row_no, s.filled_at::timestamptz AS filled_at, s.odometer_km::numeric(10,1) AS odometer_km
+                    FROM import_staging s
+                    WHERE {_VALID_ROWS}
+                    UNION ALL
+                    SELECT NULL, f.filled_at, f.odometer_km
+                    FROM car_app.fuelings f
+                    WHERE f.vehicle_id = :vehicle_id
+                ) m
+            ) o
+            WHERE o.row_no IS NOT NULL
+              AND (o.odometer_km < o.prev_km OR o.odometer_km > o.next_km)
+            """,
+            f"""
+            INSERT INTO import_errors (row_no, column_name, message)
+            SELECT s.row_no, 'Date & Time', 'duplicates an existing fueling'
+            FROM import_staging s
+            WHERE {_VALID_ROWS}
+              AND EXISTS (
+                  SELECT 1
+                  FROM car_app.fuelings f
+                  WHERE f.vehicle_id = :vehicle_id
+                    AND f.filled_at = s.filled_at::timestamptz
+                    AND f.odometer_km = s.odometer_km::numeric(10,1)
+              )
+            """,
+        ),
+        insert_sql=f"""
+            INSERT INTO car_app.fuelings (
+                id, vehicle_id, user_id, filled_at, price_per_unit, volume, odometer_km,
+                full_tank, driving_cycle, fuel, note, created_at
+            )
+            SELECT
+                gen_random_uuid(),
+                :vehicle_id,
+                :user_id,
+                s.filled_at::timestamptz,
+                s.price_per_unit::numeric(10,3),
+                s.volume::numeric(10,3),
+                s.odometer_km::numeric(10,1),
+                s.full_tank::boolean,
+                s.driving_cycle::car_app.driving_cycle,
+                s.fuel::car_app.fuel_type,
+                s.note,
+                now()
+            FROM import_staging s
+            WHERE {_VALID_ROWS}
+            ORDER BY s.row_no
+        """,
+    ),
+    "expenses": ImportSpec(
+        columns={
+            "Expense Date": "expense_date",
+            "Category": "category",
+            "Amount": "amount",
+            "Type": "expense_type",
+            "Note": "note",
+        },
+        required=("Expense Date", "Category", "Amount"),
+        field_checks=(
+            ("Expense Date", "is not a valid date",
+             "NOT COALESCE(pg_input_is_valid(s.expense_date, 'date'), FALSE)"),
+            ("Category", "is not a valid expense category",
+             "NOT COALESCE(pg_input_is_valid(s.category, 'car_app.expense_category'), FALSE)"),
+            ("Amount", "must be a number greater than 0", _positive_number("amount", "numeric(12,2)")),
+        ),
+        set_checks=(
+            f"""
+            INSERT INTO import_errors (row_no, column_name, message)
+            SELECT s.row_no, 'Expense Date', 'duplicates an existing expense'
+            FROM import_staging s
+            WHERE {_VALID_ROWS}
+              AND EXISTS (
+                  SELECT 1
+                  FROM car_app.expenses x
+                  WHERE x.vehicle_id = :vehicle_id
+                    AND x.expense_date = s.expense_date::date
+                    AND x.category = s.category::car_app.expense_category
+                    AND x.amount = s.amount::numeric(12,2)
+                    AND x.note IS NOT DISTINCT FROM s.note
+              )
+            """,
+        ),
+        # expense_type ("Type") is ignored - trg_expense_auto_classify assigns it.
+        insert_sql=f"""
+            INSERT INTO car_app.expenses (id, vehicle_id, user_id, expense_date, category, amount, note, created_at)
+            SELECT
+                gen_random_uuid(),
+                :vehicle_id,
+                :user_id,
+                s.expense_date::date,
+                s.category::car_app.expense_category,
+                s.amount::numeric(12,2),
+                s.note,
+                now()
+            FROM import_staging s
+            WHERE {_VALID_ROWS}
+            ORDER BY s.row_no
+        """,
+    ),
+}
+
+
+def _require_edit_access(db: Session, user_id: UUID, vehicle_id: UUID) -> None:
+    """404 without access to the vehicle, 403 unless OWNER or EDITOR."""
+    access = db.execute(
+        text(
+            """
+            SELECT
+                (v.owner_id = :user_id OR s.role IN ('OWNER', 'EDITOR')) AS can_edit
+            FROM car_app.vehicles v
+            LEFT JOIN car_app.vehicle_shares s
+              ON s.vehicle_id = v.id
+             AND s.user_id = :user_id
+            WHERE v.id = :vehicle_id
+              AND (v.owner_id = :user_id OR s.user_id IS NOT NULL)
+            """
+        ),
+        {"user_id": user_id, "vehicle_id": vehicle_id},
+    ).mappings().first()
+
+    if access is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Vehicle not found or no permission",
+        )
+    if not access["can_edit"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No permission to import data for this vehicle.",
+        )
+
+
+def _read_header(upload: UploadFile, spec: ImportSpec) -> list[str]:
+    """Read the CSV header line and map it to staging columns."""
+    first_line = upload.file.readline()
+    try:
+        header = next(csv.reader([codecs.decode(first_line, "utf-8-sig")]), [])
+    except UnicodeDecodeError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="CSV file must be UTF-8 encoded.",
+        ) from exc
+
+    header = [name.strip() for name in header]
+    unknown = [name for name in header if name not in spec.columns]
+    missing = [name for name in spec.required if name not in header]
+    if not header or unknown or missing or len(set(header)) != len(header):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "message": "Invalid CSV header.",
+                "unknown_columns": unknown,
+                "missing_columns": missing,
+                "expected_columns": list(spec.columns),
+            },
+        )
+    return [spec.columns[name] for name in header]
+
+
+@router.post("/{data_type}", response_model=ImportReport)
+def import_vehicle_data(
+    vehicle_id: UUID,
+    data_type: Literal["fuelings", "expenses"],
+    file: UploadFile = File(..., description="CSV with the columns produced by the export endpoint"),
+    on_error: Literal["abort", "skip"] = Query(
+        default="abort",
+        description="abort: import nothing if any row is invalid; skip: import the valid rows",
+    ),
+    db: Session = Depends(get_db, scope="function"),
+    current_user_id: UUID = Depends(get_current_user_id),
+) -> ImportReport:
+    """
+    Bulk import of fuelings or expenses from CSV.
+
+    The file is streamed with COPY into a temporary staging table, validated
+    set-wise (types and ranges, allowed fuels, odometer monotonicity against
+    existing fuelings, duplicates) and the valid rows are inserted with a
+    single INSERT ... SELECT. Timestamps without an offset are read as UTC,
+    matching the export.
+    Only OWNER or EDITOR can import.
+    """
+    spec = SPECS[data_type]
+
+    _require_edit_access(db, current_user_id, vehicle_id)
+
+    copy_columns = _read_header(file, spec)
+    staging_columns = ", ".join(f"{column} text" for column in spec.columns.values())
+    params = {"user_id": current_user_id, "vehicle_id": vehicle_id}
+
+    try:
+        db.execute(text("SET LOCAL TIME ZONE 'UTC'"))
+        db.execute(
+            text(
+                f"""
+                CREATE TEMP TABLE import_staging (
+                    row_no bigint GENERATED ALWAYS AS IDENTITY,
+                    {staging_columns}
+                ) ON COMMIT DROP
+                """
+            )
+        )
+        db.execute(
+            text(
+                """
+                CREATE TEMP TABLE import_errors (
+                    row_no      bigint NOT NULL,
+                    column_name text NOT NULL,
+                    message     text NOT NULL
+                ) ON COMMIT DROP
+                """
+            )
+        )
+
+        raw = db.connection().connection.driver_connection
+        with raw.cursor() as cur:
+            with cur.copy(
+                f"COPY import_staging ({', '.join(copy_columns)}) FROM STDIN WITH (FORMAT csv, ENCODING 'UTF8')"
+            ) as copy:
+                while chunk := file.file.read(COPY_CHUNK_SIZE):
+                    copy.write(chunk)
+
+        db.execute(
+            text(
+                "UPDATE import_staging SET "
+                + ", ".join(f"{column} = NULLIF(btrim({column}), '')" for column in spec.columns.values())
+            )
+        )
+        db.execute(text("ANALYZE import_staging"))
+
+        allowed_fuels = []
+        if data_type == "fuelings":
+            # The odometer set_check reads the existing fuelings: hold off
+            # concurrent fueling/service/odometer writes until the insert commits.
+            lock_vehicle_writes(db, vehicle_id, name="import_vehicle_data")
+            allowed_fuels = db.execute(
+                text("SELECT fuel::text FROM car_app.fn_get_vehicle_fuels(:user_id, :vehicle_id)"),
+                params,
+            ).scalars().all()
+
+        checks = ",\n".join(
+            f"({_sql_literal(column)}, {_sql_literal(message)}, {predicate})"
+            for column, message, predicate in spec.field_checks
+        )
+        db.execute(
+            text(
+                f"""
+                INSERT INTO import_errors (row_no, column_name, message)
+                SELECT s.row_no, c.column_name, c.message
+                FROM import_staging s
+                CROSS JOIN LATERAL (VALUES
+                    {checks}
+                ) AS c(column_name, message, failed)
+                WHERE c.failed
+                """
+            ),
+            {**params, "allowed_fuels": list(allowed_fuels)},
+        )
+        for check in spec.set_checks:
+            db.execute(text(check), params)
+
+        total_rows = db.execute(text("SELECT count(*) FROM import_staging")).scalar_one()
+        rejected = db.execute(text("SELECT count(DISTINCT row_no) FROM import_errors")).scalar_one()
+        errors = [
+            ImportRowError(line=row["row_no"] + 1, column=row["column_name"], message=row["message"])
+            for row in db.execute(
+                text(
+                    """
+                    SELECT row_no, column_name, message
+                    FROM import_errors
+                    ORDER BY row_no, column_name
+                    LIMIT :limit
+                    """
+                ),
+                {"limit": MAX_REPORTED_ERRORS},
+            ).mappings()
+        ]
+
+        imported = 0
+        if rejected == 0 or on_error == "skip":
+            imported = db.execute(text(spec.insert_sql), params).rowcount
+    except HTTPException:
+        db.rollback()
+        raise
+    except IntegrityError as exc:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Constraint violation while importing data.",
+        ) from exc
+    except DataError as exc:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid CSV data.",
+        ) from exc
+    except DBAPIError as exc:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Database error while importing data.",
+        ) from exc
+    except Exception as exc:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Unexpected server error.",
+        ) from exc
+
+    report = ImportReport(
+        data_type=data_type,
+        total_rows=total_rows,
+        imported=imported,
+        rejected=rejected,
+        errors=errors,
+    )
+
+    if rejected and on_error == "abort":
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=report.model_dump(),
+        )
+
+    db.commit()
+    return report
+
+
+_JOB_COLUMNS = """
+    id, vehicle_id, source, file_name, status,
+    CASE
+        WHEN status = 'COMPLETED' THEN 1.0
+        WHEN total_bytes > 0 THEN LEAST(processed_bytes::float8 / total_bytes, 1.0)
+    END AS progress,
+    processed_rows, fuelings_imported, services_imported, expenses_imported,
+    odometer_entries_imported, skipped_rows, errors, error,
+    created_at, started_at, finished_at
+"""
+
+
+def _save_upload(upload: UploadFile) -> str:
+    """Copy the upload to a temp file for the background task (the upload is closed with the request)."""
+    max_bytes = settings.import_max_upload_mb * 1024 * 1024
+    written = 0
+    with tempfile.NamedTemporaryFile(prefix="car-import-", delete=False) as target:
+        try:
+            while chunk := upload.file.read(COPY_CHUNK_SIZE):
+                written += len(chunk)
+                if written > max_bytes:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+                        detail=f"File larger than {settings.import_max_upload_mb} MB.",
+                    )
+                target.write(chunk)
+        except BaseException:
+            target.close()
+            os.unlink(target.name)
+            raise
+    return target.name
+
+
+@jobs_router.post(
+    "/vehicles/{vehicle_id}/import-jobs",
+    response_model=ImportJobOut,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def create_import_job(
+    vehicle_id: UUID,
+    background_tasks: BackgroundTasks,
+    source: Literal["fuelio", "acar", "drivvo"] = Form(..., description="App the backup comes from"),
+    file: UploadFile = File(..., description="CSV backup (or a ZIP containing it)"),
+    db: Session = Depends(get_db, scope="function"),
+    current_user_id: UUID = Depends(get_current_user_id),
+) -> ImportJobOut:
+    """
+    Import a Fuelio / aCar / Drivvo backup into the vehicle.
+
+    The file is parsed in the background, streaming and in batches; fuelings,
+    services, expenses and odometer readings are created as they are read.
+    Poll GET /import-jobs/{job_id} for progress and skipped rows.
+    Only OWNER or EDITOR can import.
+    """
+    _require_edit_access(db, current_user_id, vehicle_id)
+
+    path = _save_upload(file)
+    try:
+        row = db.execute(
+            text(
+                f"""
+                INSERT INTO car_app.import_jobs (id, user_id, vehicle_id, source, file_name)
+                VALUES (gen_random_uuid(), :user_id, :vehicle_id, :source, left(:file_name, 255))
+                RETURNING {_JOB_COLUMNS}
+                """
+            ),
+            {
+                "user_id": current_user_id,
+                "vehicle_id": vehicle_id,
+                "source": source,
+                "file_name": file.filename,
+            },
+        ).mappings().first()
+        db.commit()
+    except DBAPIError as exc:
+        db.rollback()
+        os.unlink(path)
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Database error while creating import job.",
+        ) from exc
+    except Exception as exc:
+        db.rollback()
+        os.unlink(path)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Unexpected server error.",
+        ) from exc
+
+    background_tasks.add_task(run_import_job, row["id"], path)
+    return ImportJobOut.model_validate(row)
+
+
+@jobs_router.get("/import-jobs/{job_id}", response_model=ImportJobOut)
+def get_import_job(
+    job_id: UUID,
+    db: Session = Depends(get_db, scope="function"),
+    current_user_id: UUID = Depends(get_current_user_id),
+) -> ImportJobOut:
+    """
+    Status and progress of an import job (only the user who started it).
+    """
+    row = db.execute(
+        text(
+            f"""
+            SELECT {_JOB_COLUMNS}
+            FROM car_app.import_jobs
+            WHERE id = :job_id
+              AND user_id = :user_id
+            """
+        ),
+        {"job_id": job_id, "user_id": current_user_id},
+    ).mappings().first()
+
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import job not found",
+        )
+
+    return ImportJobOut.model_validate(row)
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Literal
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+
+class ImportRowError(BaseModel):
+    """Validation error of a single CSV row"""
+    line: int = Field(description="Line number in the uploaded file (header is line 1)")
+    column: str
+    message: str
+
+
+class ImportReport(BaseModel):
+    """Result of a CSV import"""
+    data_type: str
+    total_rows: int
+    imported: int
+    rejected: int = Field(description="Rows with at least one error")
+    errors: list[ImportRowError] = Field(
+        default_factory=list,
+        description="Row-level errors (first 500)"
+    )
+
+
+class ImportJobError(BaseModel):
+    line: int | None = Field(default=None, description="Line in the uploaded file, when known")
+    message: str
+
+
+class ImportJobOut(BaseModel):
+    """Status of a background import of a third-party backup"""
+    id: UUID
+    vehicle_id: UUID
+    source: str
+    file_name: str | None = None
+    status: Literal["PENDING", "RUNNING", "COMPLETED", "FAILED"]
+    progress: float | None = Field(default=None, description="0-1, share of the file processed")
+    processed_rows: int
+    fuelings_imported: int
+    services_imported: int
+    expenses_imported: int
+    odometer_entries_imported: int
+    skipped_rows: int
+    errors: list[ImportJobError] = Field(
+        default_factory=list,
+        description="Skipped rows (first 100)"
+    )
+    error: str | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
@@ -4,12 +4,14 @@ from typing import List
 from uuid import UUID
 import json
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy import text
 from sqlalchemy.exc import DBAPIError, IntegrityError, DataError
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_db, get_current_user_id
+from app.core.idempotency import Idempotency, idempotency
+from app.core.serialization import json_list_response
 from .schemas import IssueCreate, IssueUpdate, IssueOut
 
 router = APIRouter(prefix="", tags=["issues"])
@@ -20,9 +22,9 @@ def list_vehicle_issues(
     vehicle_id: UUID,
     status: str | None = None,
     priority: str | None = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
-) -> list[IssueOut]:
+) -> Response:
     """
     Lista usterek/todo dla pojazdu. Filtry opcjonalne: status, priority.
     """
@@ -46,19 +48,24 @@ def list_vehicle_issues(
         ) from exc
 
     # Return empty list if no issues found (not a 404)
-    return [IssueOut.model_validate(row) for row in rows]
+    return json_list_response(IssueOut, rows)
 
 
 @router.post("/vehicles/{vehicle_id}/issues", response_model=IssueOut, status_code=status.HTTP_201_CREATED)
 def create_issue(
     vehicle_id: UUID,
     payload: IssueCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
-) -> IssueOut:
+    idem: Idempotency = Depends(idempotency("create_issue")),
+) -> IssueOut | Response:
     """
     Dodanie usterki/todo do pojazdu.
     """
+    replay = idem.begin()
+    if replay is not None:
+        return replay
+
     params = {
         "user_id": current_user_id,
         "vehicle_id": vehicle_id,
@@ -76,6 +83,7 @@ def create_issue(
             ),
             params,
         ).mappings().first()
+        idem.save(status.HTTP_201_CREATED, IssueOut, row)
         db.commit()
     except IntegrityError as exc:
         db.rollback()
@@ -103,7 +111,7 @@ def create_issue(
 def update_issue(
     issue_id: UUID,
     payload: IssueUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
 ) -> IssueOut:
     """
@@ -153,7 +161,7 @@ def update_issue(
 @router.delete("/issues/{issue_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_issue(
     issue_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
 ) -> None:
     """
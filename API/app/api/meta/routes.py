@@ -1,15 +1,18 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 
 from app.api.deps import get_db
 from app.config import settings
+from app.core.cache import response_cache
+from app.core.metrics import metrics
 
 router = APIRouter(prefix="/meta", tags=["meta"])
 
 
 @router.get("/health")
-def health_check(db: Session = Depends(get_db)):
+def health_check(db: Session = Depends(get_db, scope="function")):
     """
     Sprawdza połączenie z bazą oraz zwraca środowisko API.
     """
@@ -34,8 +37,16 @@ def version():
         "description": "API meta information"
     }
 
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Metryki procesu API w formacie tekstowym Prometheus.
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @router.get("/enums")
-def get_enums(db: Session = Depends(get_db)):
+def get_enums(request: Request, db: Session = Depends(get_db, scope="function")):
     """
     Zwraca słowniki enumów z bazy danych, do użycia np. w dropdownach na froncie.
 
@@ -48,9 +59,17 @@ def get_enums(db: Session = Depends(get_db)):
       "service_type": [...],
       ...
     }
+
+    Enumy zmieniają się tylko z migracjami, więc odpowiedź jest w cache
+    odpowiedzi (do RESPONSE_CACHE_TTL_SECONDS).
     """
+    cache = response_cache.entry(request, tags=["enums"])
+    cached = cache.get()
+    if cached is not None:
+        return cached
+
     row = db.execute(
         text("SELECT car_app.fn_get_enums() AS enums")
     ).mappings().first()
 
-    return row["enums"]
\ No newline at end of file
+    return cache.store(JSONResponse(row["enums"]))
\ No newline at end of file
@@ -3,13 +3,17 @@ from __future__ import annotations
 from typing import List
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Response, Query, status
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError, DataError, DBAPIError
 
-from app.api.deps import get_db, get_current_user_id
-from .schemas import OdometerEntryCreate, OdometerEntryUpdate, OdometerEntryOut, OdometerHistoryItem
+from app.api.deps import ensure_vehicle_access, get_db, get_current_user_id, get_read_db
+from app.core.idempotency import Idempotency, idempotency
+from app.core.serialization import json_list_response
+from app.db.locks import lock_vehicle_writes
+from app.db.transactions import run_transaction
+from .schemas import OdometerEntryCreate, OdometerEntryUpdate, OdometerEntryOut, OdometerHistoryItem, MileageRateOut
 
 
 router = APIRouter(tags=["odometer_entries"])
@@ -18,20 +22,13 @@ router = APIRouter(tags=["odometer_entries"])
 @router.get("/vehicles/{vehicle_id}/odometer-entries", response_model=List[OdometerEntryOut])
 def list_odometer_entries(
     vehicle_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
-) -> list[OdometerEntryOut]:
+) -> Response:
     """
     Lista ręcznych wpisów przebiegu dla pojazdu.
     """
-    # sprawdź uprawnienia poprzez funkcję car_app.fn_get_vehicle
-    existing = db.execute(
-        text("SELECT * FROM car_app.fn_get_vehicle(:user_id, :vehicle_id)"),
-        {"user_id": current_user_id, "vehicle_id": vehicle_id},
-    ).mappings().first()
-
-    if existing is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Vehicle not found or no permission")
+    ensure_vehicle_access(db, current_user_id, vehicle_id)
 
     try:
         rows = db.execute(
@@ -43,7 +40,7 @@ def list_odometer_entries(
     except Exception as exc:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Unexpected server error.") from exc
 
-    return [OdometerEntryOut.model_validate(row) for row in rows]
+    return json_list_response(OdometerEntryOut, rows)
 
 
 @router.post(
@@ -54,12 +51,17 @@ def list_odometer_entries(
 def create_odometer_entry(
     vehicle_id: UUID,
     payload: OdometerEntryCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
-) -> OdometerEntryOut:
+    idem: Idempotency = Depends(idempotency("create_odometer_entry")),
+) -> OdometerEntryOut | Response:
     """
     Dodaje ręczny wpis przebiegu (odometer_entries).
     """
+    replay = idem.begin()
+    if replay is not None:
+        return replay
+
     params = {
         "actor_id": current_user_id,
         "vehicle_id": vehicle_id,
@@ -68,14 +70,21 @@ def create_odometer_entry(
         "note": payload.note,
     }
 
-    try:
+    def work():
+        lock_vehicle_writes(db, vehicle_id, name="create_odometer_entry")
         row = db.execute(
             text(
                 "SELECT * FROM car_app.fn_create_odometer_entry(:actor_id, :vehicle_id, CAST(:entry_date AS timestamptz), CAST(:value_km AS numeric), :note)"
             ),
             params,
         ).mappings().first()
-        db.commit()
+        idem.save(status.HTTP_201_CREATED, OdometerEntryOut, row)
+        return row
+
+    try:
+        row = run_transaction(db, work, name="create_odometer_entry", on_retry=idem.reclaim)
+    except HTTPException:
+        raise
     except IntegrityError as exc:
         db.rollback()
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Constraint violation while creating entry.") from exc
@@ -99,7 +108,7 @@ def create_odometer_entry(
 def update_odometer_entry(
     entry_id: UUID,
     payload: OdometerEntryUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
 ) -> OdometerEntryOut:
     """
@@ -143,7 +152,7 @@ def update_odometer_entry(
 @router.delete("/odometer-entries/{entry_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_odometer_entry(
     entry_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
 ) -> None:
     """
@@ -172,7 +181,7 @@ def get_odometer_graph(
     from_date: str | None = Query(default=None),
     to_date: str | None = Query(default=None),
     limit: int = Query(default=1000, ge=1, le=10000),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
 ) -> list[OdometerHistoryItem]:
     """
@@ -206,3 +215,30 @@ def get_odometer_graph(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Unexpected server error.") from exc
 
     return [OdometerHistoryItem.model_validate(row) for row in rows]
+
+
+@router.get("/vehicles/{vehicle_id}/mileage-rate", response_model=MileageRateOut)
+def get_mileage_rate(
+    vehicle_id: UUID,
+    db: Session = Depends(get_db, scope="function"),
+    current_user_id: UUID = Depends(get_current_user_id),
+) -> MileageRateOut:
+    """
+    Estymata tempa przebiegu (km/dzień, km/miesiąc) ze wspólnego modelu
+    przebiegu - tej samej, której używają budżet i przypomnienia.
+    Przy zbyt małej liczbie odczytów km_per_day jest null.
+    """
+    try:
+        row = db.execute(
+            text("SELECT * FROM car_app.fn_get_vehicle_mileage_rate(:actor_id, :vehicle_id)"),
+            {"actor_id": current_user_id, "vehicle_id": vehicle_id},
+        ).mappings().first()
+    except DBAPIError as exc:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="Database error while fetching mileage rate.") from exc
+    except Exception as exc:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Unexpected server error.") from exc
+
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Vehicle not found or no permission")
+
+    return MileageRateOut.model_validate(row)
@@ -65,3 +65,14 @@ class OdometerHistoryItem(BaseModel):
             'odometer_km': data['odometer_km'],
         }
 
+
+
+class MileageRateOut(BaseModel):
+    vehicle_id: UUID
+    km_per_day: float | None = None
+    km_per_month: float | None = None
+    deviation: float | None = Field(default=None, description="Mean absolute deviation of km/day")
+    segments: int = Field(description="Number of odometer intervals in the estimate")
+    last_reading_at: datetime | None = None
+    last_reading_km: float | None = None
+    updated_at: datetime | None = None
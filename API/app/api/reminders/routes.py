@@ -3,12 +3,16 @@ from __future__ import annotations
 from typing import List
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError, DataError, DBAPIError
 
 from app.api.deps import get_db, get_current_user_id
+from app.core.cache import response_cache
+from app.core.etag import is_not_modified, not_modified, reminders_etag, with_etag
+from app.core.idempotency import Idempotency, idempotency
+from app.core.serialization import json_list_response
 from .schemas import ReminderCreate, ReminderOut, ReminderUpdate, ReminderTrigger
 
 router = APIRouter(tags=["reminders"])
@@ -17,19 +21,25 @@ router = APIRouter(tags=["reminders"])
 @router.get("/vehicles/{vehicle_id}/reminders", response_model=List[ReminderOut])
 def list_vehicle_reminders(
     vehicle_id: UUID,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
-) -> list[ReminderOut]:
+) -> Response:
     """
-    Lista reguł przypomnień dla pojazdu.
+    Lista reguł przypomnień dla pojazdu (If-None-Match -> 304 bez zmian).
+    Odpowiedź jest w cache odpowiedzi pod ETagiem, czyli wersjami wszystkiego,
+    od czego zależy lista (reguły, tankowania, serwisy, wpisy licznika, data -
+    fn_get_reminders_version). Zapis dowolną drogą (trasy po id, sync/mutations,
+    triggery) daje nowy klucz, bez unieważniania tagiem.
     """
-    existing = db.execute(
-        text("SELECT * FROM car_app.fn_get_vehicle(:user_id, :vehicle_id)"),
-        {"user_id": current_user_id, "vehicle_id": vehicle_id},
-    ).mappings().first()
+    etag = reminders_etag(db, current_user_id, vehicle_id)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
 
-    if existing is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Vehicle not found or no permission")
+    cache = response_cache.entry(request, variant=etag, tags=[f"vehicle:{vehicle_id}"])
+    cached = cache.get()
+    if cached is not None:
+        return cached
 
     try:
         rows = db.execute(
@@ -39,16 +49,21 @@ def list_vehicle_reminders(
     except DBAPIError as exc:
         raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="Database error while listing reminders.") from exc
 
-    return [ReminderOut.model_validate(row) for row in rows]
+    return cache.store(with_etag(json_list_response(ReminderOut, rows), etag))
 
 
 @router.post("/vehicles/{vehicle_id}/reminders", response_model=ReminderOut, status_code=status.HTTP_201_CREATED)
 def create_reminder(
     vehicle_id: UUID,
     payload: ReminderCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
-) -> ReminderOut:
+    idem: Idempotency = Depends(idempotency("create_reminder")),
+) -> ReminderOut | Response:
+    replay = idem.begin()
+    if replay is not None:
+        return replay
+
     params = {
         "p_user_id": current_user_id,
         "p_vehicle_id": vehicle_id,
@@ -69,6 +84,7 @@ def create_reminder(
             ),
             params,
         ).mappings().first()
+        idem.save(status.HTTP_201_CREATED, ReminderOut, row)
         db.commit()
     except IntegrityError as exc:
         db.rollback()
@@ -90,7 +106,7 @@ def create_reminder(
 def update_reminder(
     reminder_id: UUID,
     payload: ReminderUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
 ) -> ReminderOut:
     patch = payload.model_dump(exclude_unset=True)
@@ -136,7 +152,7 @@ def update_reminder(
 @router.get("/reminders/{reminder_id}/estimate-days-until-due")
 def estimate_days_until_km_reminder(
     reminder_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
 ) -> dict:
     """
@@ -195,7 +211,7 @@ def estimate_days_until_km_reminder(
 @router.post("/reminders/{reminder_id}/check-due-soon")
 def check_reminder_due_soon(
     reminder_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
 ) -> dict:
     """
@@ -241,7 +257,7 @@ def check_reminder_due_soon(
 @router.delete("/reminders/{reminder_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_reminder(
     reminder_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
 ) -> None:
     try:
@@ -264,7 +280,7 @@ def delete_reminder(
 def renew_reminder(
     reminder_id: UUID,
     payload: ReminderTrigger,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
 ) -> ReminderOut:
     """
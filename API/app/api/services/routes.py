@@ -4,12 +4,16 @@ from typing import List
 from uuid import UUID
 import json
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError, DataError, DBAPIError
 
-from app.api.deps import get_db, get_current_user_id
+from app.api.deps import VehicleAccess, ensure_vehicle_access, get_db, get_current_user_id, get_vehicle_access
+from app.core.idempotency import Idempotency, idempotency
+from app.core.serialization import json_list_response
+from app.db.locks import lock_vehicle_writes
+from app.db.transactions import run_transaction
 from .schemas import (
     ServiceCreate,
     ServiceUpdate,
@@ -27,23 +31,14 @@ router = APIRouter(prefix="/services", tags=["services"])
 )
 def list_vehicle_services(
     vehicle_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
-) -> list[ServiceOut]:
+) -> Response:
     """
     List all services for a vehicle.
     Available to OWNER, EDITOR, and VIEWER.
     """
-    existing = db.execute(
-        text("SELECT * FROM car_app.fn_get_vehicle(:user_id, :vehicle_id)"),
-        {"user_id": current_user_id, "vehicle_id": vehicle_id},
-    ).mappings().first()
-
-    if existing is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Vehicle not found or no permission",
-        )
+    ensure_vehicle_access(db, current_user_id, vehicle_id)
 
     try:
         rows = db.execute(
@@ -71,13 +66,13 @@ def list_vehicle_services(
             detail="Unexpected server error.",
         ) from exc
 
-    return [ServiceOut.model_validate(row) for row in rows]
+    return json_list_response(ServiceOut, rows)
 
 
 @router.get("/services/{service_id}", response_model=ServiceOut)
 def get_service(
     service_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
 ) -> ServiceOut:
     """
@@ -132,24 +127,18 @@ def get_service(
 def create_service(
     vehicle_id: UUID,
     payload: ServiceCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
-) -> ServiceOut:
+    access: VehicleAccess = Depends(get_vehicle_access),
+    idem: Idempotency = Depends(idempotency("create_service")),
+) -> ServiceOut | Response:
     """
     Create a new service record for a vehicle.
     Only OWNER or EDITOR can create services.
     """
-    # Check vehicle access
-    existing = db.execute(
-        text("SELECT * FROM car_app.fn_get_vehicle(:user_id, :vehicle_id)"),
-        {"user_id": current_user_id, "vehicle_id": vehicle_id},
-    ).mappings().first()
-
-    if existing is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Vehicle not found or no permission",
-        )
+    replay = idem.begin()
+    if replay is not None:
+        return replay
 
     data = payload.model_dump()
 
@@ -164,7 +153,9 @@ def create_service(
         "note": data.get("note"),
     }
 
-    try:
+    def work():
+        if params["odometer_km"] is not None:
+            lock_vehicle_writes(db, vehicle_id, name="create_service")
         row = db.execute(
             text(
                 """
@@ -182,7 +173,13 @@ def create_service(
             ),
             params,
         ).mappings().first()
-        db.commit()
+        idem.save(status.HTTP_201_CREATED, ServiceOut, row)
+        return row
+
+    try:
+        row = run_transaction(db, work, name="create_service", on_retry=idem.reclaim)
+    except HTTPException:
+        raise
     except IntegrityError as exc:
         db.rollback()
         pgcode = getattr(getattr(exc, "orig", None), "pgcode", None)
@@ -199,12 +196,6 @@ def create_service(
                 detail="Invalid service data or constraint violation.",
             ) from exc
 
-        if pgcode == "40001":
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail="Transaction conflict, please retry.",
-            ) from exc
-
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid service data or constraint violation.",
@@ -244,7 +235,7 @@ def create_service(
 def update_service(
     service_id: UUID,
     payload: ServiceUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
 ) -> ServiceOut:
     """
@@ -281,7 +272,7 @@ def update_service(
         "note": base.get("note"),
     }
 
-    try:
+    def work():
         row = db.execute(
             text(
                 """
@@ -299,7 +290,12 @@ def update_service(
             ),
             params,
         ).mappings().first()
-        db.commit()
+        return row
+
+    try:
+        row = run_transaction(db, work, name="update_service")
+    except HTTPException:
+        raise
     except IntegrityError as exc:
         db.rollback()
         pgcode = getattr(getattr(exc, "orig", None), "pgcode", None)
@@ -310,12 +306,6 @@ def update_service(
                 detail="Invalid service data or constraint violation.",
             ) from exc
 
-        if pgcode == "40001":
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail="Transaction conflict, please retry.",
-            ) from exc
-
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid service data or constraint violation.",
@@ -354,7 +344,7 @@ def update_service(
 )
 def delete_service(
     service_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
 ) -> None:
     """
@@ -399,9 +389,9 @@ def delete_service(
 )
 def list_service_items(
     service_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
-) -> list[ServiceItemOut]:
+) -> Response:
     """
     List all items for a service.
     Available to users with access to the service's vehicle.
@@ -432,7 +422,7 @@ def list_service_items(
             detail="Unexpected server error.",
         ) from exc
 
-    return [ServiceItemOut.model_validate(row) for row in rows]
+    return json_list_response(ServiceItemOut, rows)
 
 
 @router.put(
@@ -442,7 +432,7 @@ def list_service_items(
 def set_service_items(
     service_id: UUID,
     items: List[ServiceItemCreate],
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
 ) -> list[ServiceItemOut]:
     """
@@ -525,7 +515,7 @@ def set_service_items(
 )
 def delete_service_item(
     item_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
 ) -> None:
     """
@@ -0,0 +1,338 @@
+"""
+Handlers applying a single offline mutation.
+
+Each handler mirrors the SQL of the matching REST route (same fn_* functions,
+same parameter shapes) and returns ``(status_code, row)``. A ``None`` row means
+the function found nothing the user may modify. Access is enforced by the
+fn_* functions themselves, so no separate fn_get_vehicle check is made.
+"""
+from __future__ import annotations
+
+import json
+from typing import Any, Callable
+from uuid import UUID
+
+from fastapi import status
+from pydantic import BaseModel
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.api.expenses.schemas import ExpenseCreate, ExpenseOut, ExpenseUpdate
+from app.api.issues.schemas import IssueCreate, IssueOut, IssueUpdate
+from app.api.odometer_entries.schemas import OdometerEntryCreate, OdometerEntryOut, OdometerEntryUpdate
+from app.api.services.schemas import ServiceCreate, ServiceOut, ServiceUpdate
+from app.api.vehicles.schemas import FuelingCreate, FuelingOut, FuelingUpdate
+
+from .schemas import Mutation, MutationEntity, MutationOp
+
+Outcome = tuple[int, Any]
+Handler = Callable[[Session, UUID, Mutation], Outcome]
+
+
+def needs_vehicle_lock(m: Mutation) -> bool:
+    """Whether the mutation adds an odometer reading, like the REST routes that take lock_vehicle_writes."""
+    if m.op != MutationOp.CREATE:
+        return False
+    if m.entity == MutationEntity.SERVICES:
+        return (m.data or {}).get("odometer_km") is not None
+    return m.entity in (MutationEntity.FUELINGS, MutationEntity.ODOMETER_ENTRIES)
+
+
+def _value(item: Any) -> Any:
+    return item.value if hasattr(item, "value") else item
+
+
+# fuelings
+
+def _create_fueling(db: Session, user_id: UUID, m: Mutation) -> Outcome:
+    data = FuelingCreate.model_validate(m.data or {})
+    row = db.execute(
+        text(
+            """
+            SELECT * FROM car_app.fn_create_fueling(
+                :user_id, :vehicle_id, :filled_at, :price_per_unit, :volume, :odometer_km,
+                :full_tank, :driving_cycle, :fuel, :note, :fuel_level_before, :fuel_level_after
+            )
+            """
+        ),
+        {
+            "user_id": user_id,
+            "vehicle_id": m.vehicle_id,
+            "filled_at": data.filled_at,
+            "price_per_unit": data.price_per_unit,
+            "volume": data.volume,
+            "odometer_km": data.odometer_km,
+            "full_tank": data.full_tank,
+            "driving_cycle": _value(data.driving_cycle),
+            "fuel": _value(data.fuel),
+            "note": data.note,
+            "fuel_level_before": data.fuel_level_before,
+            "fuel_level_after": data.fuel_level_after,
+        },
+    ).mappings().first()
+    return status.HTTP_201_CREATED, row
+
+
+def _update_fueling(db: Session, user_id: UUID, m: Mutation) -> Outcome:
+    patch = FuelingUpdate.model_validate(m.data or {}).model_dump(exclude_unset=True)
+    existing = db.execute(
+        text("SELECT * FROM car_app.fn_get_fueling(:user_id, :fueling_id)"),
+        {"user_id": user_id, "fueling_id": m.id},
+    ).mappings().first()
+    if existing is None:
+        return status.HTTP_404_NOT_FOUND, None
+
+    base = dict(existing)
+    base.update(patch)
+    row = db.execute(
+        text(
+            """
+            SELECT * FROM car_app.fn_update_fueling(
+                :user_id, :fueling_id, :filled_at, :price_per_unit, :volume, :odometer_km,
+                :full_tank, :driving_cycle, :fuel, :note, :fuel_level_before, :fuel_level_after
+            )
+            """
+        ),
+        {
+            "user_id": user_id,
+            "fueling_id": m.id,
+            "filled_at": base["filled_at"],
+            "price_per_unit": base["price_per_unit"],
+            "volume": base["volume"],
+            "odometer_km": base["odometer_km"],
+            "full_tank": base["full_tank"],
+            "driving_cycle": _value(base.get("driving_cycle")),
+            "fuel": _value(base["fuel"]),
+            "note": base.get("note"),
+            "fuel_level_before": base.get("fuel_level_before"),
+            "fuel_level_after": base.get("fuel_level_after"),
+        },
+    ).mappings().first()
+    return status.HTTP_200_OK, row
+
+
+# services
+
+def _create_service(db: Session, user_id: UUID, m: Mutation) -> Outcome:
+    data = ServiceCreate.model_validate(m.data or {})
+    row = db.execute(
+        text(
+            """
+            SELECT * FROM car_app.fn_create_service(
+                :user_id,
+                :vehicle_id,
+                :service_date,
+                CAST(:service_type AS car_app.service_type),
+                CAST(:odometer_km AS NUMERIC),
+                CAST(:total_cost AS NUMERIC),
+                CAST(:reference AS VARCHAR),
+                CAST(:note AS TEXT)
+            )
+            """
+        ),
+        {
+            "user_id": user_id,
+            "vehicle_id": m.vehicle_id,
+            "service_date": data.service_date,
+            "service_type": _value(data.service_type),
+            "odometer_km": data.odometer_km,
+            "total_cost": data.total_cost,
+            "reference": data.reference,
+            "note": data.note,
+        },
+    ).mappings().first()
+    return status.HTTP_201_CREATED, row
+
+
+def _update_service(db: Session, user_id: UUID, m: Mutation) -> Outcome:
+    patch = ServiceUpdate.model_validate(m.data or {}).model_dump(exclude_unset=True)
+    existing = db.execute(
+        text("SELECT * FROM car_app.fn_get_service(:user_id, :service_id)"),
+        {"user_id": user_id, "service_id": m.id},
+    ).mappings().first()
+    if existing is None:
+        return status.HTTP_404_NOT_FOUND, None
+
+    base = dict(existing)
+    base.update(patch)
+    row = db.execute(
+        text(
+            """
+            SELECT * FROM car_app.fn_update_service(
+                :user_id, :service_id, :service_date, :service_type,
+                :odometer_km, :total_cost, :reference, :note
+            )
+            """
+        ),
+        {
+            "user_id": user_id,
+            "service_id": m.id,
+            "service_date": base["service_date"],
+            "service_type": _value(base["service_type"]),
+            "odometer_km": base.get("odometer_km"),
+            "total_cost": base.get("total_cost"),
+            "reference": base.get("reference"),
+            "note": base.get("note"),
+        },
+    ).mappings().first()
+    return status.HTTP_200_OK, row
+
+
+# expenses
+
+def _create_expense(db: Session, user_id: UUID, m: Mutation) -> Outcome:
+    data = ExpenseCreate.model_validate(m.data or {})
+    row = db.execute(
+        text(
+            "SELECT * FROM car_app.fn_create_expense(:p_user_id, :p_vehicle_id, :p_expense_date, CAST(:p_category AS TEXT), CAST(:p_amount AS NUMERIC(12,2)), CAST(:p_vat_rate AS NUMERIC), CAST(:p_note AS TEXT))"
+        ),
+        {
+            "p_user_id": user_id,
+            "p_vehicle_id": m.vehicle_id,
+            "p_expense_date": data.expense_date,
+            "p_category": _value(data.category),
+            "p_amount": data.amount,
+            "p_vat_rate": data.vat_rate,
+            "p_note": data.note,
+        },
+    ).mappings().first()
+    return status.HTTP_201_CREATED, row
+
+
+def _update_expense(db: Session, user_id: UUID, m: Mutation) -> Outcome:
+    patch = ExpenseUpdate.model_validate(m.data or {}).model_dump(exclude_unset=True)
+    row = db.execute(
+        text(
+            "SELECT * FROM car_app.fn_update_expense(:p_user_id, :p_expense_id, :p_expense_date, :p_category, :p_amount, :p_vat_rate, :p_note)"
+        ),
+        {
+            "p_user_id": user_id,
+            "p_expense_id": m.id,
+            "p_expense_date": patch.get("expense_date"),
+            "p_category": _value(patch.get("category")),
+            "p_amount": patch.get("amount"),
+            "p_vat_rate": patch.get("vat_rate"),
+            "p_note": patch.get("note"),
+        },
+    ).mappings().first()
+    return status.HTTP_200_OK, row
+
+
+# odometer entries
+
+def _create_odometer_entry(db: Session, user_id: UUID, m: Mutation) -> Outcome:
+    data = OdometerEntryCreate.model_validate(m.data or {})
+    row = db.execute(
+        text(
+            "SELECT * FROM car_app.fn_create_odometer_entry(:actor_id, :vehicle_id, CAST(:entry_date AS timestamptz), CAST(:value_km AS numeric), :note)"
+        ),
+        {
+            "actor_id": user_id,
+            "vehicle_id": m.vehicle_id,
+            "entry_date": data.entry_date,
+            "value_km": data.value_km,
+            "note": data.note,
+        },
+    ).mappings().first()
+    return status.HTTP_201_CREATED, row
+
+
+def _update_odometer_entry(db: Session, user_id: UUID, m: Mutation) -> Outcome:
+    data = OdometerEntryUpdate.model_validate(m.data or {})
+    row = db.execute(
+        text(
+            "SELECT * FROM car_app.fn_update_odometer_entry(:actor_id, :entry_id, CAST(:entry_date AS timestamptz), CAST(:value_km AS numeric), :note)"
+        ),
+        {
+            "actor_id": user_id,
+            "entry_id": m.id,
+            "entry_date": data.entry_date,
+            "value_km": data.value_km,
+            "note": data.note,
+        },
+    ).mappings().first()
+    return status.HTTP_200_OK, row
+
+
+# issues
+
+def _create_issue(db: Session, user_id: UUID, m: Mutation) -> Outcome:
+    data = IssueCreate.model_validate(m.data or {})
+    row = db.execute(
+        text(
+            "SELECT * FROM car_app.fn_create_issue(:user_id, :vehicle_id, CAST(:title AS TEXT), CAST(:description AS TEXT), CAST(:priority AS TEXT), CAST(:status AS TEXT), CAST(:error_codes AS TEXT))"
+        ),
+        {
+            "user_id": user_id,
+            "vehicle_id": m.vehicle_id,
+            "title": data.title,
+            "description": data.description,
+            "priority": _value(data.priority),
+            "status": _value(data.status),
+            "error_codes": json.dumps(data.error_codes or []),
+        },
+    ).mappings().first()
+    return status.HTTP_201_CREATED, row
+
+
+def _update_issue(db: Session, user_id: UUID, m: Mutation) -> Outcome:
+    patch = IssueUpdate.model_validate(m.data or {}).model_dump(exclude_unset=True)
+    row = db.execute(
+        text(
+            "SELECT * FROM car_app.fn_update_issue(:user_id, :issue_id, :title, :description, :priority, :status, :error_codes)"
+        ),
+        {
+            "user_id": user_id,
+            "issue_id": m.id,
+            "title": patch.get("title"),
+            "description": patch.get("description"),
+            "priority": _value(patch.get("priority")),
+            "status": _value(patch.get("status")),
+            "error_codes": json.dumps(patch["error_codes"]) if patch.get("error_codes") is not None else None,
+        },
+    ).mappings().first()
+    return status.HTTP_200_OK, row
+
+
+# deletes
+
+_DELETE_FUNCTIONS: dict[MutationEntity, str] = {
+    MutationEntity.FUELINGS: "fn_delete_fueling",
+    MutationEntity.SERVICES: "fn_delete_service",
+    MutationEntity.EXPENSES: "fn_delete_expense",
+    MutationEntity.ODOMETER_ENTRIES: "fn_delete_odometer_entry",
+    MutationEntity.ISSUES: "fn_delete_issue",
+}
+
+
+def _delete(db: Session, user_id: UUID, m: Mutation) -> Outcome:
+    deleted = db.execute(
+        text(f"SELECT car_app.{_DELETE_FUNCTIONS[m.entity]}(:user_id, :record_id)"),
+        {"user_id": user_id, "record_id": m.id},
+    ).scalar()
+    if not deleted:
+        return status.HTTP_404_NOT_FOUND, None
+    return status.HTTP_204_NO_CONTENT, None
+
+
+HANDLERS: dict[tuple[MutationEntity, MutationOp], Handler] = {
+    (MutationEntity.FUELINGS, MutationOp.CREATE): _create_fueling,
+    (MutationEntity.FUELINGS, MutationOp.UPDATE): _update_fueling,
+    (MutationEntity.SERVICES, MutationOp.CREATE): _create_service,
+    (MutationEntity.SERVICES, MutationOp.UPDATE): _update_service,
+    (MutationEntity.EXPENSES, MutationOp.CREATE): _create_expense,
+    (MutationEntity.EXPENSES, MutationOp.UPDATE): _update_expense,
+    (MutationEntity.ODOMETER_ENTRIES, MutationOp.CREATE): _create_odometer_entry,
+    (MutationEntity.ODOMETER_ENTRIES, MutationOp.UPDATE): _update_odometer_entry,
+    (MutationEntity.ISSUES, MutationOp.CREATE): _create_issue,
+    (MutationEntity.ISSUES, MutationOp.UPDATE): _update_issue,
+    **{(entity, MutationOp.DELETE): _delete for entity in MutationEntity},
+}
+
+OUT_MODELS: dict[MutationEntity, type[BaseModel]] = {
+    MutationEntity.FUELINGS: FuelingOut,
+    MutationEntity.SERVICES: ServiceOut,
+    MutationEntity.EXPENSES: ExpenseOut,
+    MutationEntity.ODOMETER_ENTRIES: OdometerEntryOut,
+    MutationEntity.ISSUES: IssueOut,
+}
@@ -0,0 +1,352 @@
+from __future__ import annotations
+
+import json
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError, DataError, DBAPIError
+
+from app.api.deps import get_db, get_current_user_id
+from app.config import settings
+from app.db.locks import lock_vehicle_writes
+from app.db.transactions import is_retryable, run_transaction
+from .mutations import HANDLERS, OUT_MODELS, needs_vehicle_lock
+from .schemas import (
+    Mutation,
+    MutationBatch,
+    MutationBatchResult,
+    MutationOp,
+    MutationResult,
+    VehicleChanges,
+)
+
+router = APIRouter(tags=["sync"])
+
+# Idempotency keys share car_app.idempotency_keys with the Idempotency-Key
+# header (stored as "<endpoint>:<key>"), so batch keys get their own scope.
+_KEY_SCOPE = "sync"
+
+
+# Collection -> query returning its rows for the vehicle.
+# `{since}` is replaced by the change filter (empty for a full snapshot).
+_CHANGE_QUERIES = {
+    "fuelings": "SELECT * FROM car_app.fuelings t WHERE t.vehicle_id = :vehicle_id{since}",
+    "services": "SELECT * FROM car_app.services t WHERE t.vehicle_id = :vehicle_id{since}",
+    "service_items": """
+        SELECT t.*
+        FROM car_app.service_items t
+        JOIN car_app.services s ON s.id = t.service_id
+        WHERE s.vehicle_id = :vehicle_id{since}
+    """,
+    "expenses": "SELECT * FROM car_app.expenses t WHERE t.vehicle_id = :vehicle_id{since}",
+    "issues": "SELECT * FROM car_app.issues t WHERE t.vehicle_id = :vehicle_id{since}",
+    "reminders": "SELECT * FROM car_app.reminder_rules t WHERE t.vehicle_id = :vehicle_id{since}",
+    "odometer_entries": "SELECT * FROM car_app.odometer_entries t WHERE t.vehicle_id = :vehicle_id{since}",
+}
+
+_SINCE_FILTER = " AND t.change_xid >= CAST(:since AS xid8)"
+
+
+@router.get("/vehicles/{vehicle_id}/changes", response_model=VehicleChanges)
+def get_vehicle_changes(
+    vehicle_id: UUID,
+    since: str | None = Query(
+        default=None,
+        pattern=r"^\d{1,20}$",
+        description="Cursor returned by the previous call; omit for a full snapshot",
+    ),
+    db: Session = Depends(get_db, scope="function"),
+    current_user_id: UUID = Depends(get_current_user_id),
+) -> Response:
+    """
+    Delta sync for offline-first clients.
+
+    Returns every fueling, service, service item, expense, issue, reminder and
+    odometer entry changed since the cursor, plus tombstones of deleted records.
+    Records may be repeated across calls (upserts are idempotent); none are
+    skipped. All reads run in one REPEATABLE READ snapshot whose xmin becomes
+    the next cursor.
+    """
+    try:
+        # The isolation level has to be chosen before BEGIN: the session's
+        # after_begin listener (route deadline, RLS context) already runs the
+        # first query of the transaction.
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        db.execute(text("SET TRANSACTION READ ONLY"))
+
+        existing = db.execute(
+            text("SELECT * FROM car_app.fn_get_vehicle(:user_id, :vehicle_id)"),
+            {"user_id": current_user_id, "vehicle_id": vehicle_id},
+        ).mappings().first()
+
+        if existing is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Vehicle not found or no permission",
+            )
+
+        cursor = db.execute(
+            text(
+                """
+                SELECT
+                    c.sync_cursor::text AS cursor,
+                    COALESCE(CAST(:since AS xid8) <= c.pruned_before_xid, TRUE) AS full_resync
+                FROM car_app.fn_get_sync_cursor() c
+                """
+            ),
+            {"since": since},
+        ).mappings().one()
+
+        full_resync = cursor["full_resync"]
+        params = {"vehicle_id": vehicle_id, "since": since}
+        since_filter = "" if full_resync else _SINCE_FILTER
+
+        payload: dict = {"cursor": cursor["cursor"], "full_resync": full_resync}
+        for collection, query in _CHANGE_QUERIES.items():
+            payload[collection] = db.execute(
+                text(query.format(since=since_filter)),
+                params,
+            ).mappings().all()
+
+        if full_resync:
+            payload["deleted"] = []
+        else:
+            payload["deleted"] = db.execute(
+                text(
+                    """
+                    SELECT entity, record_id AS id, parent_id, deleted_at
+                    FROM car_app.deleted_records
+                    WHERE vehicle_id = :vehicle_id
+                      AND deleted_xid >= CAST(:since AS xid8)
+                    ORDER BY deleted_xid, id
+                    """
+                ),
+                params,
+            ).mappings().all()
+
+        db.rollback()
+    except HTTPException:
+        db.rollback()
+        raise
+    except DBAPIError as exc:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Database error while fetching changes.",
+        ) from exc
+    except Exception as exc:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Unexpected server error.",
+        ) from exc
+
+    changes = VehicleChanges.model_validate(payload)
+    return Response(content=changes.model_dump_json(), media_type="application/json")
+
+
+def _apply_mutation(db: Session, user_id: UUID, mutation: Mutation) -> MutationResult:
+    """Run one mutation inside its own savepoint; failures roll back only this op."""
+    key = mutation.idempotency_key
+    handler = HANDLERS[(mutation.entity, mutation.op)]
+
+    try:
+        with db.begin_nested():
+            status_code, row = handler(db, user_id, mutation)
+    except ValidationError as exc:
+        errors = "; ".join(
+            f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in exc.errors()
+        )
+        return MutationResult(
+            idempotency_key=key,
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            error=errors,
+        )
+    except IntegrityError as exc:
+        # psycopg 3 exposes the SQLSTATE as ``sqlstate``
+        if getattr(getattr(exc, "orig", None), "sqlstate", None) == "23505":
+            return MutationResult(idempotency_key=key, status_code=status.HTTP_409_CONFLICT, error="Duplicate resource.")
+        return MutationResult(idempotency_key=key, status_code=status.HTTP_400_BAD_REQUEST, error="Constraint violation.")
+    except DataError:
+        return MutationResult(idempotency_key=key, status_code=status.HTTP_400_BAD_REQUEST, error="Invalid input data.")
+    except DBAPIError as exc:
+        if is_retryable(exc):
+            # the whole batch is retried by run_transaction
+            raise
+        return MutationResult(
+            idempotency_key=key,
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            error="Database error while applying mutation.",
+        )
+
+    if status_code == status.HTTP_404_NOT_FOUND or (row is None and status_code != status.HTTP_204_NO_CONTENT):
+        target = "Vehicle" if mutation.op == MutationOp.CREATE else "Record"
+        return MutationResult(
+            idempotency_key=key,
+            status_code=status.HTTP_404_NOT_FOUND,
+            error=f"{target} not found or no permission",
+        )
+
+    if row is None:
+        return MutationResult(idempotency_key=key, status_code=status_code, id=mutation.id)
+
+    data = OUT_MODELS[mutation.entity].model_validate(row).model_dump(mode="json")
+    return MutationResult(idempotency_key=key, status_code=status_code, id=data["id"], data=data)
+
+
+@router.post("/sync/mutations", response_model=MutationBatchResult)
+def apply_mutations(
+    payload: MutationBatch,
+    db: Session = Depends(get_db, scope="function"),
+    current_user_id: UUID = Depends(get_current_user_id),
+) -> MutationBatchResult:
+    """
+    Apply an ordered batch of offline create/update/delete operations.
+
+    The batch runs in one transaction with a savepoint per operation, so a
+    failing operation is reported in its result without undoing the others.
+    Idempotency keys are claimed up front in a single statement and their
+    results stored in the same transaction: a retried batch gets the stored
+    results (``replayed``) instead of applying the operations twice, until
+    the key expires (IDEMPOTENCY_TTL_HOURS). Results with a 5xx status are not
+    stored, so those operations can be retried.
+    """
+    keys = [f"{_KEY_SCOPE}:{m.idempotency_key}" for m in payload.mutations]
+
+    def work():
+        # Blocks on keys claimed by a concurrent, still running batch.
+        claimed = set(
+            db.execute(
+                text(
+                    """
+                    INSERT INTO car_app.idempotency_keys (user_id, key, expires_at)
+                    SELECT :user_id, k, now() + make_interval(hours => :ttl_hours)
+                    FROM unnest(CAST(:keys AS varchar[])) AS k
+                    ON CONFLICT (user_id, key) DO UPDATE
+                        SET status_code = NULL,
+                            response    = NULL,
+                            created_at  = now(),
+                            expires_at  = EXCLUDED.expires_at
+                        WHERE idempotency_keys.expires_at < now()
+                    RETURNING key
+                    """
+                ),
+                {"user_id": current_user_id, "keys": keys, "ttl_hours": settings.idempotency_ttl_hours},
+            ).scalars().all()
+        )
+
+        # Vehicle write locks are taken here, outside the per-operation
+        # savepoints (a rolled back savepoint would release them), once per
+        # vehicle and in a fixed order so concurrent batches cannot deadlock.
+        locked_vehicles = {
+            mutation.vehicle_id
+            for mutation, key in zip(payload.mutations, keys)
+            if key in claimed and needs_vehicle_lock(mutation)
+        }
+        for vehicle_id in sorted(locked_vehicles, key=str):
+            lock_vehicle_writes(db, vehicle_id, name="apply_mutations")
+
+        stored = {}
+        if len(claimed) < len(keys):
+            stored = {
+                row["key"]: row
+                for row in db.execute(
+                    text(
+                        """
+                        SELECT key, status_code, response
+                        FROM car_app.idempotency_keys
+                        WHERE user_id = :user_id
+                          AND key = ANY(CAST(:keys AS varchar[]))
+                        """
+                    ),
+                    {"user_id": current_user_id, "keys": [k for k in keys if k not in claimed]},
+                ).mappings()
+            }
+
+        results: list[MutationResult] = []
+        to_store: list[dict] = []
+        to_release: list[str] = []
+
+        for mutation, key in zip(payload.mutations, keys):
+            if key not in claimed:
+                previous = stored.get(key)
+                if previous is None or previous["response"] is None:
+                    results.append(
+                        MutationResult(
+                            idempotency_key=mutation.idempotency_key,
+                            status_code=status.HTTP_409_CONFLICT,
+                            error="Transaction conflict, please retry.",
+                        )
+                    )
+                else:
+                    results.append(MutationResult.model_validate({**previous["response"], "replayed": True}))
+                continue
+
+            result = _apply_mutation(db, current_user_id, mutation)
+            results.append(result)
+            if result.status_code >= 500:
+                to_release.append(key)
+            else:
+                to_store.append(
+                    {
+                        "user_id": current_user_id,
+                        "key": key,
+                        "status_code": result.status_code,
+                        "response": json.dumps(result.model_dump(mode="json", exclude={"replayed"})),
+                    }
+                )
+
+        if to_store:
+            db.execute(
+                text(
+                    """
+                    UPDATE car_app.idempotency_keys
+                    SET status_code = :status_code,
+                        response = CAST(:response AS jsonb)
+                    WHERE user_id = :user_id
+                      AND key = :key
+                    """
+                ),
+                to_store,
+            )
+        if to_release:
+            db.execute(
+                text(
+                    """
+                    DELETE FROM car_app.idempotency_keys
+                    WHERE user_id = :user_id
+                      AND key = ANY(CAST(:keys AS varchar[]))
+                    """
+                ),
+                {"user_id": current_user_id, "keys": to_release},
+            )
+
+        return results
+
+    try:
+        results = run_transaction(db, work, name="apply_mutations")
+    except HTTPException:
+        raise
+    except IntegrityError as exc:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Constraint violation.",
+        ) from exc
+    except DBAPIError as exc:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Database error while applying mutations.",
+        ) from exc
+    except Exception as exc:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Unexpected server error.",
+        ) from exc
+
+    return MutationBatchResult(results=results)
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from datetime import datetime
+from enum import Enum
+from typing import Any
+from uuid import UUID
+
+from pydantic import BaseModel, Field, model_validator
+
+from app.api.expenses.schemas import ExpenseOut
+from app.api.issues.schemas import IssueOut
+from app.api.odometer_entries.schemas import OdometerEntryOut
+from app.api.reminders.schemas import ReminderOut
+from app.api.services.schemas import ServiceItemOut, ServiceOut
+from app.api.vehicles.schemas import FuelingOut
+
+
+class Tombstone(BaseModel):
+    """A record deleted since the client's cursor"""
+    entity: str = Field(
+        description="fuelings, services, service_items, expenses, issues, reminders, odometer_entries"
+    )
+    id: UUID
+    parent_id: UUID | None = Field(
+        default=None,
+        description="Owning service for service_items"
+    )
+    deleted_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class VehicleChanges(BaseModel):
+    """Records created, updated or deleted since the cursor"""
+    cursor: str = Field(
+        description="Pass as `since` on the next call"
+    )
+    full_resync: bool = Field(
+        description="True when `since` was missing or expired: the payload is a full "
+                    "snapshot and local data not in it should be dropped"
+    )
+    fuelings: list[FuelingOut] = Field(default_factory=list)
+    services: list[ServiceOut] = Field(default_factory=list)
+    service_items: list[ServiceItemOut] = Field(default_factory=list)
+    expenses: list[ExpenseOut] = Field(default_factory=list)
+    issues: list[IssueOut] = Field(default_factory=list)
+    reminders: list[ReminderOut] = Field(default_factory=list)
+    odometer_entries: list[OdometerEntryOut] = Field(default_factory=list)
+    deleted: list[Tombstone] = Field(default_factory=list)
+
+
+class MutationEntity(str, Enum):
+    FUELINGS = "fuelings"
+    SERVICES = "services"
+    EXPENSES = "expenses"
+    ODOMETER_ENTRIES = "odometer_entries"
+    ISSUES = "issues"
+
+
+class MutationOp(str, Enum):
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+
+
+class Mutation(BaseModel):
+    """A single offline operation, replayed in batch order"""
+    idempotency_key: str = Field(min_length=1, max_length=128)
+    entity: MutationEntity
+    op: MutationOp
+    vehicle_id: UUID | None = Field(
+        default=None,
+        description="Required for create"
+    )
+    id: UUID | None = Field(
+        default=None,
+        description="Record id, required for update and delete"
+    )
+    data: dict[str, Any] | None = Field(
+        default=None,
+        description="Create/Update payload of the entity's REST endpoint"
+    )
+
+    @model_validator(mode="after")
+    def check_target(self) -> "Mutation":
+        if self.op == MutationOp.CREATE and self.vehicle_id is None:
+            raise ValueError("vehicle_id is required for create")
+        if self.op != MutationOp.CREATE and self.id is None:
+            raise ValueError("id is required for update and delete")
+        return self
+
+
+class MutationBatch(BaseModel):
+    mutations: list[Mutation] = Field(min_length=1, max_length=500)
+
+    @model_validator(mode="after")
+    def check_unique_keys(self) -> "MutationBatch":
+        keys = [m.idempotency_key for m in self.mutations]
+        if len(keys) != len(set(keys)):
+            raise ValueError("idempotency_key must be unique within a batch")
+        return self
+
+
+class MutationResult(BaseModel):
+    idempotency_key: str
+    status_code: int = Field(
+        description="HTTP status the single-record endpoint would have returned"
+    )
+    id: UUID | None = None
+    data: dict[str, Any] | None = None
+    error: str | None = None
+    replayed: bool = Field(
+        default=False,
+        description="True when the key was already applied and the stored result is returned"
+    )
+
+
+class MutationBatchResult(BaseModel):
+    results: list[MutationResult]
@@ -10,7 +10,9 @@ from sqlalchemy.orm import Session
 from sqlalchemy import text
 from uuid import UUID
 from sqlalchemy.exc import DBAPIError, DataError, IntegrityError
+from app.core.cache import invalidate_on_commit
 from app.core.security import verify_password, get_password_hash
+from app.db.transactions import run_transaction
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -26,7 +28,7 @@ def read_current_user(current_user: UserOut = Depends(get_current_user)) -> User
 @router.patch("/me", response_model=UserOut)
 def update_current_user_profile(
     payload: UserProfileUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
 ) -> UserOut:
     """
@@ -42,8 +44,10 @@ def update_current_user_profile(
         )
 
     display_name = data.get("display_name")
+    # display_name jest w listach udostępnień pojazdów (cache odpowiedzi)
+    invalidate_on_commit(db, f"user:{current_user_id}")
 
-    try:
+    def work():
         row = db.execute(
             text(
                 """
@@ -58,7 +62,12 @@ def update_current_user_profile(
                 "display_name": display_name,
             },
         ).mappings().first()
-        db.commit()
+        return row
+
+    try:
+        row = run_transaction(db, work, name="update_current_user_profile")
+    except HTTPException:
+        raise
     except IntegrityError as exc:
         db.rollback()
         pgcode = getattr(getattr(exc, "orig", None), "pgcode", None)
@@ -69,12 +78,6 @@ def update_current_user_profile(
                 detail="Invalid profile data or constraint violation.",
             ) from exc
 
-        if pgcode == "40001":
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail="Transaction conflict, please retry.",
-            ) from exc
-
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid profile data or constraint violation.",
@@ -109,7 +112,7 @@ def update_current_user_profile(
 @router.patch("/me/password", status_code=status.HTTP_204_NO_CONTENT)
 def change_my_password(
     payload: PasswordChangeRequest,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
 ) -> None:
     """
@@ -156,7 +159,7 @@ def change_my_password(
 
     new_hash = get_password_hash(payload.new_password)
 
-    try:
+    def work():
         result = db.execute(
             text(
                 """
@@ -171,7 +174,12 @@ def change_my_password(
                 "password_hash": new_hash,
             },
         ).mappings().first()
-        db.commit()
+        return result
+
+    try:
+        result = run_transaction(db, work, name="change_my_password")
+    except HTTPException:
+        raise
     except IntegrityError as exc:
         db.rollback()
         pgcode = getattr(getattr(exc, "orig", None), "pgcode", None)
@@ -182,12 +190,6 @@ def change_my_password(
                 detail="Invalid password data or constraint violation.",
             ) from exc
 
-        if pgcode == "40001":
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail="Transaction conflict, please retry.",
-            ) from exc
-
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid password data or constraint violation.",
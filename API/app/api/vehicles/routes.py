@@ -4,12 +4,18 @@ from typing import List
 from uuid import UUID, uuid4
 import json
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError, DataError, DBAPIError
 
-from app.api.deps import get_db, get_current_user_id
+from app.api.deps import VehicleAccess, get_db, get_current_user_id, get_vehicle_access
+from app.core.cache import response_cache
+from app.core.etag import is_not_modified, not_modified, user_vehicles_etag, with_etag
+from app.core.idempotency import Idempotency, idempotency
+from app.core.serialization import json_list_response, json_model_response
+from app.db.pipeline import execute_pipelined
+from app.db.transactions import run_transaction
 from .schemas import (
     VehicleCreate,
     VehicleUpdate,
@@ -27,13 +33,19 @@ router = APIRouter(prefix="/vehicles", tags=["vehicles"])
 
 @router.get("/", response_model=List[VehicleOut])
 def list_vehicles(
-    db: Session = Depends(get_db),
+    request: Request,
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
-) -> list[VehicleOut]:
+) -> Response:
     """
     Lista pojazdów zalogowanego użytkownika (owner + shared).
+    Obsługuje If-None-Match - bez zmian zwraca 304.
     """
     try:
+        etag = user_vehicles_etag(db, current_user_id)
+        if is_not_modified(request, etag):
+            return not_modified(etag)
+
         rows = db.execute(
             text("SELECT * FROM fn_get_user_vehicles(:user_id)"),
             {"user_id": current_user_id},
@@ -49,7 +61,7 @@ def list_vehicles(
             detail="Unexpected server error.",
         ) from exc
 
-    return [VehicleOut.model_validate(row) for row in rows]
+    return with_etag(json_list_response(VehicleOut, rows), etag)
 
 
 @router.post(
@@ -59,12 +71,17 @@ def list_vehicles(
 )
 def create_vehicle(
     payload: VehicleCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
-) -> VehicleOut:
+    idem: Idempotency = Depends(idempotency("create_vehicle")),
+) -> VehicleOut | Response:
     """
     Tworzy nowy pojazd przypisany do bieżącego użytkownika.
     """
+    replay = idem.begin()
+    if replay is not None:
+        return replay
+
     vehicle_id = uuid4()
     data = payload.model_dump()
 
@@ -115,6 +132,7 @@ def create_vehicle(
             ),
             params,
         ).mappings().first()
+        idem.save(status.HTTP_201_CREATED, VehicleOut, row)
         db.commit()
     except IntegrityError as exc:
         db.rollback()
@@ -152,12 +170,19 @@ def create_vehicle(
 @router.get("/{vehicle_id}", response_model=VehicleOut)
 def get_vehicle(
     vehicle_id: UUID,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
-) -> VehicleOut:
+    access: VehicleAccess = Depends(get_vehicle_access),
+) -> Response:
     """
-    Szczegóły pojazdu (owner + shared).
+    Szczegóły pojazdu (owner + shared). Odpowiedź jest w cache odpowiedzi.
     """
+    cache = response_cache.entry(request, variant=access.role, tags=[f"vehicle:{vehicle_id}"])
+    cached = cache.get()
+    if cached is not None:
+        return cached
+
     row = db.execute(
         text("SELECT * FROM fn_get_vehicle(:user_id, :vehicle_id)"),
         {"user_id": current_user_id, "vehicle_id": vehicle_id},
@@ -169,44 +194,41 @@ def get_vehicle(
             detail="Vehicle not found",
         )
 
-    return VehicleOut.model_validate(row)
+    return cache.store(json_model_response(VehicleOut, row))
 
 
 @router.get("/{vehicle_id}/latest-odometer")
 def get_latest_odometer(
     vehicle_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
 ) -> dict:
     """
     Get the most recent odometer reading for a vehicle.
     """
-    # Verify user has access to this vehicle
-    vehicle = db.execute(
-        text("SELECT * FROM fn_get_vehicle(:user_id, :vehicle_id)"),
-        {"user_id": current_user_id, "vehicle_id": vehicle_id},
-    ).mappings().first()
-
-    if vehicle is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Vehicle not found or no permission",
-        )
-
+    # Sprawdzenie dostępu i odczyt przebiegu w jednym pipeline (jeden round trip)
     try:
-        result = db.execute(
-            text("SELECT car_app.fn_get_latest_odometer(:vehicle_id) as odometer_km"),
-            {"vehicle_id": vehicle_id},
-        ).mappings().first()
+        vehicle, result = execute_pipelined(db, [
+            ("SELECT id FROM car_app.fn_get_vehicle(:user_id, :vehicle_id)",
+             {"user_id": current_user_id, "vehicle_id": vehicle_id}),
+            ("SELECT car_app.fn_get_latest_odometer(:vehicle_id) as odometer_km",
+             {"vehicle_id": vehicle_id}),
+        ])
     except DBAPIError as exc:
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail="Database error while fetching latest odometer.",
         ) from exc
 
+    if not vehicle:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Vehicle not found or no permission",
+        )
+
     return {
         "vehicle_id": str(vehicle_id),
-        "odometer_km": float(result["odometer_km"]) if result and result["odometer_km"] else 0.0,
+        "odometer_km": float(result[0]["odometer_km"]) if result and result[0]["odometer_km"] else 0.0,
     }
 
 
@@ -214,7 +236,7 @@ def get_latest_odometer(
 def update_vehicle(
     vehicle_id: UUID,
     payload: VehicleUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
 ) -> VehicleOut:
     """
@@ -255,7 +277,7 @@ def update_vehicle(
         "last_inspection_date": base.get("last_inspection_date"),
     }
 
-    try:
+    def work():
         row = db.execute(
             text(
                 """
@@ -282,7 +304,12 @@ def update_vehicle(
             ),
             params,
         ).mappings().first()
-        db.commit()
+        return row
+
+    try:
+        row = run_transaction(db, work, name="update_vehicle")
+    except HTTPException:
+        raise
     except IntegrityError as exc:
         db.rollback()
         pgcode = getattr(getattr(exc, "orig", None), "pgcode", None)
@@ -299,9 +326,6 @@ def update_vehicle(
         if pgcode in ("23502", "23514", "23503"):
             # not null / check / foreign key violations
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid data or constraint violation.") from exc
-        if pgcode == "40001":
-            # serialization failure — transient
-            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Transaction conflict, please retry.") from exc
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid data or constraint violation.") from exc
     except DataError as exc:
         db.rollback()
@@ -329,7 +353,7 @@ def update_vehicle(
 )
 def delete_vehicle(
     vehicle_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
 ) -> None:
     """
@@ -380,13 +404,22 @@ def delete_vehicle(
 )
 def list_vehicle_shares(
     vehicle_id: UUID,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
-) -> list[VehicleShareOut]:
+    access: VehicleAccess = Depends(get_vehicle_access),
+) -> Response:
     """
     Lista użytkowników współdzielących pojazd.
     Tylko OWNER danego pojazdu może ją zobaczyć.
+    Odpowiedź jest w cache odpowiedzi (unieważniana także zmianą profilu
+    któregoś z użytkowników).
     """
+    cache = response_cache.entry(request, variant=access.role, tags=[f"vehicle:{vehicle_id}"])
+    cached = cache.get()
+    if cached is not None:
+        return cached
+
     try:
         rows = db.execute(
             text("SELECT * FROM fn_get_vehicle_shares(:actor_id, :vehicle_id)"),
@@ -412,7 +445,10 @@ def list_vehicle_shares(
             detail="Vehicle not found or no permission",
         )
 
-    return [VehicleShareOut.model_validate(row) for row in rows]
+    return cache.store(
+        json_list_response(VehicleShareOut, rows),
+        tags=[f"user:{row['user_id']}" for row in rows],
+    )
 
 
 @router.post(
@@ -423,7 +459,7 @@ def list_vehicle_shares(
 def add_or_update_vehicle_share(
     vehicle_id: UUID,
     payload: VehicleShareCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
 ) -> VehicleShareOut:
     """
@@ -499,7 +535,7 @@ def update_vehicle_share_role(
     vehicle_id: UUID,
     user_id: UUID,
     payload: VehicleShareUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
 ) -> VehicleShareOut:
     """
@@ -561,7 +597,7 @@ def update_vehicle_share_role(
 def remove_vehicle_share(
     vehicle_id: UUID,
     user_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
 ) -> None:
     """
@@ -608,23 +644,18 @@ def remove_vehicle_share(
 )
 def get_vehicle_fuels(
     vehicle_id: UUID,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
-) -> list[VehicleFuelConfigItem]:
+    access: VehicleAccess = Depends(get_vehicle_access),
+) -> Response:
     """
-    Lista dozwolonych paliw dla pojazdu.
+    Lista dozwolonych paliw dla pojazdu. Odpowiedź jest w cache odpowiedzi.
     """
-
-    existing = db.execute(
-        text("SELECT * FROM car_app.fn_get_vehicle(:user_id, :vehicle_id)"),
-        {"user_id": current_user_id, "vehicle_id": vehicle_id},
-    ).mappings().first()
-
-    if existing is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Vehicle not found or no permission",
-        )
+    cache = response_cache.entry(request, variant=access.role, tags=[f"vehicle:{vehicle_id}"])
+    cached = cache.get()
+    if cached is not None:
+        return cached
 
     rows = db.execute(
         text(
@@ -638,13 +669,7 @@ def get_vehicle_fuels(
         {"user_id": current_user_id, "vehicle_id": vehicle_id},
     ).mappings().all()
 
-    return [
-        VehicleFuelConfigItem(
-            fuel=row["fuel"],
-            is_primary=row["is_primary"],
-        )
-        for row in rows
-    ]
+    return cache.store(json_list_response(VehicleFuelConfigItem, rows))
 
 @router.post(
     "/{vehicle_id}/fuels",
@@ -654,7 +679,7 @@ def get_vehicle_fuels(
 def add_vehicle_fuels(
     vehicle_id: UUID,
     payload: List[VehicleFuelConfigItem],
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
 ) -> list[VehicleFuelConfigItem]:
     """
@@ -664,22 +689,22 @@ def add_vehicle_fuels(
     - używane przy tworzeniu pojazdu lub dodawaniu nowych paliw
     """
 
-    # Sprawdzamy czy pojazd istnieje i czy user ma do niego dostęp
-    existing = db.execute(
-        text("SELECT * FROM car_app.fn_get_vehicle(:user_id, :vehicle_id)"),
-        {"user_id": current_user_id, "vehicle_id": vehicle_id},
-    ).mappings().first()
-
-    if existing is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Vehicle not found or no permission",
-        )
-
     config = [item.model_dump() for item in payload]
     config_json = json.dumps(config)
 
-    try:
+    def work():
+        # Sprawdzenie dostępu osobnym zapytaniem przed zapisem: zapis nie może
+        # ruszyć (blokady, triggery, błędy 23503/23505) dla cudzego pojazdu
+        existing = db.execute(
+            text("SELECT id FROM car_app.fn_get_vehicle(:user_id, :vehicle_id)"),
+            {"user_id": current_user_id, "vehicle_id": vehicle_id},
+        ).first()
+        if existing is None:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Vehicle not found or no permission",
+            )
         rows = db.execute(
             text(
                 """
@@ -694,7 +719,12 @@ def add_vehicle_fuels(
                 "config": config_json,
             },
         ).mappings().all()
-        db.commit()
+        return rows
+
+    try:
+        rows = run_transaction(db, work, name="add_vehicle_fuels")
+    except HTTPException:
+        raise
     except IntegrityError as exc:
         db.rollback()
         pgcode = getattr(getattr(exc, "orig", None), "pgcode", None)
@@ -712,12 +742,6 @@ def add_vehicle_fuels(
                 detail="Invalid fuel configuration or constraint violation.",
             ) from exc
 
-        if pgcode == "40001":
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail="Transaction conflict, please retry.",
-            ) from exc
-
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid fuel configuration or constraint violation.",
@@ -759,7 +783,7 @@ def add_vehicle_fuels(
 def replace_vehicle_fuels(
     vehicle_id: UUID,
     payload: List[VehicleFuelConfigItem],
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user_id: UUID = Depends(get_current_user_id),
 ) -> list[VehicleFuelConfigItem]:
     """
@@ -784,7 +808,7 @@ def replace_vehicle_fuels(
     config = [item.model_dump() for item in payload]
     config_json = json.dumps(config)
 
-    try:
+    def work():
         rows = db.execute(
             text(
                 """
@@ -801,7 +825,12 @@ def replace_vehicle_fuels(
                 "config": config_json,
             },
         ).mappings().all()
-        db.commit()
+        return rows
+
+    try:
+        rows = run_transaction(db, work, name="replace_vehicle_fuels")
+    except HTTPException:
+        raise
     except IntegrityError as exc:
         db.rollback()
         pgcode = getattr(getattr(exc, "orig", None), "pgcode", None)
@@ -821,13 +850,6 @@ def replace_vehicle_fuels(
                 detail="Invalid fuel configuration or constraint violation.",
             ) from exc
 
-        if pgcode == "40001":
-            # serialization failure — transient
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail="Transaction conflict, please retry.",
-            ) from exc
-
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid fuel configuration or constraint violation.",
@@ -14,10 +14,56 @@ class Settings(BaseSettings):
     db_password: str = Field(alias="DB_PASSWORD")
     environment: str = Field(default="dev", alias="ENVIRONMENT")
 
+    #Query deadlines (per-route overrides in app/core/deadlines.py)
+    db_statement_timeout_ms: int = Field(default=15000, alias="DB_STATEMENT_TIMEOUT_MS")
+
+    #Read replica (optional; same database name and credentials as the primary)
+    db_replica_host: str | None = Field(default=None, alias="DB_REPLICA_HOST")
+    db_replica_port: int | None = Field(default=None, alias="DB_REPLICA_PORT")
+    db_replica_sticky_seconds: float = Field(default=5.0, alias="DB_REPLICA_STICKY_SECONDS")
+
     #JWT
     jwt_secret_key: str = Field(alias="JWT_SECRET_KEY")
     jwt_algorithm: str = Field(default="HS256", alias="JWT_ALGORITHM")
     jwt_access_token_expire_minutes: int = Field(default=30, alias="JWT_ACCESS_TOKEN_EXPIRE_MINUTES")
     jwt_refresh_token_expire_days: int = Field(default=7, alias="JWT_REFRESH_TOKEN_EXPIRE_DAYS")
 
+    #Transaction retries (serialization failures, deadlocks)
+    tx_retry_max_attempts: int = Field(default=5, alias="TX_RETRY_MAX_ATTEMPTS")
+    tx_retry_base_delay_ms: int = Field(default=20, alias="TX_RETRY_BASE_DELAY_MS")
+    tx_retry_max_delay_ms: int = Field(default=500, alias="TX_RETRY_MAX_DELAY_MS")
+    tx_retry_budget_ms: int = Field(default=2000, alias="TX_RETRY_BUDGET_MS")
+
+    #Per-vehicle write lock (odometer-affecting writes)
+    vehicle_write_lock_enabled: bool = Field(default=False, alias="VEHICLE_WRITE_LOCK_ENABLED")
+    vehicle_write_lock_timeout_ms: int = Field(default=3000, alias="VEHICLE_WRITE_LOCK_TIMEOUT_MS")
+
+    #Idempotency-Key
+    idempotency_ttl_hours: int = Field(default=24, alias="IDEMPOTENCY_TTL_HOURS")
+    idempotency_cache_size: int = Field(default=10000, alias="IDEMPOTENCY_CACHE_SIZE")
+
+    #Response cache (read-mostly endpoints, app/core/cache.py)
+    response_cache_enabled: bool = Field(default=True, alias="RESPONSE_CACHE_ENABLED")
+    response_cache_ttl_seconds: float = Field(default=60.0, alias="RESPONSE_CACHE_TTL_SECONDS")
+    response_cache_max_entries: int = Field(default=10000, alias="RESPONSE_CACHE_MAX_ENTRIES")
+    response_cache_max_mb: int = Field(default=64, alias="RESPONSE_CACHE_MAX_MB")
+    response_cache_redis_url: str | None = Field(default=None, alias="RESPONSE_CACHE_REDIS_URL")
+
+    #Import
+    import_batch_size: int = Field(default=500, alias="IMPORT_BATCH_SIZE")
+    import_max_upload_mb: int = Field(default=100, alias="IMPORT_MAX_UPLOAD_MB")
+
+    #Export jobs
+    export_store_dir: str = Field(default="/tmp/car-maintenance-exports", alias="EXPORT_STORE_DIR")
+    export_ttl_hours: int = Field(default=168, alias="EXPORT_TTL_HOURS")
+    export_stream_idle_timeout_seconds: int = Field(default=60, alias="EXPORT_STREAM_IDLE_TIMEOUT_SECONDS")
+
+    #Analytics (Parquet snapshots + DuckDB)
+    analytics_dir: str = Field(default="/tmp/car-maintenance-analytics", alias="ANALYTICS_DIR")
+    analytics_threads: int = Field(default=2, alias="ANALYTICS_THREADS")
+
+    #Row-level security
+    db_rls_enabled: bool = Field(default=False, alias="DB_RLS_ENABLED")
+    db_rls_role: str = Field(default="car_app_rls", alias="DB_RLS_ROLE")
+
 settings = Settings()
\ No newline at end of file
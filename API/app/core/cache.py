@@ -0,0 +1,349 @@
+"""
+Response cache for read-mostly endpoints, with tag-based invalidation.
+
+An entry is keyed by route, path and query parameters and a route-chosen
+variant (the caller's role in the vehicle), and tagged with what it depends
+on (``vehicle:{id}``, ``user:{id}``, ...). Routes use it like this::
+
+    cache = response_cache.entry(request, variant=access.role, tags=[f"vehicle:{vehicle_id}"])
+    cached = cache.get()
+    if cached is not None:
+        return cached
+    ...
+    return cache.store(json_list_response(Model, rows))
+
+The access check still runs on every request; only the main query and the
+serialization are skipped on a hit.
+
+Invalidation does not delete entries. Each invalidation takes the next value
+of a sequence and records it per tag; an entry is served only while none of
+its tags was invalidated after the entry's lookup started. A write that
+commits while a response is being built therefore invalidates that response
+too. Write requests on ``/vehicles/{vehicle_id}/...`` paths invalidate
+``vehicle:{id}`` automatically (``get_db``); other writes call
+``invalidate_on_commit``. Tags are invalidated only when the session commits.
+
+Backends: a per-process LRU bounded by RESPONSE_CACHE_MAX_ENTRIES and
+RESPONSE_CACHE_MAX_MB (default), or Redis when RESPONSE_CACHE_REDIS_URL is set
+(needs the ``redis`` package), shared by all workers so an invalidation
+reaches every worker. With the per-process backend, other workers keep their
+copy until RESPONSE_CACHE_TTL_SECONDS runs out.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from fastapi import Request, Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.metrics import metrics
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Recomputed by Response from the body and media type.
+_SKIPPED_HEADERS = frozenset({"content-length", "content-type"})
+
+# Rough per-entry bookkeeping cost (dict slots, tuples, key string).
+_ENTRY_OVERHEAD = 256
+
+
+@dataclass(frozen=True, slots=True)
+class CachedEntry:
+    status_code: int
+    media_type: str | None
+    headers: tuple[tuple[str, str], ...]
+    body: bytes
+    tags: tuple[str, ...]
+    # sequence value when the lookup started
+    seq: int
+
+    @property
+    def size(self) -> int:
+        return (
+            len(self.body)
+            + sum(len(name) + len(value) for name, value in self.headers)
+            + sum(len(tag) for tag in self.tags)
+            + _ENTRY_OVERHEAD
+        )
+
+    def to_response(self) -> Response:
+        return Response(
+            content=self.body,
+            status_code=self.status_code,
+            headers=dict(self.headers),
+            media_type=self.media_type,
+        )
+
+
+class _MemoryBackend:
+    """Per-process LRU, bounded by entry count and total size."""
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._items: OrderedDict[str, tuple[CachedEntry, float]] = OrderedDict()
+        # tag -> (sequence of its last invalidation, monotonic time of it)
+        self._invalidated: dict[str, tuple[int, float]] = {}
+        self._seq = 0
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def current_seq(self) -> int:
+        with self._lock:
+            return self._seq
+
+    def _is_stale(self, tags: Iterable[str], seq: int) -> bool:
+        return any(self._invalidated.get(tag, (0, 0.0))[0] > seq for tag in tags)
+
+    def _remove(self, key: str) -> None:
+        entry, _ = self._items.pop(key)
+        self._bytes -= entry.size
+
+    def get(self, key: str) -> CachedEntry | None:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            entry, expires_at = item
+            if expires_at < time.monotonic() or self._is_stale(entry.tags, entry.seq):
+                self._remove(key)
+                return None
+            self._items.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: CachedEntry, expires_at: float) -> None:
+        size = entry.size
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+        with self._lock:
+            if self._is_stale(entry.tags, entry.seq):
+                return
+            if key in self._items:
+                self._remove(key)
+            self._items[key] = (entry, expires_at)
+            self._bytes += size
+            while len(self._items) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._items)))
+
+    def invalidate(self, tags: Iterable[str]) -> None:
+        with self._lock:
+            self._seq += 1
+            now = time.monotonic()
+            for tag in tags:
+                self._invalidated[tag] = (self._seq, now)
+            # Entries expire TTL after their lookup started, so an
+            # invalidation older than that can no longer reject anything.
+            if len(self._invalidated) > self.max_entries:
+                horizon = now - self.ttl
+                self._invalidated = {
+                    tag: mark for tag, mark in self._invalidated.items() if mark[1] >= horizon
+                }
+
+    def stats(self) -> tuple[int, int]:
+        with self._lock:
+            return len(self._items), self._bytes
+
+
+class _RedisBackend:
+    """Shared backend; entries and invalidation marks expire with the TTL."""
+
+    prefix = "car-maintenance:response-cache:"
+
+    def __init__(self, url: str, ttl: float) -> None:
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("RESPONSE_CACHE_REDIS_URL is set but the redis package is not installed.") from exc
+
+        self.ttl = ttl
+        self._errors = redis.RedisError
+        self._client = redis.Redis.from_url(url)
+
+    def _failed(self, operation: str, exc: Exception) -> None:
+        metrics.inc("response_cache_backend_errors_total", operation=operation)
+        logger.warning("Response cache %s failed: %s", operation, exc)
+
+    def current_seq(self) -> int | None:
+        try:
+            return int(self._client.get(self.prefix + "seq") or 0)
+        except self._errors as exc:
+            self._failed("seq", exc)
+            return None
+
+    def get(self, key: str) -> CachedEntry | None:
+        try:
+            raw = self._client.get(self.prefix + "entry:" + key)
+            if raw is None:
+                return None
+            header, _, body = raw.partition(b"\n")
+            meta = json.loads(header)
+            entry = CachedEntry(
+                status_code=meta["status_code"],
+                media_type=meta["media_type"],
+                headers=tuple(tuple(pair) for pair in meta["headers"]),
+                body=body,
+                tags=tuple(meta["tags"]),
+                seq=meta["seq"],
+            )
+            if entry.tags:
+                marks = self._client.mget([self.prefix + "tag:" + tag for tag in entry.tags])
+                if any(mark is not None and int(mark) > entry.seq for mark in marks):
+                    return None
+            return entry
+        except self._errors as exc:
+            self._failed("get", exc)
+            return None
+
+    def put(self, key: str, entry: CachedEntry, expires_at: float) -> None:
+        ttl_ms = int((expires_at - time.monotonic()) * 1000)
+        if ttl_ms <= 0:
+            return
+        header = json.dumps({
+            "status_code": entry.status_code,
+            "media_type": entry.media_type,
+            "headers": entry.headers,
+            "tags": entry.tags,
+            "seq": entry.seq,
+        })
+        try:
+            self._client.set(self.prefix + "entry:" + key, header.encode() + b"\n" + entry.body, px=ttl_ms)
+        except self._errors as exc:
+            self._failed("put", exc)
+
+    def invalidate(self, tags: Iterable[str]) -> None:
+        ttl_ms = int(self.ttl * 1000) + 1000
+        try:
+            seq = self._client.incr(self.prefix + "seq")
+            pipe = self._client.pipeline(transaction=False)
+            for tag in tags:
+                pipe.set(self.prefix + "tag:" + tag, seq, px=ttl_ms)
+            pipe.execute()
+        except self._errors as exc:
+            self._failed("invalidate", exc)
+
+    def stats(self) -> None:
+        return None
+
+
+class CachedResponse:
+    """Cache slot of one request; see the module docstring."""
+
+    def __init__(self, cache: ResponseCache, key: str, route: str, tags: tuple[str, ...]) -> None:
+        self.cache = cache
+        self.key = key
+        self.route = route
+        self.tags = tags
+        backend = cache.backend
+        self.seq = backend.current_seq() if backend is not None else None
+        self.expires_at = time.monotonic() + settings.response_cache_ttl_seconds
+
+    def get(self) -> Response | None:
+        if self.seq is None:
+            return None
+        entry = self.cache.backend.get(self.key)
+        self.cache.record(self.route, hit=entry is not None)
+        return entry.to_response() if entry is not None else None
+
+    def store(self, response: Response, *, tags: Iterable[str] = ()) -> Response:
+        """Cache a 200 response (with extra ``tags`` known only after the query); returns it."""
+        if self.seq is None or response.status_code != 200 or not isinstance(response.body, bytes):
+            return response
+        entry = CachedEntry(
+            status_code=response.status_code,
+            media_type=response.media_type,
+            headers=tuple(
+                (name, value) for name, value in response.headers.items() if name not in _SKIPPED_HEADERS
+            ),
+            body=response.body,
+            tags=tuple(dict.fromkeys((*self.tags, *tags))),
+            seq=self.seq,
+        )
+        self.cache.backend.put(self.key, entry, self.expires_at)
+        return response
+
+
+class ResponseCache:
+    def __init__(self) -> None:
+        self.backend: _MemoryBackend | _RedisBackend | None = None
+        if settings.response_cache_enabled:
+            ttl = settings.response_cache_ttl_seconds
+            if settings.response_cache_redis_url:
+                self.backend = _RedisBackend(settings.response_cache_redis_url, ttl)
+            else:
+                self.backend = _MemoryBackend(
+                    settings.response_cache_max_entries,
+                    settings.response_cache_max_mb * 1024 * 1024,
+                    ttl,
+                )
+        self._hits = 0
+        self._lookups = 0
+        self._lock = threading.Lock()
+
+    def entry(self, request: Request, *, variant: str = "", tags: Iterable[str] = ()) -> CachedResponse:
+        route = getattr(request.scope.get("route"), "name", request.url.path)
+        digest = hashlib.sha256(
+            json.dumps(
+                [
+                    sorted(request.path_params.items()),
+                    sorted(request.query_params.multi_items()),
+                    variant,
+                ],
+                default=str,
+            ).encode()
+        ).hexdigest()
+        return CachedResponse(self, f"{route}:{digest}", route, tuple(tags))
+
+    def invalidate(self, *tags: str) -> None:
+        if self.backend is not None and tags:
+            self.backend.invalidate(tags)
+
+    def record(self, route: str, *, hit: bool) -> None:
+        metrics.inc("response_cache_lookups_total", route=route, result="hit" if hit else "miss")
+        with self._lock:
+            self._lookups += 1
+            self._hits += hit
+
+    def hit_ratio(self) -> float:
+        with self._lock:
+            return self._hits / self._lookups if self._lookups else 0.0
+
+    def stats(self) -> tuple[int, int] | None:
+        return self.backend.stats() if self.backend is not None else None
+
+
+response_cache = ResponseCache()
+
+
+def invalidate_on_commit(db: Session, *tags: str) -> None:
+    """Invalidate ``tags`` each time ``db`` commits (nothing when it only rolls back)."""
+    db.info.setdefault("cache_invalidate", set()).update(tags)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    tags = session.info.get("cache_invalidate")
+    if tags:
+        response_cache.invalidate(*tags)
+
+
+def _stat(index: int) -> dict:
+    stats = response_cache.stats()
+    return {} if stats is None else {(): stats[index]}
+
+
+metrics.counter("response_cache_lookups_total", "Response cache lookups by route and result (hit/miss)")
+metrics.counter("response_cache_backend_errors_total", "Failed shared response cache operations")
+metrics.gauge("response_cache_hit_ratio", "Share of response cache lookups served from the cache", response_cache.hit_ratio)
+metrics.gauge("response_cache_entries", "Entries in the per-process response cache", lambda: _stat(0))
+metrics.gauge("response_cache_memory_bytes", "Approximate size of the per-process response cache", lambda: _stat(1))
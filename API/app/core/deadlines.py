@@ -0,0 +1,95 @@
+"""
+Per-route query deadlines.
+
+Every connection starts with ``statement_timeout = DB_STATEMENT_TIMEOUT_MS``
+(set in the connection options, so it costs no round trip). Routes that need
+a different bound are listed in ``ROUTE_DEADLINES_MS``; ``get_db`` /
+``get_read_db`` put the route's value on the session and the ``after_begin``
+listener applies it with ``SET LOCAL`` semantics (``set_config(..., true)``)
+in every transaction of the request.
+
+A statement cancelled by the timeout (SQLSTATE 57014) surfaces as
+``504 Request deadline exceeded.``, whether the route let the database error
+through or wrapped it in a 5xx HTTPException, and is counted in
+``db_statement_timeouts_total``.
+"""
+from __future__ import annotations
+
+from fastapi import FastAPI, Request, status
+from fastapi.exception_handlers import http_exception_handler
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import DBAPIError
+from starlette.exceptions import HTTPException as StarletteHTTPException
+
+from app.config import settings
+from app.core.metrics import metrics
+
+QUERY_CANCELED = "57014"
+
+# Route name (endpoint function) -> statement_timeout in ms.
+# Routes not listed use DB_STATEMENT_TIMEOUT_MS.
+ROUTE_DEADLINES_MS: dict[str, int] = {
+    "health_check": 2_000,
+    # heavy reads
+    "export_vehicle_data": 120_000,
+    "export_account_zip": 120_000,
+    "get_odometer_graph": 30_000,
+    "get_budget_forecast": 30_000,
+    "evaluate_budget_scenarios": 30_000,
+    "get_budget_statistics": 30_000,
+    "get_user_budget_forecast": 60_000,
+    "get_fleet_summary": 30_000,
+    "get_vehicle_changes": 60_000,
+    # bulk writes
+    "classify_vehicle_expenses": 60_000,
+    "import_vehicle_data": 120_000,
+    "apply_mutations": 30_000,
+}
+
+metrics.counter("db_statement_timeouts_total", "Requests whose query was cancelled by statement_timeout")
+
+
+def route_deadline_ms(request: Request) -> int | None:
+    """The route's statement_timeout when it differs from the connection default."""
+    route = request.scope.get("route")
+    deadline = ROUTE_DEADLINES_MS.get(getattr(route, "name", None))
+    if deadline is None or deadline == settings.db_statement_timeout_ms:
+        return None
+    return deadline
+
+
+def is_statement_timeout(exc: BaseException | None) -> bool:
+    """True when ``exc`` or one of its causes is a query cancelled by statement_timeout."""
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        if getattr(getattr(exc, "orig", None), "sqlstate", None) == QUERY_CANCELED:
+            return True
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+def _deadline_exceeded(request: Request) -> JSONResponse:
+    route = request.scope.get("route")
+    metrics.inc("db_statement_timeouts_total", route=getattr(route, "name", "unknown"))
+    return JSONResponse(
+        status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+        content={"detail": "Request deadline exceeded."},
+    )
+
+
+def install_deadline_handlers(app: FastAPI) -> None:
+    @app.exception_handler(StarletteHTTPException)
+    async def _http_exception(request: Request, exc: StarletteHTTPException):
+        if exc.status_code >= 500 and is_statement_timeout(exc):
+            return _deadline_exceeded(request)
+        return await http_exception_handler(request, exc)
+
+    @app.exception_handler(DBAPIError)
+    async def _dbapi_error(request: Request, exc: DBAPIError):
+        if is_statement_timeout(exc):
+            return _deadline_exceeded(request)
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"detail": "Unexpected server error."},
+        )
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from uuid import UUID
+
+from fastapi import HTTPException, Request, Response, status
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Clients may keep the response but must revalidate it on every use.
+CACHE_CONTROL = "private, no-cache"
+
+
+def collection_etag(
+    db: Session,
+    user_id: UUID,
+    vehicle_id: UUID,
+    collection: str,
+) -> str:
+    """
+    ETag of a vehicle-scoped collection (vehicle, fuelings, expenses, reminders).
+
+    A single indexed lookup that doubles as the access check: raises 404 when
+    the vehicle does not exist or the user has no access to it.
+    """
+    row = db.execute(
+        text("SELECT version FROM car_app.fn_get_collection_version(:user_id, :vehicle_id, :collection)"),
+        {"user_id": user_id, "vehicle_id": vehicle_id, "collection": collection},
+    ).first()
+
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Vehicle not found or no permission",
+        )
+
+    return f'W/"{collection}-{vehicle_id}-{row.version}"'
+
+
+def reminders_etag(db: Session, user_id: UUID, vehicle_id: UUID) -> str:
+    """
+    ETag of a vehicle's reminder list. The list carries estimated_days_until_due,
+    so the tag also follows fuelings, services, odometer entries and the date
+    (fn_get_reminders_version). Doubles as the access check, like
+    ``collection_etag``.
+    """
+    row = db.execute(
+        text("SELECT version FROM car_app.fn_get_reminders_version(:user_id, :vehicle_id)"),
+        {"user_id": user_id, "vehicle_id": vehicle_id},
+    ).first()
+
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Vehicle not found or no permission",
+        )
+
+    return f'W/"reminders-{vehicle_id}-{row.version}"'
+
+
+def user_vehicles_etag(db: Session, user_id: UUID) -> str:
+    """
+    ETag of the user's vehicle list: changes when a vehicle is added, edited,
+    removed or (un)shared with the user.
+    """
+    digest = db.execute(
+        text("SELECT car_app.fn_get_user_vehicles_version(:user_id)"),
+        {"user_id": user_id},
+    ).scalar_one()
+    return f'W/"vehicles-{digest}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """Weak If-None-Match comparison (RFC 9110 13.1.2)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+
+    candidates = [tag.strip() for tag in header.split(",")]
+    if "*" in candidates:
+        return True
+
+    opaque = etag.removeprefix("W/")
+    return any(tag.removeprefix("W/") == opaque for tag in candidates)
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
+
+
+def with_etag(response: Response, etag: str) -> Response:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return response
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator
+
+from app.config import settings
+
+
+class FileStore:
+    """
+    Local content-addressed store for generated files (export artifacts).
+
+    A file is stored under its SHA-256 (``ab/abcdef...``), so identical
+    artifacts are kept once and a file never changes after it is written -
+    the digest doubles as a strong ETag. Files are written to a temp file in
+    the store and renamed into place, so readers never see partial files.
+    """
+
+    def __init__(self, root: str | os.PathLike[str]) -> None:
+        self.root = Path(root)
+
+    def path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest
+
+    def exists(self, digest: str) -> bool:
+        return self.path(digest).is_file()
+
+    @contextmanager
+    def writer(self) -> Iterator[IO[bytes]]:
+        """
+        Yield a binary file to write an artifact into; ``store`` it when done.
+
+        The temp file is removed if the block raises or the file is not stored.
+        """
+        tmp_dir = self.root / "tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        file = tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False)
+        try:
+            yield file
+        finally:
+            file.close()
+            if os.path.exists(file.name):
+                os.unlink(file.name)
+
+    def store(self, file: IO[bytes]) -> tuple[str, int]:
+        """Move a file from ``writer`` into the store; returns (sha256, size)."""
+        file.flush()
+        file.seek(0)
+        digest = hashlib.sha256()
+        size = 0
+        while chunk := file.read(1024 * 1024):
+            digest.update(chunk)
+            size += len(chunk)
+        file.close()
+
+        sha256 = digest.hexdigest()
+        target = self.path(sha256)
+        if target.exists():
+            # Same content already stored; refresh its age for prune().
+            os.utime(target)
+            os.unlink(file.name)
+        else:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(file.name, target)
+        return sha256, size
+
+    def prune(self, max_age_seconds: float) -> int:
+        """Remove files not written (or re-stored) within ``max_age_seconds``."""
+        cutoff = time.time() - max_age_seconds
+        removed = 0
+        if not self.root.is_dir():
+            return removed
+        for path in self.root.glob("*/*"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        return removed
+
+
+file_store = FileStore(settings.export_store_dir)
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+from uuid import UUID
+
+from fastapi import Depends, Header, HTTPException, Request, Response, status
+from pydantic import BaseModel
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db, get_current_user_id
+from app.config import settings
+
+REPLAY_HEADER = "Idempotent-Replayed"
+
+
+class _ResponseCache:
+    """
+    Per-process LRU of committed responses, keyed by (user, scoped key).
+
+    Only responses whose transaction has committed are put here, so a hit can
+    be replayed without touching the database.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._items: OrderedDict[tuple[UUID, str], tuple[str, int, bytes, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: UUID, key: str) -> tuple[str, int, bytes] | None:
+        with self._lock:
+            item = self._items.get((user_id, key))
+            if item is None:
+                return None
+            request_hash, status_code, body, expires_at = item
+            if expires_at < time.monotonic():
+                del self._items[(user_id, key)]
+                return None
+            self._items.move_to_end((user_id, key))
+            return request_hash, status_code, body
+
+    def put(self, user_id: UUID, key: str, request_hash: str, status_code: int, body: bytes) -> None:
+        if self.max_size <= 0:
+            return
+        expires_at = time.monotonic() + settings.idempotency_ttl_hours * 3600
+        with self._lock:
+            self._items[(user_id, key)] = (request_hash, status_code, body, expires_at)
+            self._items.move_to_end((user_id, key))
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+
+response_cache = _ResponseCache(settings.idempotency_cache_size)
+
+
+class Idempotency:
+    """
+    Idempotency-Key handling for one create request.
+
+    Usage in a route (``begin`` first, ``save`` in the same transaction as the
+    write, before ``db.commit()``)::
+
+        replay = idem.begin()
+        if replay is not None:
+            return replay
+        ...
+        idem.save(status.HTTP_201_CREATED, FuelingOut, row)
+        db.commit()
+
+    ``begin`` claims the key with a row in car_app.idempotency_keys. A retry
+    running concurrently blocks on that row until the first request commits
+    and then replays its stored response. A request that rolled back leaves no
+    claim. A committed claim without a stored response (e.g. a 403/404 outcome)
+    may be taken over.
+    Without the header every method is a no-op.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        user_id: UUID,
+        scope: str,
+        key: str | None,
+        request_hash: str,
+    ) -> None:
+        self.db = db
+        self.user_id = user_id
+        self.key = f"{scope}:{key}" if key else None
+        self.request_hash = request_hash
+        self._saved: object | None = None
+
+    def _replay(self, status_code: int, body: bytes) -> Response:
+        return Response(
+            content=body,
+            status_code=status_code,
+            media_type="application/json",
+            headers={REPLAY_HEADER: "true"},
+        )
+
+    def _check_hash(self, request_hash: str | None) -> None:
+        if request_hash is not None and request_hash != self.request_hash:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                detail="Idempotency-Key reused with a different request.",
+            )
+
+    def begin(self) -> Response | None:
+        if self.key is None:
+            return None
+
+        cached = response_cache.get(self.user_id, self.key)
+        if cached is not None:
+            request_hash, status_code, body = cached
+            self._check_hash(request_hash)
+            return self._replay(status_code, body)
+
+        claimed = self.db.execute(
+            text(
+                """
+                INSERT INTO car_app.idempotency_keys (user_id, key, request_hash, expires_at)
+                VALUES (:user_id, :key, :request_hash, now() + make_interval(hours => :ttl_hours))
+                ON CONFLICT (user_id, key) DO UPDATE
+                    SET request_hash = EXCLUDED.request_hash,
+                        status_code  = NULL,
+                        response     = NULL,
+                        created_at   = now(),
+                        expires_at   = EXCLUDED.expires_at
+                    WHERE idempotency_keys.expires_at < now()
+                       OR (idempotency_keys.response IS NULL
+                           AND idempotency_keys.request_hash = EXCLUDED.request_hash)
+                RETURNING key
+                """
+            ),
+            {
+                "user_id": self.user_id,
+                "key": self.key,
+                "request_hash": self.request_hash,
+                "ttl_hours": settings.idempotency_ttl_hours,
+            },
+        ).first()
+        if claimed is not None:
+            return None
+
+        stored = self.db.execute(
+            text(
+                """
+                SELECT request_hash, status_code, response
+                FROM car_app.idempotency_keys
+                WHERE user_id = :user_id
+                  AND key = :key
+                """
+            ),
+            {"user_id": self.user_id, "key": self.key},
+        ).mappings().first()
+        self.db.rollback()
+
+        if stored is None or stored["response"] is None:
+            self._check_hash(stored["request_hash"] if stored else None)
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Transaction conflict, please retry.",
+            )
+
+        self._check_hash(stored["request_hash"])
+        body = json.dumps(stored["response"]).encode()
+        response_cache.put(self.user_id, self.key, stored["request_hash"], stored["status_code"], body)
+        return self._replay(stored["status_code"], body)
+
+    def reclaim(self) -> None:
+        """
+        Take the claim again after the transaction was rolled back for a
+        retry (``run_transaction(..., on_retry=idem.reclaim)``).
+        """
+        if self.key is not None and self.begin() is not None:
+            # the key was completed by a concurrent request in the meantime
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Transaction conflict, please retry.",
+            )
+
+    def save(self, status_code: int, model: type[BaseModel], row: Any) -> None:
+        """Store the response for ``row`` (no-op when the route produced no row)."""
+        if self.key is None or row is None:
+            return
+
+        body = model.model_validate(row).model_dump_json()
+        self.db.execute(
+            text(
+                """
+                UPDATE car_app.idempotency_keys
+                SET status_code = :status_code,
+                    response = CAST(:response AS jsonb)
+                WHERE user_id = :user_id
+                  AND key = :key
+                """
+            ),
+            {"user_id": self.user_id, "key": self.key, "status_code": status_code, "response": body},
+        )
+
+        user_id, key, request_hash = self.user_id, self.key, self.request_hash
+        # a retried transaction saves again; only the latest save is cached
+        self._saved = saved = object()
+
+        @event.listens_for(self.db, "after_commit", once=True)
+        def _remember(session: Session) -> None:
+            if self._saved is saved:
+                response_cache.put(user_id, key, request_hash, status_code, body.encode())
+
+
+def idempotency(scope: str) -> Callable[..., Any]:
+    """
+    Dependency factory for create routes; ``scope`` namespaces the key per
+    endpoint (the same client key may be used on different endpoints).
+    """
+
+    async def dependency(
+        request: Request,
+        idempotency_key: str | None = Header(default=None, alias="Idempotency-Key", max_length=128),
+        db: Session = Depends(get_db, scope="function"),
+        current_user_id: UUID = Depends(get_current_user_id),
+    ) -> Idempotency:
+        request_hash = ""
+        if idempotency_key:
+            digest = hashlib.sha256(f"{request.method} {request.url.path}\n".encode())
+            digest.update(await request.body())
+            request_hash = digest.hexdigest()
+        return Idempotency(db, current_user_id, scope, idempotency_key, request_hash)
+
+    return dependency
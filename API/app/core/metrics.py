@@ -0,0 +1,105 @@
+"""
+Minimal in-process metrics, exposed in the Prometheus text format at
+GET /meta/metrics.
+
+Counters and histograms are updated from request handling; gauges are
+callables read at scrape time. Values are per process (one series set per API worker).
+"""
+from __future__ import annotations
+
+import threading
+from collections import defaultdict
+from typing import Callable
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _labels(labels: dict[str, str]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format(name: str, labels: Labels, value: float) -> str:
+    if labels:
+        rendered = ",".join(f'{key}="{_escape(val)}"' for key, val in labels)
+        return f"{name}{{{rendered}}} {value:g}"
+    return f"{name} {value:g}"
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._help: dict[str, tuple[str, str]] = {}
+        self._counters: dict[str, dict[Labels, float]] = defaultdict(dict)
+        self._gauges: dict[str, Callable[[], dict[Labels, float] | float]] = {}
+        self._buckets: dict[str, tuple[float, ...]] = {}
+        # name -> labels -> [per-bucket counts..., sum, count]
+        self._histograms: dict[str, dict[Labels, list[float]]] = defaultdict(dict)
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str) -> None:
+        self._help[name] = ("counter", help_text)
+
+    def gauge(self, name: str, help_text: str, read: Callable[[], dict[Labels, float] | float]) -> None:
+        """Register a gauge; ``read`` returns a value or {labels: value}."""
+        self._help[name] = ("gauge", help_text)
+        self._gauges[name] = read
+
+    def histogram(self, name: str, help_text: str, buckets: tuple[float, ...]) -> None:
+        self._help[name] = ("histogram", help_text)
+        self._buckets[name] = tuple(sorted(buckets))
+
+    def inc(self, name: str, amount: float = 1, **labels: str) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters[name]
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        buckets = self._buckets[name]
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms[name].setdefault(key, [0.0] * (len(buckets) + 2))
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def value(self, name: str, **labels: str) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(_labels(labels), 0)
+
+    def render(self) -> str:
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {
+                name: {labels: list(values) for labels, values in series.items()}
+                for name, series in self._histograms.items()
+            }
+
+        lines = []
+        for name, (kind, help_text) in sorted(self._help.items()):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "histogram":
+                for labels, values in sorted(histograms.get(name, {}).items()):
+                    for bound, count in zip(self._buckets[name], values):
+                        lines.append(_format(f"{name}_bucket", labels + (("le", f"{bound:g}"),), count))
+                    lines.append(_format(f"{name}_bucket", labels + (("le", "+Inf"),), values[-1]))
+                    lines.append(_format(f"{name}_sum", labels, values[-2]))
+                    lines.append(_format(f"{name}_count", labels, values[-1]))
+                continue
+            if kind == "counter":
+                series = counters.get(name, {})
+            else:
+                read = self._gauges[name]()
+                series = read if isinstance(read, dict) else {(): read}
+            for labels, value in sorted(series.items()):
+                lines.append(_format(name, labels, value))
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
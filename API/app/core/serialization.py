@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Iterable, TypeVar
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+@lru_cache(maxsize=None)
+def list_adapter(model: type[ModelT]) -> TypeAdapter[list[ModelT]]:
+    """
+    Prebuilt (cached per model) adapter for ``list[model]``.
+
+    Building a TypeAdapter compiles a pydantic-core schema, so it is done once
+    per schema class, not per request.
+    """
+    return TypeAdapter(list[model])
+
+
+def json_list_response(
+    model: type[BaseModel],
+    rows: Iterable[Any],
+    status_code: int = 200,
+) -> Response:
+    """
+    Fast path for list endpoints returning trusted DB rows.
+
+    Rows (RowMapping objects from ``.mappings().all()``) are validated once and
+    dumped straight to JSON bytes by pydantic-core. Returning a Response makes
+    FastAPI skip its own response_model validation and encoding, so the route's
+    ``response_model`` only documents the payload in OpenAPI.
+    """
+    adapter = list_adapter(model)
+    content = adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+    return Response(content=content, status_code=status_code, media_type="application/json")
+
+
+def json_model_response(model: type[BaseModel], row: Any, status_code: int = 200) -> Response:
+    """Single-object counterpart of ``json_list_response``."""
+    content = model.model_validate(row, from_attributes=True).model_dump_json().encode()
+    return Response(content=content, status_code=status_code, media_type="application/json")
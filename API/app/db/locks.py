@@ -0,0 +1,91 @@
+"""
+Per-vehicle serialization of odometer-affecting writes.
+
+Fuelings, odometer entries and services with a mileage are checked against
+the vehicle's other readings inside the DB functions. When several users of
+a shared vehicle write at the same time, those checks race and the losers
+fail with serialization conflicts. With VEHICLE_WRITE_LOCK_ENABLED the write
+first takes a transaction-scoped advisory lock on the vehicle, so concurrent
+writers queue for a moment instead. The lock is released at commit/rollback.
+
+The wait is bounded by VEHICLE_WRITE_LOCK_TIMEOUT_MS (``lock_timeout`` set only
+for the lock; the previous value is restored as soon as it is taken, in the
+same statement); a writer that does not get the lock in time gets
+``409 Transaction conflict, please retry.`` Background jobs pass
+``timeout_ms=0`` and wait for the lock instead, since there is no client to
+retry for them.
+
+Every path that creates odometer readings takes the lock: the REST create
+routes, POST /sync/mutations, the CSV bulk import and the background
+importer (once per transaction and vehicle).
+"""
+from __future__ import annotations
+
+import time
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.metrics import metrics
+
+# First key of pg_advisory_xact_lock(int, int); the second is the vehicle id hash.
+VEHICLE_WRITE_LOCK_CLASS = 7301
+
+LOCK_NOT_AVAILABLE = "55P03"
+
+metrics.histogram(
+    "vehicle_write_lock_wait_seconds",
+    "Time spent waiting for the per-vehicle write lock",
+    (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+metrics.counter("vehicle_write_lock_timeouts_total", "Writes that gave up waiting for the per-vehicle write lock")
+
+
+def lock_vehicle_writes(db: Session, vehicle_id: UUID, *, name: str, timeout_ms: int | None = None) -> None:
+    """
+    Take the vehicle's write lock in the current transaction (no-op when
+    disabled). ``timeout_ms`` overrides VEHICLE_WRITE_LOCK_TIMEOUT_MS; 0 waits
+    without a limit.
+    """
+    if not settings.vehicle_write_lock_enabled:
+        return
+
+    started = time.perf_counter()
+    try:
+        db.execute(
+            text(
+                """
+                SELECT set_config('lock_timeout', locked.previous, true)
+                FROM (
+                    SELECT
+                        timeout.previous,
+                        pg_advisory_xact_lock(:lock_class, hashtext(CAST(:vehicle_id AS text)))
+                    FROM (
+                        SELECT
+                            current_setting('lock_timeout') AS previous,
+                            set_config('lock_timeout', :timeout, true)
+                    ) AS timeout
+                ) AS locked
+                """
+            ),
+            {
+                "lock_class": VEHICLE_WRITE_LOCK_CLASS,
+                "vehicle_id": str(vehicle_id),
+                "timeout": f"{settings.vehicle_write_lock_timeout_ms if timeout_ms is None else timeout_ms}ms",
+            },
+        )
+    except DBAPIError as exc:
+        if getattr(exc.orig, "sqlstate", None) != LOCK_NOT_AVAILABLE:
+            raise
+        db.rollback()
+        metrics.inc("vehicle_write_lock_timeouts_total", unit=name)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Transaction conflict, please retry.",
+        ) from exc
+    finally:
+        metrics.observe("vehicle_write_lock_wait_seconds", time.perf_counter() - started, unit=name)
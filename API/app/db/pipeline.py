@@ -0,0 +1,69 @@
+"""
+Batching independent statements through psycopg pipeline mode.
+
+A route that needs several results which do not depend on each other (an
+access check, a scalar, a set-returning function, ...) would normally pay one
+network round trip per ``db.execute``. ``execute_pipelined`` sends all of
+them at once on the session's connection and waits for the results together,
+so the whole batch costs about one round trip.
+
+The statements run in the session's current transaction, in order. If one of
+them fails, the later ones are skipped and the error is raised as the same
+SQLAlchemy exception (``IntegrityError``, ``DataError``, ``DBAPIError``, ...)
+that ``db.execute`` would raise, so routes keep their error handling.
+
+Only read-only statements belong in a pipeline. Nothing looks at a result
+until the whole batch has run, so a write next to an access check would run
+(and could fail with its own error) for a caller without access. Run the
+check first, or build it into the write statement.
+"""
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+from typing import Any
+
+import psycopg
+from psycopg.rows import dict_row
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import TextClause
+
+from app.db.session import count_queries
+
+Statement = tuple[str | TextClause, Mapping[str, Any]]
+
+
+def execute_pipelined(db: Session, statements: Sequence[Statement]) -> list[list[dict[str, Any]]]:
+    """
+    Run ``statements`` in one pipeline; returns the rows (as dicts) of each
+    statement, in the same order. Statements without a result set give ``[]``.
+    """
+    dialect = db.get_bind().dialect
+    compiled = []
+    for statement, params in statements:
+        clause = text(statement) if isinstance(statement, str) else statement
+        query = clause.compile(dialect=dialect)
+        compiled.append((query.string, query.construct_params(dict(params))))
+
+    conn = db.connection().connection.driver_connection
+    count_queries(db, len(compiled))
+    cursors = []
+    try:
+        with conn.pipeline():
+            for sql, params in compiled:
+                cursor = conn.cursor(row_factory=dict_row)
+                cursor.execute(sql, params)
+                cursors.append(cursor)
+        return [cursor.fetchall() if cursor.description is not None else [] for cursor in cursors]
+    except psycopg.Error as exc:
+        raise DBAPIError.instance(
+            ";\n".join(sql for sql, _ in compiled),
+            [params for _, params in compiled],
+            exc,
+            psycopg.Error,
+            dialect=dialect,
+        ) from exc
+    finally:
+        for cursor in cursors:
+            cursor.close()
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import threading
+import time
+from uuid import UUID
+
+from app.config import settings
+
+
+class WriteStickiness:
+    """
+    Per-process record of users who wrote recently.
+
+    For ``window_seconds`` after a write the user's reads stay on the primary,
+    so a client that re-fetches right after a change sees it even when the
+    replica lags behind.
+    """
+
+    def __init__(self, window_seconds: float) -> None:
+        self.window_seconds = window_seconds
+        self._until: dict[UUID, float] = {}
+        self._lock = threading.Lock()
+
+    def mark(self, user_id: UUID) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._until[user_id] = now + self.window_seconds
+            if len(self._until) > 10000:
+                # drop expired entries so the map stays bounded by active writers
+                self._until = {k: v for k, v in self._until.items() if v > now}
+
+    def is_sticky(self, user_id: UUID) -> bool:
+        with self._lock:
+            until = self._until.get(user_id)
+        return until is not None and until > time.monotonic()
+
+
+write_stickiness = WriteStickiness(settings.db_replica_sticky_seconds)
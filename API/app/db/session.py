@@ -1,19 +1,136 @@
-from sqlalchemy import create_engine
+import time
+
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
+from app.core.metrics import metrics
 
 DATABASE_URL = (
     f"postgresql+psycopg://{settings.db_user}:{settings.db_password}"
     f"@{settings.db_host}:{settings.db_port}/{settings.db_name}"
 )
 
+# Domyślny limit czasu zapytań ustawiany przy połączeniu (bez dodatkowego
+# round tripu); trasy z innym limitem nadpisują go w transakcji (app.core.deadlines)
+CONNECT_ARGS = {"options": f"-c statement_timeout={settings.db_statement_timeout_ms}"}
+
 engine = create_engine(
     DATABASE_URL,
     pool_pre_ping=True,  
+    connect_args=CONNECT_ARGS,
 )
 
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
     bind=engine,
-)
\ No newline at end of file
+)
+
+# Replika tylko do odczytu; bez DB_REPLICA_HOST odczyty idą na główny serwer
+if settings.db_replica_host:
+    REPLICA_DATABASE_URL = (
+        f"postgresql+psycopg://{settings.db_user}:{settings.db_password}"
+        f"@{settings.db_replica_host}:{settings.db_replica_port or settings.db_port}/{settings.db_name}"
+    )
+    replica_engine = create_engine(
+        REPLICA_DATABASE_URL,
+        pool_pre_ping=True,
+        connect_args=CONNECT_ARGS,
+    )
+else:
+    replica_engine = None
+
+ReplicaSessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=replica_engine or engine,
+)
+
+
+# Zajętość puli: ile połączeń jest wypożyczonych teraz i jak długo sesje je trzymają
+metrics.histogram(
+    "db_connection_hold_seconds",
+    "Time a pooled connection stays checked out by a session",
+    (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 30),
+)
+metrics.gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out of the pool",
+    lambda: {
+        (("engine", name),): pool_engine.pool.checkedout()
+        for name, pool_engine in (("primary", engine), ("replica", replica_engine))
+        if pool_engine is not None
+    },
+)
+
+
+def _track_pool(pool_engine, name: str) -> None:
+    @event.listens_for(pool_engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+
+    @event.listens_for(pool_engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        started = connection_record.info.pop("checked_out_at", None)
+        if started is not None:
+            metrics.observe("db_connection_hold_seconds", time.perf_counter() - started, engine=name)
+
+
+_track_pool(engine, "primary")
+if replica_engine is not None:
+    _track_pool(replica_engine, "replica")
+
+# Liczba zapytań sesji (obserwowana per trasa przy zamknięciu sesji w get_db)
+metrics.histogram(
+    "db_queries_per_request",
+    "SQL statements sent by a request's session",
+    (1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 50),
+)
+
+
+def count_queries(session, count: int = 1) -> None:
+    session.info["query_count"] = session.info.get("query_count", 0) + count
+
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+@event.listens_for(ReplicaSessionLocal, "do_orm_execute")
+def _count_query(orm_execute_state):
+    count_queries(orm_execute_state.session)
+
+
+@event.listens_for(SessionLocal, "after_begin")
+@event.listens_for(ReplicaSessionLocal, "after_begin")
+def _set_transaction_context(session, transaction, connection):
+    """
+    Ustawia na początku każdej transakcji sesji:
+    - kontekst RLS (użytkownik + rola car_app_rls), gdy get_db zapisał
+      session.info["rls_user_id"],
+    - statement_timeout trasy, gdy get_db zapisał session.info["statement_timeout_ms"],
+    - idle_in_transaction_session_timeout, gdy sesja ma
+      session.info["idle_in_transaction_timeout_ms"] (odpowiedzi strumieniowane).
+    Ustawienia są lokalne dla transakcji, więc nie przechodzą do puli
+    połączeń; po commit/rollback są nakładane ponownie. Wszystko idzie
+    jednym zapytaniem.
+    """
+    configs = {}
+    user_id = session.info.get("rls_user_id")
+    if user_id is not None:
+        configs["app.current_user_id"] = str(user_id)
+        configs["role"] = settings.db_rls_role
+    timeout_ms = session.info.get("statement_timeout_ms")
+    if timeout_ms is not None:
+        configs["statement_timeout"] = f"{timeout_ms}ms"
+    idle_ms = session.info.get("idle_in_transaction_timeout_ms")
+    if idle_ms is not None:
+        configs["idle_in_transaction_session_timeout"] = f"{idle_ms}ms"
+    if not configs:
+        return
+
+    params = {}
+    calls = []
+    for i, (name, value) in enumerate(configs.items()):
+        calls.append(f"set_config(:name_{i}, :value_{i}, true)")
+        params[f"name_{i}"] = name
+        params[f"value_{i}"] = value
+    connection.execute(text("SELECT " + ", ".join(calls)), params)
+    count_queries(session)
@@ -0,0 +1,83 @@
+"""
+Transactional units with server-side retry of transient conflicts.
+
+A write that fails with a serialization failure (40001) or a deadlock (40P01)
+can succeed when the whole transaction is run again. ``run_transaction`` runs
+``work`` and commits; on such a failure it rolls back, waits a jittered,
+exponentially growing delay and runs ``work`` again, within a bounded number
+of attempts and a total time budget. Only when the budget is spent does the
+client get ``409 Transaction conflict, please retry.``
+
+``work`` must contain every statement of the transaction, since everything
+before the failure is rolled back. Routes that claim an Idempotency-Key pass
+``on_retry=idem.reclaim`` so the claim is taken again before the next attempt.
+"""
+from __future__ import annotations
+
+import random
+import time
+from typing import Callable, TypeVar
+
+from fastapi import HTTPException, status
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.metrics import metrics
+
+T = TypeVar("T")
+
+RETRYABLE_PGCODES = frozenset({"40001", "40P01"})
+
+metrics.counter("db_transaction_retries_total", "Transactions retried after a serialization failure or deadlock")
+metrics.counter("db_transaction_conflicts_total", "Transactions that ran out of retries and returned 409")
+
+
+def _sqlstate(exc: BaseException) -> str | None:
+    # psycopg 3 exposes the SQLSTATE as ``sqlstate`` (``pgcode`` in psycopg2)
+    orig = getattr(exc, "orig", None)
+    return getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+
+
+def is_retryable(exc: BaseException) -> bool:
+    return _sqlstate(exc) in RETRYABLE_PGCODES
+
+
+def run_transaction(
+    db: Session,
+    work: Callable[[], T],
+    *,
+    name: str,
+    on_retry: Callable[[], object] | None = None,
+) -> T:
+    """Run ``work`` and commit, retrying serialization failures and deadlocks."""
+    base_delay = settings.tx_retry_base_delay_ms / 1000
+    max_delay = settings.tx_retry_max_delay_ms / 1000
+    deadline = time.monotonic() + settings.tx_retry_budget_ms / 1000
+    attempt = 1
+
+    while True:
+        try:
+            result = work()
+            db.commit()
+            return result
+        except DBAPIError as exc:
+            db.rollback()
+            if not is_retryable(exc):
+                raise
+
+            # full jitter: spreads out the retries of transactions that collided
+            delay = random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+            pgcode = _sqlstate(exc)
+            if attempt >= settings.tx_retry_max_attempts or time.monotonic() + delay > deadline:
+                metrics.inc("db_transaction_conflicts_total", unit=name, pgcode=pgcode)
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Transaction conflict, please retry.",
+                ) from exc
+
+            metrics.inc("db_transaction_retries_total", unit=name, pgcode=pgcode)
+            time.sleep(delay)
+            attempt += 1
+            if on_retry is not None:
+                on_retry()
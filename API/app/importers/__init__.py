@@ -0,0 +1,31 @@
+from .base import (
+    ExpenseRecord,
+    FuelingRecord,
+    ImportRecord,
+    Importer,
+    OdometerRecord,
+    ServiceRecord,
+    SkippedRow,
+)
+from .acar import ACarImporter
+from .drivvo import DrivvoImporter
+from .fuelio import FuelioImporter
+
+IMPORTERS: dict[str, type[Importer]] = {
+    importer.source: importer
+    for importer in (FuelioImporter, ACarImporter, DrivvoImporter)
+}
+
+__all__ = [
+    "IMPORTERS",
+    "Importer",
+    "ImportRecord",
+    "FuelingRecord",
+    "ServiceRecord",
+    "ExpenseRecord",
+    "OdometerRecord",
+    "SkippedRow",
+    "FuelioImporter",
+    "ACarImporter",
+    "DrivvoImporter",
+]
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from typing import Iterator
+
+from .base import (
+    ExpenseRecord,
+    FuelingRecord,
+    ImportRecord,
+    Importer,
+    OdometerRecord,
+    ServiceRecord,
+    expense_category,
+    fuel_from_name,
+    parse_bool,
+    parse_decimal,
+    parse_odometer,
+    pick,
+    require_positive,
+    service_type,
+    unit_price,
+)
+
+
+class ACarImporter(Importer):
+    """
+    aCar "Records" CSV export: one row per event, ``Entry Type`` tells
+    fill-ups, services and expenses apart (trips are skipped). Service and
+    expense names are comma-separated lists in the ``Services`` / ``Expenses``
+    columns.
+    """
+
+    source = "acar"
+    date_formats = (
+        "%m/%d/%Y %I:%M %p",
+        "%m/%d/%Y %H:%M",
+        "%m/%d/%Y",
+        "%Y-%m-%d %H:%M:%S",
+        "%Y-%m-%d %H:%M",
+        "%Y-%m-%d",
+    )
+
+    def convert(self, section: str, row: dict[str, str]) -> Iterator[ImportRecord]:
+        entry_type = (pick(row, "entry type", "type") or "").lower()
+        when = " ".join(part for part in (pick(row, "date"), pick(row, "time")) if part)
+        odometer = parse_odometer(pick(row, "odometer reading", "odometer"))
+        total = parse_decimal(pick(row, "total cost", "fill up total cost", "service total cost", "expense total cost"))
+        note = pick(row, "notes")
+
+        if entry_type.startswith("fill"):
+            volume = require_positive(parse_decimal(pick(row, "fuel volume", "volume")), "volume")
+            price = parse_decimal(pick(row, "price per unit", "fuel price"))
+            if not price:
+                price = unit_price(require_positive(total, "total cost"), volume)
+            yield FuelingRecord(
+                filled_at=self.parse_datetime(when),
+                odometer_km=require_positive(odometer, "odometer"),
+                volume=volume,
+                price_per_unit=require_positive(price, "price per unit"),
+                full_tank=not parse_bool(pick(row, "partial fill up", "partial")),
+                fuel=fuel_from_name(pick(row, "fuel type", "fuel grade")) or self.default_fuel,
+                note=note,
+            )
+        elif entry_type.startswith("service"):
+            services = pick(row, "services")
+            yield ServiceRecord(
+                service_date=self.parse_date(when),
+                service_type=service_type(services, note),
+                total_cost=require_positive(total, "total cost"),
+                odometer_km=odometer or None,
+                note=" - ".join(part for part in (services, note) if part) or None,
+            )
+        elif entry_type.startswith("expense"):
+            expenses = pick(row, "expenses")
+            entry_date = self.parse_datetime(when)
+            yield ExpenseRecord(
+                expense_date=entry_date.date(),
+                category=expense_category(expenses),
+                amount=require_positive(total, "total cost"),
+                note=" - ".join(part for part in (expenses, note) if part) or None,
+            )
+            if odometer:
+                yield OdometerRecord(entry_date=entry_date, value_km=odometer, note=expenses)
@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import csv
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import ClassVar, Iterable, Iterator, TextIO
+
+
+@dataclass(frozen=True, slots=True)
+class FuelingRecord:
+    filled_at: datetime
+    odometer_km: Decimal
+    volume: Decimal
+    price_per_unit: Decimal
+    full_tank: bool
+    fuel: str | None
+    note: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class ServiceRecord:
+    service_date: date
+    service_type: str
+    total_cost: Decimal
+    odometer_km: Decimal | None = None
+    note: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class ExpenseRecord:
+    expense_date: date
+    category: str
+    amount: Decimal
+    note: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class OdometerRecord:
+    entry_date: datetime
+    value_km: Decimal
+    note: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class SkippedRow:
+    line: int
+    message: str
+
+
+ImportRecord = FuelingRecord | ServiceRecord | ExpenseRecord | OdometerRecord
+
+
+class Importer:
+    """
+    Streaming parser of one third-party backup format.
+
+    Backups are CSV files split into sections by marker rows (``## Log``,
+    ``#Refuelling`` ...), each section with its own header row. ``parse``
+    reads the stream row by row and yields records (or ``SkippedRow`` for rows
+    that cannot be mapped), so memory use does not depend on the file size.
+    Subclasses set ``source`` and implement ``convert``; formats without
+    sections are read as one section named ``""``.
+    """
+
+    source: ClassVar[str]
+    delimiter: ClassVar[str] = ","
+    date_formats: ClassVar[tuple[str, ...]] = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d")
+
+    def __init__(self, default_fuel: str | None = None) -> None:
+        self.default_fuel = default_fuel
+
+    def section_name(self, values: list[str]) -> str | None:
+        """Return the normalized section name if the row is a section marker."""
+        cells = [value.strip() for value in values if value.strip()]
+        if len(cells) != 1 or not cells[0].startswith("#"):
+            return None
+        return cells[0].lstrip("#").strip().lower()
+
+    def convert(self, section: str, row: dict[str, str]) -> Iterable[ImportRecord]:
+        raise NotImplementedError
+
+    def parse(self, stream: TextIO) -> Iterator[ImportRecord | SkippedRow]:
+        section = ""
+        header: list[str] | None = None
+        reader = csv.reader(stream, delimiter=self.delimiter)
+
+        for values in reader:
+            if not any(value.strip() for value in values):
+                continue
+
+            name = self.section_name(values)
+            if name is not None:
+                section, header = name, None
+                continue
+
+            if header is None:
+                header = [normalize_header(value) for value in values]
+                continue
+
+            row = {key: value.strip() for key, value in zip(header, values)}
+            try:
+                yield from self.convert(section, row)
+            except (ValueError, KeyError) as exc:
+                yield SkippedRow(line=reader.line_num, message=f"{section or 'row'}: {exc}")
+
+    # Helpers shared by the format modules
+
+    def parse_datetime(self, value: str | None) -> datetime:
+        if not value:
+            raise ValueError("missing date")
+        value = value.strip()
+        for fmt in self.date_formats:
+            try:
+                parsed = datetime.strptime(value, fmt)
+            except ValueError:
+                continue
+            return parsed.replace(tzinfo=timezone.utc) if parsed.tzinfo is None else parsed
+        raise ValueError(f"unrecognized date {value!r}")
+
+    def parse_date(self, value: str | None) -> date:
+        return self.parse_datetime(value).date()
+
+
+def normalize_header(value: str) -> str:
+    """``"Odo (km)"`` -> ``"odo"``; ``"Full tank?"`` -> ``"full tank"``."""
+    value = re.sub(r"\(.*?\)", "", value.lstrip("\ufeff"))
+    return re.sub(r"[^a-z0-9]+", " ", value.lower()).strip()
+
+
+def pick(row: dict[str, str], *names: str) -> str | None:
+    """First non-empty value among the (normalized) column names."""
+    for name in names:
+        value = row.get(name)
+        if value:
+            return value
+    return None
+
+
+_NUMBER_JUNK = re.compile(r"[^\d,.\-]")
+
+
+def parse_decimal(value: str | None) -> Decimal | None:
+    """Parse ``1 234,56`` / ``1,234.56`` / ``1234.56 zł``; empty -> None."""
+    if value is None:
+        return None
+    value = _NUMBER_JUNK.sub("", value)
+    if not value:
+        return None
+
+    if "," in value and "." in value:
+        # The separator appearing last is the decimal one.
+        thousands = "," if value.rfind(".") > value.rfind(",") else "."
+        value = value.replace(thousands, "")
+    value = value.replace(",", ".")
+
+    try:
+        return Decimal(value)
+    except InvalidOperation as exc:
+        raise ValueError(f"invalid number {value!r}") from exc
+
+
+def parse_odometer(value: str | None) -> Decimal | None:
+    """Like ``parse_decimal``, but ``12,345`` is a grouped integer (odometers have at most one decimal)."""
+    if value and re.fullmatch(r"\s*\d{1,3}([,.]\d{3})+\s*", value):
+        value = re.sub(r"[,.]", "", value)
+    return parse_decimal(value)
+
+
+def require_positive(value: Decimal | None, name: str) -> Decimal:
+    if value is None or value <= 0:
+        raise ValueError(f"{name} must be greater than 0")
+    return value
+
+
+def parse_bool(value: str | None) -> bool:
+    return (value or "").strip().lower() in ("1", "true", "yes", "y", "t", "tak")
+
+
+def unit_price(total: Decimal, volume: Decimal) -> Decimal:
+    return (total / volume).quantize(Decimal("0.001"), rounding=ROUND_HALF_UP)
+
+
+def fuel_from_name(name: str | None) -> str | None:
+    """Map a fuel name (``Premium``, ``Diesel``, ``Autogas`` ...) onto car_app.fuel_type."""
+    name = (name or "").lower()
+    if "diesel" in name:
+        return "Diesel"
+    if "lpg" in name or "autogas" in name:
+        return "LPG"
+    if "cng" in name:
+        return "CNG"
+    if "electric" in name or "kwh" in name:
+        return "EV"
+    if "hydrogen" in name:
+        return "H2"
+    if name:
+        return "Petrol"
+    return None
+
+
+_EXPENSE_KEYWORDS = (
+    ("INSURANCE", ("insurance", "ubezpiecz")),
+    ("TAX", ("tax", "registration", "podatek", "rejestrac")),
+    ("TOLLS", ("toll", "motorway", "vignette", "autostrad", "winiet")),
+    ("PARKING", ("parking",)),
+    ("WASH", ("wash", "myjnia", "cleaning")),
+    ("ACCESSORIES", ("accessor", "tuning", "akcesor")),
+    ("FUEL", ("fuel", "paliwo", "charging")),
+)
+
+_SERVICE_KEYWORDS = (
+    ("OIL_CHANGE", ("oil", "olej")),
+    ("FILTERS", ("filter", "filtr")),
+    ("BRAKES", ("brake", "hamul")),
+    ("TIRES", ("tire", "tyre", "opon", "wheel")),
+    ("BATTERY", ("battery", "akumulator")),
+    ("INSPECTION", ("inspection", "przegląd", "przeglad")),
+    ("TRANSMISSION", ("transmission", "gearbox", "clutch", "skrzyni", "sprzęg")),
+    ("SUSPENSION", ("suspension", "shock", "zawiesz", "amortyz")),
+    ("ENGINE", ("engine", "timing", "spark", "silnik", "rozrząd")),
+)
+
+SERVICE_WORDS = ("service", "maintenance", "repair", "serwis", "naprawa", "warsztat")
+
+
+def expense_category(*texts: str | None) -> str:
+    """Map free-text category names onto car_app.expense_category."""
+    haystack = " ".join(t for t in texts if t).lower()
+    for category, keywords in _EXPENSE_KEYWORDS:
+        if any(keyword in haystack for keyword in keywords):
+            return category
+    return "OTHER"
+
+
+def service_type(*texts: str | None) -> str:
+    """Map free-text service descriptions onto car_app.service_type."""
+    haystack = " ".join(t for t in texts if t).lower()
+    for kind, keywords in _SERVICE_KEYWORDS:
+        if any(keyword in haystack for keyword in keywords):
+            return kind
+    return "OTHER"
+
+
+def is_service(*texts: str | None) -> bool:
+    haystack = " ".join(t for t in texts if t).lower()
+    return any(word in haystack for word in SERVICE_WORDS)
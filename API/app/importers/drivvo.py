@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from typing import Iterator
+
+from .base import (
+    ExpenseRecord,
+    FuelingRecord,
+    ImportRecord,
+    Importer,
+    OdometerRecord,
+    ServiceRecord,
+    expense_category,
+    fuel_from_name,
+    parse_bool,
+    parse_decimal,
+    parse_odometer,
+    pick,
+    require_positive,
+    service_type,
+    unit_price,
+)
+
+_REFUELLING = ("refuelling", "refueling", "abastecimento")
+_SERVICE = ("service", "servico", "serviço")
+_EXPENSE = ("expense", "despesa")
+
+
+class DrivvoImporter(Importer):
+    """
+    Drivvo CSV export with ``#Refuelling``, ``#Service`` and ``#Expense``
+    sections (other sections, e.g. income or routes, are skipped). Dates are
+    day-first.
+    """
+
+    source = "drivvo"
+    date_formats = (
+        "%Y-%m-%d %H:%M:%S",
+        "%Y-%m-%d %H:%M",
+        "%Y-%m-%d",
+        "%d/%m/%Y %H:%M:%S",
+        "%d/%m/%Y %H:%M",
+        "%d/%m/%Y",
+    )
+
+    def convert(self, section: str, row: dict[str, str]) -> Iterator[ImportRecord]:
+        odometer = parse_odometer(pick(row, "odometer"))
+        total = parse_decimal(pick(row, "total cost", "total", "value"))
+        note = pick(row, "notes", "note", "observation")
+
+        if section.startswith(_REFUELLING):
+            volume = require_positive(parse_decimal(pick(row, "liters", "litres", "volume", "quantity")), "volume")
+            price = parse_decimal(pick(row, "price", "price per unit", "unit price"))
+            if not price:
+                price = unit_price(require_positive(total, "total cost"), volume)
+            yield FuelingRecord(
+                filled_at=self.parse_datetime(pick(row, "date")),
+                odometer_km=require_positive(odometer, "odometer"),
+                volume=volume,
+                price_per_unit=require_positive(price, "price per unit"),
+                full_tank=parse_bool(pick(row, "full tank", "tank full")),
+                fuel=fuel_from_name(pick(row, "fuel")) or self.default_fuel,
+                note=note,
+            )
+        elif section.startswith(_SERVICE):
+            kind = pick(row, "type of service", "service type", "service")
+            yield ServiceRecord(
+                service_date=self.parse_date(pick(row, "date")),
+                service_type=service_type(kind, note),
+                total_cost=require_positive(total, "total cost"),
+                odometer_km=odometer or None,
+                note=" - ".join(part for part in (kind, note) if part) or None,
+            )
+        elif section.startswith(_EXPENSE):
+            kind = pick(row, "type of expense", "expense type", "expense")
+            entry_date = self.parse_datetime(pick(row, "date"))
+            yield ExpenseRecord(
+                expense_date=entry_date.date(),
+                category=expense_category(kind, note),
+                amount=require_positive(total, "total cost"),
+                note=" - ".join(part for part in (kind, note) if part) or None,
+            )
+            if odometer:
+                yield OdometerRecord(entry_date=entry_date, value_km=odometer, note=kind)
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from typing import Iterator
+
+from .base import (
+    ExpenseRecord,
+    FuelingRecord,
+    ImportRecord,
+    Importer,
+    OdometerRecord,
+    ServiceRecord,
+    expense_category,
+    is_service,
+    parse_bool,
+    parse_decimal,
+    parse_odometer,
+    pick,
+    require_positive,
+    service_type,
+    unit_price,
+)
+
+# Fuelio fuel type ids are grouped by hundreds (110 = Petrol 95, 210 = Diesel ...).
+_FUEL_FAMILIES = {
+    1: "Petrol",
+    2: "Diesel",
+    3: "Petrol",  # ethanol blends
+    4: "LPG",
+    5: "CNG",
+    6: "EV",
+}
+
+
+class FuelioImporter(Importer):
+    """
+    Fuelio CSV backup (``vehicle-<n>-sync.csv``).
+
+    Sections: ``## Log`` (fill-ups), ``## CostCategories`` and ``## Costs``
+    (other costs, mapped to services or expenses by category name). Costs
+    flagged as templates or income are skipped.
+    """
+
+    source = "fuelio"
+
+    def __init__(self, default_fuel: str | None = None) -> None:
+        super().__init__(default_fuel)
+        self.categories: dict[str, str] = {}
+
+    def convert(self, section: str, row: dict[str, str]) -> Iterator[ImportRecord]:
+        if section == "log":
+            yield self._fueling(row)
+        elif section == "costcategories":
+            category_id = pick(row, "costtypeid", "id")
+            if category_id:
+                self.categories[category_id] = pick(row, "name") or ""
+        elif section == "costs":
+            yield from self._cost(row)
+
+    def _fuel(self, code: str | None) -> str | None:
+        if code and code.isdigit():
+            family = _FUEL_FAMILIES.get(int(code) // 100)
+            if family is not None:
+                return family
+        return self.default_fuel
+
+    def _fueling(self, row: dict[str, str]) -> FuelingRecord:
+        volume = require_positive(parse_decimal(pick(row, "fuel")), "volume")
+        price = parse_decimal(pick(row, "volumeprice"))
+        if not price:
+            price = unit_price(require_positive(parse_decimal(pick(row, "price")), "price"), volume)
+
+        return FuelingRecord(
+            filled_at=self.parse_datetime(pick(row, "data", "date")),
+            odometer_km=require_positive(parse_odometer(pick(row, "odo")), "odometer"),
+            volume=volume,
+            price_per_unit=require_positive(price, "price per unit"),
+            full_tank=parse_bool(pick(row, "full")),
+            fuel=self._fuel(pick(row, "fueltype")),
+            note=pick(row, "notes"),
+        )
+
+    def _cost(self, row: dict[str, str]) -> Iterator[ImportRecord]:
+        if parse_bool(pick(row, "istemplate")) or parse_bool(pick(row, "isincome")):
+            return
+
+        title = pick(row, "costtitle", "title")
+        notes = pick(row, "notes")
+        category = self.categories.get(pick(row, "costtypeid") or "", "")
+        cost_date = self.parse_datetime(pick(row, "date"))
+        cost = require_positive(parse_decimal(pick(row, "cost")), "cost")
+        odometer = parse_odometer(pick(row, "odo"))
+        note = " - ".join(part for part in (title, notes) if part) or None
+
+        if is_service(category, title):
+            yield ServiceRecord(
+                service_date=cost_date.date(),
+                service_type=service_type(title, notes),
+                total_cost=cost,
+                odometer_km=odometer or None,
+                note=note,
+            )
+            return
+
+        yield ExpenseRecord(
+            expense_date=cost_date.date(),
+            category=expense_category(category, title),
+            amount=cost,
+            note=note,
+        )
+        if odometer:
+            yield OdometerRecord(entry_date=cost_date, value_km=odometer, note=note)
@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import logging
+import os
+import zipfile
+from contextlib import contextmanager
+from dataclasses import asdict
+from typing import BinaryIO, Iterator, TextIO
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import DBAPIError
+
+from app.config import settings
+from app.db.locks import lock_vehicle_writes
+from app.db.session import SessionLocal
+from . import IMPORTERS
+from .base import ExpenseRecord, FuelingRecord, ImportRecord, OdometerRecord, ServiceRecord, SkippedRow
+
+logger = logging.getLogger(__name__)
+
+MAX_JOB_ERRORS = 100
+
+# Record type -> (INSERT statement, import_jobs counter column).
+# Inserts go through the tables directly (ownership is checked once when the
+# job is created), so trg_fueling_to_expense / trg_service_to_expense still
+# create the matching FUEL / SERVICE expenses.
+_TARGETS: dict[type, tuple[str, str]] = {
+    FuelingRecord: (
+        """
+        INSERT INTO car_app.fuelings (
+            id, vehicle_id, user_id, filled_at, price_per_unit, volume, odometer_km,
+            full_tank, fuel, note, created_at
+        )
+        VALUES (
+            gen_random_uuid(), :vehicle_id, :user_id, :filled_at, :price_per_unit, :volume, :odometer_km,
+            :full_tank, CAST(:fuel AS car_app.fuel_type), :note, now()
+        )
+        """,
+        "fuelings_imported",
+    ),
+    ServiceRecord: (
+        """
+        INSERT INTO car_app.services (
+            id, vehicle_id, user_id, service_date, service_type, odometer_km, total_cost, note, created_at
+        )
+        VALUES (
+            gen_random_uuid(), :vehicle_id, :user_id, :service_date, CAST(:service_type AS car_app.service_type),
+            :odometer_km, :total_cost, :note, now()
+        )
+        """,
+        "services_imported",
+    ),
+    ExpenseRecord: (
+        """
+        INSERT INTO car_app.expenses (id, vehicle_id, user_id, expense_date, category, amount, note, created_at)
+        VALUES (
+            gen_random_uuid(), :vehicle_id, :user_id, :expense_date, CAST(:category AS car_app.expense_category),
+            :amount, :note, now()
+        )
+        """,
+        "expenses_imported",
+    ),
+    OdometerRecord: (
+        """
+        INSERT INTO car_app.odometer_entries (id, vehicle_id, entry_date, value_km, note)
+        VALUES (gen_random_uuid(), :vehicle_id, :entry_date, :value_km, :note)
+        """,
+        "odometer_entries_imported",
+    ),
+}
+
+
+class _JobWriter:
+    """Buffers parsed records and writes them in batches, one transaction per batch."""
+
+    def __init__(self, db: Session, job_id: UUID, user_id: UUID, vehicle_id: UUID) -> None:
+        self.db = db
+        self.job_id = job_id
+        self.owner = {"user_id": user_id, "vehicle_id": vehicle_id}
+        self.pending: dict[type, list[dict]] = {kind: [] for kind in _TARGETS}
+        self.pending_count = 0
+        self.counts = {column: 0 for _, column in _TARGETS.values()}
+        self.processed_rows = 0
+        self.skipped_rows = 0
+        self.errors: list[dict] = []
+
+    def add(self, record: ImportRecord) -> None:
+        self.pending[type(record)].append({**asdict(record), **self.owner})
+        self.pending_count += 1
+        self.processed_rows += 1
+
+    def skip(self, line: int | None, message: str) -> None:
+        self.skipped_rows += 1
+        if len(self.errors) < MAX_JOB_ERRORS:
+            self.errors.append({"line": line, "message": message})
+
+    def skip_row(self, row: SkippedRow) -> None:
+        self.processed_rows += 1
+        self.skip(row.line, row.message)
+
+    @property
+    def full(self) -> bool:
+        return self.pending_count >= settings.import_batch_size
+
+    def _insert_rows_one_by_one(self, kind: type, rows: list[dict]) -> None:
+        sql, column = _TARGETS[kind]
+        for row in rows:
+            try:
+                with self.db.begin_nested():
+                    self.db.execute(text(sql), row)
+            except DBAPIError as exc:
+                diag = getattr(getattr(exc, "orig", None), "diag", None)
+                reason = getattr(diag, "message_primary", None) or "rejected by the database"
+                self.skip(None, f"{kind.__name__.removesuffix('Record').lower()} from {_record_date(row)}: {reason}")
+            else:
+                self.counts[column] += 1
+
+    def _adds_odometer_readings(self) -> bool:
+        return bool(
+            self.pending[FuelingRecord]
+            or self.pending[OdometerRecord]
+            or any(row["odometer_km"] is not None for row in self.pending[ServiceRecord])
+        )
+
+    def flush(self, processed_bytes: int) -> None:
+        if self._adds_odometer_readings():
+            # Serialized with the REST/sync writers like they are with each
+            # other; a background job waits rather than failing the import.
+            lock_vehicle_writes(self.db, self.owner["vehicle_id"], name="import_job", timeout_ms=0)
+        for kind, rows in self.pending.items():
+            if not rows:
+                continue
+            sql, column = _TARGETS[kind]
+            try:
+                with self.db.begin_nested():
+                    self.db.execute(text(sql), rows)
+            except DBAPIError:
+                # Find the offending rows; the rest of the batch is still imported.
+                self._insert_rows_one_by_one(kind, rows)
+            else:
+                self.counts[column] += len(rows)
+            rows.clear()
+        self.pending_count = 0
+
+        self.db.execute(
+            text(
+                f"""
+                UPDATE car_app.import_jobs
+                SET processed_bytes = :processed_bytes,
+                    processed_rows = :processed_rows,
+                    skipped_rows = :skipped_rows,
+                    errors = CAST(:errors AS jsonb),
+                    {", ".join(f"{column} = :{column}" for column in self.counts)},
+                    updated_at = now()
+                WHERE id = :job_id
+                """
+            ),
+            {
+                "job_id": self.job_id,
+                "processed_bytes": processed_bytes,
+                "processed_rows": self.processed_rows,
+                "skipped_rows": self.skipped_rows,
+                "errors": json.dumps(self.errors),
+                **self.counts,
+            },
+        )
+        self.db.commit()
+
+
+def _record_date(row: dict) -> str:
+    for key in ("filled_at", "service_date", "expense_date", "entry_date"):
+        if key in row:
+            return row[key].isoformat()
+    return "?"
+
+
+@contextmanager
+def open_backup(path: str) -> Iterator[tuple[TextIO, BinaryIO, int]]:
+    """
+    Open an uploaded backup as a text stream without loading it into memory.
+
+    Zipped backups are read from their first CSV member. Yields the text
+    stream, the underlying binary stream (its ``tell()`` is the progress) and
+    the total size in bytes.
+    """
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            member = next(
+                (info for info in archive.infolist() if info.filename.lower().endswith(".csv")),
+                None,
+            )
+            if member is None:
+                raise ValueError("The archive contains no CSV file.")
+            with archive.open(member) as raw:
+                yield io.TextIOWrapper(raw, encoding="utf-8-sig", errors="replace", newline=""), raw, member.file_size
+        return
+
+    with open(path, "rb") as raw:
+        yield io.TextIOWrapper(raw, encoding="utf-8-sig", errors="replace", newline=""), raw, os.path.getsize(path)
+
+
+def _finish(db: Session, job_id: UUID, status: str, error: str | None = None) -> None:
+    db.execute(
+        text(
+            """
+            UPDATE car_app.import_jobs
+            SET status = :status,
+                error = :error,
+                finished_at = now(),
+                updated_at = now()
+            WHERE id = :job_id
+            """
+        ),
+        {"job_id": job_id, "status": status, "error": error},
+    )
+    db.commit()
+
+
+def run_import_job(job_id: UUID, path: str) -> None:
+    """
+    Background task: parse the uploaded file and insert its records.
+
+    Runs in its own session (the request's session is closed by then) and
+    removes the uploaded file when done. Progress is committed after every
+    batch, so GET /import-jobs/{id} can be polled while the job runs.
+    """
+    db = SessionLocal()
+    try:
+        job = db.execute(
+            text(
+                """
+                UPDATE car_app.import_jobs
+                SET status = 'RUNNING',
+                    started_at = now(),
+                    updated_at = now()
+                WHERE id = :job_id
+                  AND status = 'PENDING'
+                RETURNING user_id, vehicle_id, source
+                """
+            ),
+            {"job_id": job_id},
+        ).mappings().first()
+        db.commit()
+        if job is None:
+            return
+
+        default_fuel = db.execute(
+            text("SELECT fuel::text FROM car_app.fn_get_vehicle_fuels(:user_id, :vehicle_id) LIMIT 1"),
+            {"user_id": job["user_id"], "vehicle_id": job["vehicle_id"]},
+        ).scalar()
+        importer = IMPORTERS[job["source"]](default_fuel=default_fuel)
+        writer = _JobWriter(db, job_id, job["user_id"], job["vehicle_id"])
+
+        with open_backup(path) as (stream, raw, total_bytes):
+            db.execute(
+                text("UPDATE car_app.import_jobs SET total_bytes = :total_bytes WHERE id = :job_id"),
+                {"job_id": job_id, "total_bytes": total_bytes},
+            )
+            for item in importer.parse(stream):
+                if isinstance(item, SkippedRow):
+                    writer.skip_row(item)
+                else:
+                    writer.add(item)
+                if writer.full:
+                    writer.flush(raw.tell())
+            writer.flush(total_bytes)
+
+        _finish(db, job_id, "COMPLETED")
+    except (ValueError, csv.Error, zipfile.BadZipFile) as exc:
+        db.rollback()
+        _finish(db, job_id, "FAILED", f"Unsupported or corrupted file: {exc}")
+    except Exception:
+        logger.exception("Import job %s failed", job_id)
+        db.rollback()
+        _finish(db, job_id, "FAILED", "Unexpected error while importing.")
+    finally:
+        db.close()
+        os.unlink(path)
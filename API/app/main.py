@@ -1,5 +1,7 @@
 from fastapi import FastAPI
 
+from app.core.deadlines import install_deadline_handlers
+
 from app.api.meta.routes import router as meta_router
 from app.api.auth.routes import router as auth_router
 from app.api.users.routes import router as users_router
@@ -11,12 +13,21 @@ from app.api.odometer_entries.routes import router as odometer_entries_router
 from app.api.expenses.routes import router as expenses_router
 from app.api.reminders.routes import router as reminders_router
 from app.api.budget.routes import router as budget_router
+from app.api.budget.routes import account_router as account_budget_router
 from app.api.export.routes import router as export_router
+from app.api.export.routes import account_router as account_export_router
+from app.api.export.routes import jobs_router as export_jobs_router
+from app.api.imports.routes import router as imports_router
+from app.api.imports.routes import jobs_router as import_jobs_router
+from app.api.sync.routes import router as sync_router
+from app.api.analytics.routes import router as analytics_router
+from app.api.fleet.routes import router as fleet_router
 
 app = FastAPI(
     title="Car Maintenance API",
     version="0.1.0",
 )
+install_deadline_handlers(app)
 
 app.include_router(meta_router)
 app.include_router(auth_router)
@@ -29,4 +40,12 @@ app.include_router(odometer_entries_router)
 app.include_router(expenses_router)
 app.include_router(reminders_router)
 app.include_router(budget_router)
-app.include_router(export_router)
\ No newline at end of file
+app.include_router(account_budget_router)
+app.include_router(export_router)
+app.include_router(account_export_router)
+app.include_router(export_jobs_router)
+app.include_router(imports_router)
+app.include_router(import_jobs_router)
+app.include_router(sync_router)
+app.include_router(analytics_router)
+app.include_router(fleet_router)
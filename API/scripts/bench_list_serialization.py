@@ -0,0 +1,102 @@
+"""
+Microbenchmark: list endpoint serialization.
+
+Compares the previous path of the list routes
+(``[Model.model_validate(row) ...]`` followed by FastAPI's response_model
+validation and encoding) with ``app.core.serialization.json_list_response``.
+No database is needed; rows are RowMapping-like dicts shaped like
+``fn_get_vehicle_fuelings`` output.
+
+Usage (from the API/ directory):
+
+    python -m scripts.bench_list_serialization --rows 5000 --repeat 20
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import List
+from uuid import uuid4
+
+from fastapi.routing import APIRoute, serialize_response
+
+from app.api.vehicles.schemas import FuelingOut
+from app.core.serialization import json_list_response
+
+
+def _rows(count: int) -> list[dict]:
+    rng = random.Random(1)
+    vehicle_id, user_id = uuid4(), uuid4()
+    filled_at = datetime(2015, 1, 1, tzinfo=timezone.utc)
+    odometer = Decimal("10000.0")
+    rows = []
+    for _ in range(count):
+        filled_at += timedelta(days=rng.uniform(3, 12))
+        odometer += Decimal(str(round(rng.uniform(300, 700), 1)))
+        rows.append(
+            {
+                "id": uuid4(),
+                "vehicle_id": vehicle_id,
+                "user_id": user_id,
+                "filled_at": filled_at,
+                "price_per_unit": Decimal(str(round(rng.uniform(4.5, 7.5), 3))),
+                "volume": Decimal(str(round(rng.uniform(20, 60), 3))),
+                "odometer_km": odometer,
+                "full_tank": rng.random() < 0.85,
+                "driving_cycle": rng.choice(("CITY", "HIGHWAY", "MIX")),
+                "fuel": "Petrol",
+                "note": None,
+                "fuel_level_before": None,
+                "fuel_level_after": None,
+                "created_at": filled_at,
+            }
+        )
+    return rows
+
+
+def _previous_path(route: APIRoute, rows: list[dict]) -> bytes:
+    models = [FuelingOut.model_validate(row) for row in rows]
+    content = asyncio.run(
+        serialize_response(field=route.response_field, response_content=models, dump_json=True)
+    )
+    return content
+
+
+def _fast_path(rows: list[dict]) -> bytes:
+    return json_list_response(FuelingOut, rows).body
+
+
+def _measure(label: str, fn, rows: list[dict], repeat: int) -> float:
+    fn()  # warm-up (schema/adapter build)
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    rate = len(rows) / best
+    print(f"{label:>10}: {best * 1000:8.2f} ms  {rate:>12,.0f} rows/s")
+    return rate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="List serialization microbenchmark")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = _rows(args.rows)
+    route = APIRoute("/bench", lambda: None, response_model=List[FuelingOut])
+
+    assert _fast_path(rows) == _previous_path(route, rows), "payloads differ"
+
+    previous = _measure("previous", lambda: _previous_path(route, rows), rows, args.repeat)
+    fast = _measure("fast path", lambda: _fast_path(rows), rows, args.repeat)
+    print(f"{'speedup':>10}: {fast / previous:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
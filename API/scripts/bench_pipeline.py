@@ -0,0 +1,150 @@
+"""
+Benchmark: serial statements vs ``app.db.pipeline.execute_pipelined``.
+
+Runs the three statements of GET /vehicles/{id}/budget/forecast (access
+check, average mileage, forecast) once per iteration, first one
+``db.execute`` at a time, then in a single pipeline, and prints the median
+latency of both.
+
+Network latency is simulated by a local TCP proxy that delivers every chunk
+--delay-ms after it arrived, in each direction (so one round trip costs about
+2 x delay; chunks in flight overlap),
+no root needed. Alternatively run with --delay-ms 0 against a database
+behind tc/netem, e.g.:
+
+    sudo tc qdisc add dev lo root netem delay 5ms
+    ...
+    sudo tc qdisc del dev lo root
+
+Usage (from the API/ directory, against a database with data, e.g. from
+scripts.generate_scale_data):
+
+    python -m scripts.bench_pipeline --delay-ms 5 --repeat 50
+"""
+from __future__ import annotations
+
+import argparse
+import queue
+import socket
+import statistics
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.pipeline import execute_pipelined
+
+FORECAST_SQL = """
+    SELECT month, regular_costs, scheduled_maintenance, scheduled_maintenance_details,
+           irregular_buffer, total_predicted, confidence_level
+    FROM car_app.fn_predict_monthly_budget(:vehicle_id, :months_ahead, :include_irregular)
+"""
+
+
+def _pump(src: socket.socket, dst: socket.socket, delay: float) -> None:
+    """
+    Forward src -> dst, each chunk ``delay`` after it arrived. Chunks in
+    flight overlap (latency, not a per-chunk cost), as on a real link.
+    """
+    chunks: queue.Queue[tuple[float, bytes] | None] = queue.Queue()
+
+    def send() -> None:
+        try:
+            while (item := chunks.get()) is not None:
+                due, chunk = item
+                time.sleep(max(due - time.perf_counter(), 0))
+                dst.sendall(chunk)
+        except OSError:
+            pass
+        finally:
+            dst.close()
+
+    threading.Thread(target=send, daemon=True).start()
+    try:
+        while chunk := src.recv(65536):
+            chunks.put((time.perf_counter() + delay, chunk))
+    except OSError:
+        pass
+    finally:
+        chunks.put(None)
+
+
+def start_delay_proxy(target_host: str, target_port: int, delay_ms: float) -> int:
+    """Start a TCP proxy on localhost that forwards to the target with a delay; returns its port."""
+    listener = socket.create_server(("127.0.0.1", 0))
+    delay = delay_ms / 1000
+
+    def accept() -> None:
+        while True:
+            client, _ = listener.accept()
+            upstream = socket.create_connection((target_host, target_port))
+            for sock in (client, upstream):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            for src, dst in ((client, upstream), (upstream, client)):
+                threading.Thread(target=_pump, args=(src, dst, delay), daemon=True).start()
+
+    threading.Thread(target=accept, daemon=True).start()
+    return listener.getsockname()[1]
+
+
+def _statements(user_id, vehicle_id) -> list:
+    return [
+        ("SELECT id FROM car_app.fn_get_vehicle(:user_id, :vehicle_id)",
+         {"user_id": user_id, "vehicle_id": vehicle_id}),
+        ("SELECT car_app.fn_get_avg_monthly_mileage(:vehicle_id) AS avg_mileage",
+         {"vehicle_id": vehicle_id}),
+        (FORECAST_SQL, {"vehicle_id": vehicle_id, "months_ahead": 6, "include_irregular": False}),
+    ]
+
+
+def _serial(db: Session, statements: list) -> None:
+    for sql, params in statements:
+        db.execute(text(sql), params).mappings().all()
+
+
+def _time(run, db: Session, statements: list, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run(db, statements)
+        samples.append(time.perf_counter() - started)
+        db.rollback()
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--delay-ms", type=float, default=5.0, help="one-way delay added by the proxy")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    host, port = settings.db_host, settings.db_port
+    if args.delay_ms > 0:
+        host, port = "127.0.0.1", start_delay_proxy(settings.db_host, settings.db_port, args.delay_ms)
+
+    engine = create_engine(
+        f"postgresql+psycopg://{settings.db_user}:{settings.db_password}@{host}:{port}/{settings.db_name}"
+    )
+    with Session(engine) as db:
+        vehicle = db.execute(text("SELECT id, owner_id FROM car_app.vehicles ORDER BY id LIMIT 1")).first()
+        if vehicle is None:
+            raise SystemExit("No vehicles in the database; load data with scripts.generate_scale_data first.")
+        db.rollback()
+        statements = _statements(vehicle.owner_id, vehicle.id)
+
+        # warm-up: connection, plans, caches
+        _time(_serial, db, statements, 3)
+        _time(execute_pipelined, db, statements, 3)
+
+        serial_ms = _time(_serial, db, statements, args.repeat)
+        pipelined_ms = _time(execute_pipelined, db, statements, args.repeat)
+
+    print(f"one-way delay {args.delay_ms:.1f} ms, {len(statements)} statements, median of {args.repeat}")
+    print(f"  serial     {serial_ms:8.2f} ms")
+    print(f"  pipelined  {pipelined_ms:8.2f} ms  ({serial_ms / pipelined_ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
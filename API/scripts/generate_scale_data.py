@@ -0,0 +1,620 @@
+"""
+Synthetic data generator for scale testing.
+
+Bulk-loads users, vehicles, fuelings, services (with items), expenses,
+odometer entries and reminder rules through COPY. Every vehicle is simulated
+on a single timeline, so the generated data stays internally consistent:
+
+- odometer readings (fuelings, services, manual entries) increase
+  monotonically with time,
+- fuel prices follow a shared market path (inflation, seasonality, noise),
+- fill-ups follow tank capacity, consumption and driving cycle,
+  dual-tank (Petrol + LPG) vehicles fill both tanks independently,
+- services follow km/time intervals, each fueling and service gets its
+  FUEL/SERVICE expense exactly like the DB triggers would create it,
+- expenses include rare, explicitly classified outliers.
+
+Triggers (and FK checks) are bypassed with session_replication_role=replica,
+which requires a superuser or a role granted SET on that parameter.
+
+Usage (from the API/ directory):
+
+    python -m scripts.generate_scale_data --users 2000 --vehicles-per-user 3 \\
+        --years 20 --jobs 8
+
+Roughly 10M rows are produced by ~2000 users x 3 vehicles x 20 years.
+"""
+from __future__ import annotations
+
+import argparse
+import math
+import multiprocessing
+import random
+import secrets
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+import psycopg
+
+from app.config import settings
+from app.core.security import get_password_hash
+
+
+COPY_COLUMNS: dict[str, tuple[str, ...]] = {
+    "users": ("id", "email", "password_hash", "display_name", "created_at", "updated_at"),
+    "vehicles": (
+        "id", "owner_id", "name", "description", "vin", "plate", "policy_number", "model",
+        "production_year", "dual_tank", "tank_capacity_l", "secondary_tank_capacity",
+        "battery_capacity_kwh", "initial_odometer_km", "purchase_price", "purchase_date",
+        "last_inspection_date", "created_at", "updated_at",
+    ),
+    "vehicle_fuels": ("vehicle_id", "fuel", "is_primary"),
+    "vehicle_shares": ("vehicle_id", "user_id", "role", "invited_at"),
+    "fuelings": (
+        "id", "vehicle_id", "user_id", "filled_at", "price_per_unit", "volume", "odometer_km",
+        "full_tank", "driving_cycle", "fuel", "note", "fuel_level_before", "fuel_level_after",
+        "created_at",
+    ),
+    "services": (
+        "id", "vehicle_id", "user_id", "service_date", "service_type", "odometer_km",
+        "total_cost", "reference", "note", "created_at",
+    ),
+    "service_items": ("id", "service_id", "part_name", "part_number", "quantity", "unit_price"),
+    "expenses": (
+        "id", "vehicle_id", "user_id", "expense_date", "category", "amount", "vat_rate", "note",
+        "created_at", "expense_type",
+    ),
+    "odometer_entries": ("id", "vehicle_id", "entry_date", "value_km", "note"),
+    "reminder_rules": (
+        "id", "vehicle_id", "name", "description", "category", "service_type", "is_recurring",
+        "due_every_days", "due_every_km", "last_reset_at", "last_reset_odometer_km",
+        "next_due_date", "next_due_odometer_km", "status", "auto_reset_on_service",
+        "created_at", "updated_at",
+    ),
+}
+
+# Order matters only for readability of the load (FK checks are off in replica mode).
+LOAD_ORDER = tuple(COPY_COLUMNS)
+
+NULL = "\\N"
+DAY = 86400.0
+INFLATION = 0.03
+
+# Price at the end of the simulated period (PLN per litre / kg / kWh) and daily volatility.
+MARKET_PRICES = {
+    "Petrol": (6.45, 0.006),
+    "Diesel": (6.55, 0.007),
+    "LPG": (2.95, 0.008),
+    "CNG": (3.90, 0.006),
+    "EV": (1.25, 0.004),
+}
+
+CYCLE_FACTORS = {"CITY": 1.22, "MIX": 1.0, "HIGHWAY": 0.86}
+
+MODELS = (
+    ("Toyota", "Corolla"), ("Skoda", "Octavia"), ("Volkswagen", "Golf"), ("Opel", "Astra"),
+    ("Ford", "Focus"), ("Renault", "Clio"), ("Kia", "Ceed"), ("Hyundai", "i30"),
+    ("Dacia", "Duster"), ("Fiat", "Tipo"), ("BMW", "320d"), ("Audi", "A4"),
+)
+EV_MODELS = (("Tesla", "Model 3"), ("Nissan", "Leaf"), ("Kia", "e-Niro"), ("Renault", "Zoe"))
+
+
+@dataclass
+class Tank:
+    fuel: str
+    capacity: float
+    consumption: float          # units per 100 km
+    refill_at: float            # level fraction that triggers a fill-up
+    level: float = 1.0
+
+
+@dataclass
+class Buffers:
+    lines: dict[str, list[str]] = field(default_factory=lambda: {t: [] for t in COPY_COLUMNS})
+    counts: dict[str, int] = field(default_factory=lambda: {t: 0 for t in COPY_COLUMNS})
+
+    def add(self, table: str, line: str) -> None:
+        self.lines[table].append(line)
+        self.counts[table] += 1
+
+    def pending(self) -> int:
+        return sum(len(v) for v in self.lines.values())
+
+
+def _text(value: str | None) -> str:
+    if value is None:
+        return NULL
+    return value.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+
+
+def _ts(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).isoformat(sep=" ")
+
+
+def _day(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).date().isoformat()
+
+
+def _poisson(rng: random.Random, lam: float) -> int:
+    limit = math.exp(-lam)
+    k, p = 0, 1.0
+    while True:
+        p *= rng.random()
+        if p <= limit:
+            return k
+        k += 1
+
+
+class Market:
+    """Shared daily fuel price path; identical in every worker for a given seed."""
+
+    def __init__(self, seed: int, start: float, days: int) -> None:
+        self.start = start
+        self.days = days
+        self.paths: dict[str, list[float]] = {}
+        rng = random.Random(seed)
+        years_total = days / 365.25
+        for fuel, (end_price, volatility) in MARKET_PRICES.items():
+            base = end_price / (1 + INFLATION) ** years_total
+            shock = 0.0
+            path = []
+            for d in range(days + 1):
+                shock = 0.995 * shock + rng.gauss(0, volatility)
+                season = 1 + 0.03 * math.sin(2 * math.pi * d / 365.25 - 1.3)
+                path.append(base * (1 + INFLATION) ** (d / 365.25) * season * math.exp(shock))
+            self.paths[fuel] = path
+
+    def price(self, fuel: str, epoch: float) -> float:
+        d = min(max(int((epoch - self.start) / DAY), 0), self.days)
+        return self.paths[fuel][d]
+
+    def inflate(self, todays_cost: float, epoch: float) -> float:
+        """Scale a cost expressed in end-of-period money back to `epoch`."""
+        years_left = max((self.start + self.days * DAY - epoch) / (365.25 * DAY), 0.0)
+        return todays_cost / (1 + INFLATION) ** years_left
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+class VehicleSimulator:
+    """Simulates one vehicle's life and appends its rows to the buffers."""
+
+    def __init__(
+        self,
+        rng: random.Random,
+        market: Market,
+        buffers: Buffers,
+        vehicle_id: str,
+        drivers: list[str],
+        start: float,
+        end: float,
+    ) -> None:
+        self.rng = rng
+        self.market = market
+        self.out = buffers
+        self.vehicle_id = vehicle_id
+        self.drivers = drivers
+        self.start = start
+        self.end = end
+
+        kind = rng.choices(("Petrol", "Diesel", "LPG", "EV"), weights=(45, 30, 15, 7))[0]
+        self.kind = kind
+        self.cycle_weights = rng.choice(((6, 3, 1), (2, 3, 5), (3, 5, 2), (1, 2, 7)))
+        annual_km = min(max(rng.lognormvariate(math.log(14000), 0.45), 3000), 70000)
+        self.km_per_day = annual_km / 365.25
+        self.odometer = 0.0 if rng.random() < 0.6 else round(rng.uniform(5000, 160000), 1)
+
+        if kind == "EV":
+            battery = rng.choice((40.0, 58.0, 64.0, 75.0))
+            self.tanks = [Tank("EV", battery, rng.uniform(14.5, 19.5), rng.uniform(0.15, 0.35))]
+            self.model = rng.choice(EV_MODELS)
+        else:
+            capacity = float(rng.choice((40, 45, 50, 55, 60, 65)))
+            base = {"Petrol": 6.8, "Diesel": 5.4, "LPG": 6.8}[kind] * rng.uniform(0.85, 1.2)
+            if kind == "LPG":
+                # LPG cars burn ~20% more gas than petrol and still start on petrol.
+                self.tanks = [
+                    Tank("LPG", float(rng.choice((36, 42, 48, 55))), base * 1.2 * 0.92, rng.uniform(0.1, 0.2)),
+                    Tank("Petrol", capacity, base * 0.08, rng.uniform(0.15, 0.3)),
+                ]
+            else:
+                self.tanks = [Tank(kind, capacity, base, rng.uniform(0.1, 0.3))]
+            self.model = rng.choice(MODELS)
+
+        self.next_oil_km = self.odometer + 15000
+        self.next_oil_at = start + 365 * DAY
+        self.next_inspection_at = start + 365 * DAY
+        self.next_brakes_km = self.odometer + rng.uniform(40000, 70000)
+        self.next_battery_at = start + rng.uniform(4.5, 6.5) * 365.25 * DAY
+        self.tire_swaps = rng.random() < 0.7
+        self.last_oil: tuple[float, float] | None = None
+        self.last_inspection: tuple[float, float] | None = None
+
+    # rows
+
+    def _driver(self) -> str:
+        return self.drivers[0] if len(self.drivers) == 1 or self.rng.random() < 0.75 else self.rng.choice(self.drivers)
+
+    def _expense(self, epoch: float, category: str, amount: float, note: str | None, user_id: str,
+                 expense_type: str = "REGULAR") -> None:
+        self.out.add(
+            "expenses",
+            f"{_uuid(self.rng)}\t{self.vehicle_id}\t{user_id}\t{_day(epoch)}\t{category}\t"
+            f"{amount:.2f}\t{NULL}\t{_text(note)}\t{_ts(epoch + 60)}\t{expense_type}\n",
+        )
+
+    def _fueling(self, epoch: float, tank: Tank, volume: float, full: bool, cycle: str,
+                 level_before: float) -> None:
+        price = round(self.market.price(tank.fuel, epoch) * self.rng.gauss(1, 0.015), 2)
+        user_id = self._driver()
+        levels = (
+            f"{level_before * 100:.2f}\t{tank.level * 100:.2f}" if tank.fuel == "EV" else f"{NULL}\t{NULL}"
+        )
+        self.out.add(
+            "fuelings",
+            f"{_uuid(self.rng)}\t{self.vehicle_id}\t{user_id}\t{_ts(epoch)}\t{price:.3f}\t"
+            f"{volume:.3f}\t{self.odometer:.1f}\t{'t' if full else 'f'}\t{cycle}\t{tank.fuel}\t"
+            f"{NULL}\t{levels}\t{_ts(epoch + 30)}\n",
+        )
+        self._expense(epoch, "FUEL", round(price * volume, 2), None, user_id)
+
+    def _service(self, epoch: float, odometer: float, service_type: str, items: list[tuple[str, float, float]],
+                 labour: float, note: str | None = None) -> None:
+        service_id = _uuid(self.rng)
+        inflate = self.market.inflate(1.0, epoch)
+        total = labour * inflate
+        for part_name, quantity, unit_price in items:
+            unit = round(unit_price * inflate, 2)
+            total += unit * quantity
+            self.out.add(
+                "service_items",
+                f"{_uuid(self.rng)}\t{service_id}\t{part_name}\t{NULL}\t{quantity:.2f}\t{unit:.2f}\n",
+            )
+        user_id = self._driver()
+        reference = f"FV/{datetime.fromtimestamp(epoch, tz=timezone.utc).year}/{self.rng.randint(1, 99999):05d}"
+        self.out.add(
+            "services",
+            f"{service_id}\t{self.vehicle_id}\t{user_id}\t{_day(epoch)}\t{service_type}\t{odometer:.1f}\t"
+            f"{total:.2f}\t{reference}\t{_text(note)}\t{_ts(epoch + 60)}\n",
+        )
+        # The SERVICE expense mirrors trg_service_to_expense; big repairs are outliers.
+        expense_type = "IRREGULAR_LARGE" if total > 5000 else "IRREGULAR_MEDIUM" if total > 2000 else "REGULAR"
+        self._expense(epoch, "SERVICE", round(total, 2), note, user_id, expense_type)
+
+    # simulation
+
+    def _services_between(self, t0: float, t1: float, odo0: float, odo1: float) -> None:
+        """Emit services due inside one driving segment, interpolating their odometer."""
+        rng = self.rng
+
+        def at(frac: float) -> tuple[float, float]:
+            return t0 + (t1 - t0) * frac, round(odo0 + (odo1 - odo0) * frac, 1)
+
+        if self.kind != "EV" and (odo1 >= self.next_oil_km or t1 >= self.next_oil_at):
+            when, odo = at(rng.uniform(0.2, 0.9))
+            self._service(
+                when, odo, "OIL_CHANGE",
+                [("Engine oil 5W-30", rng.choice((4.0, 4.5, 5.0, 5.5)), 48.0),
+                 ("Oil filter", 1, rng.uniform(30, 70)),
+                 ("Air filter", 1, rng.uniform(45, 110))],
+                labour=rng.uniform(80, 200),
+            )
+            self.last_oil = (when, odo)
+            self.next_oil_km = odo + 15000
+            self.next_oil_at = when + 365 * DAY
+        if t1 >= self.next_inspection_at:
+            when, odo = at(rng.uniform(0.1, 0.9))
+            self._service(when, odo, "INSPECTION", [], labour=rng.choice((149.0, 149.0, 199.0)))
+            self.last_inspection = (when, odo)
+            self.next_inspection_at = when + 365 * DAY
+        if odo1 >= self.next_brakes_km:
+            when, odo = at(rng.uniform(0.1, 0.9))
+            self._service(
+                when, odo, "BRAKES",
+                [("Brake pads set", 1, rng.uniform(150, 420)), ("Brake discs", 2, rng.uniform(140, 380))],
+                labour=rng.uniform(150, 400),
+            )
+            self.next_brakes_km = odo + rng.uniform(40000, 70000)
+        if t1 >= self.next_battery_at and self.kind != "EV":
+            when, odo = at(rng.uniform(0.1, 0.9))
+            self._service(when, odo, "BATTERY", [("Battery 12V", 1, rng.uniform(380, 750))], labour=50.0)
+            self.next_battery_at = when + rng.uniform(4.5, 6.5) * 365.25 * DAY
+        if self.tire_swaps:
+            month0 = datetime.fromtimestamp(t0, tz=timezone.utc).month
+            month1 = datetime.fromtimestamp(t1, tz=timezone.utc).month
+            if month0 != month1 and month1 in (4, 11):
+                when, odo = at(rng.uniform(0.5, 0.99))
+                self._service(when, odo, "TIRES", [], labour=rng.uniform(100, 220), note="Seasonal tyre swap")
+        if rng.random() < 0.004:
+            # Rare large repair — the expense outliers the classifier must cope with.
+            when, odo = at(rng.random())
+            service_type = rng.choice(("ENGINE", "TRANSMISSION", "SUSPENSION"))
+            self._service(when, odo, service_type, [("Parts", 1, rng.uniform(1500, 9000))],
+                          labour=rng.uniform(500, 3000), note="Unplanned repair")
+
+    def run(self) -> None:
+        rng = self.rng
+        t = self.start
+        cycles = tuple(CYCLE_FACTORS)
+        while True:
+            cycle = rng.choices(cycles, weights=self.cycle_weights)[0]
+            month = datetime.fromtimestamp(t, tz=timezone.utc).month
+            winter = 1.08 if month in (12, 1, 2) else 1.0
+            factor = CYCLE_FACTORS[cycle] * winter * rng.gauss(1, 0.05)
+
+            # Drive until the first tank reaches its refill threshold.
+            km = min(
+                max(tank.level - tank.refill_at, 0.02) * tank.capacity / (tank.consumption * factor / 100)
+                for tank in self.tanks
+            )
+            km = max(km * rng.uniform(0.9, 1.0), 20.0)
+            days = km / (self.km_per_day * rng.lognormvariate(0, 0.35))
+            t_next = t + days * DAY
+            if t_next >= self.end:
+                break
+
+            # Fill-ups happen at a daytime hour, never before the previous one.
+            t_fill = t_next - (t_next % DAY) + rng.uniform(6, 22) * 3600
+            t_next = t_fill if t_fill > t else t_next
+
+            odo_before = self.odometer
+            self.odometer = round(self.odometer + km, 1)
+            for tank in self.tanks:
+                tank.level = max(tank.level - km * tank.consumption * factor / 100 / tank.capacity, 0.0)
+
+            self._services_between(t, t_next, odo_before, self.odometer)
+            if rng.random() < 0.12:
+                frac = rng.uniform(0.05, 0.95)
+                self.out.add(
+                    "odometer_entries",
+                    f"{_uuid(rng)}\t{self.vehicle_id}\t{_ts(t + (t_next - t) * frac)}\t"
+                    f"{odo_before + (self.odometer - odo_before) * frac:.1f}\t{NULL}\n",
+                )
+
+            t = t_next
+            for tank in self.tanks:
+                if tank.level > tank.refill_at + 0.05:
+                    continue
+                before = tank.level
+                if tank.fuel == "EV":
+                    tank.level = 1.0 if rng.random() < 0.2 else rng.uniform(0.75, 0.9)
+                    full = tank.level >= 1.0
+                elif rng.random() < 0.85:
+                    tank.level, full = 1.0, True
+                else:
+                    tank.level, full = min(before + rng.uniform(0.25, 0.6), 0.95), False
+                volume = (tank.level - before) * tank.capacity
+                self._fueling(t, tank, volume, full, cycle, before)
+
+        self._recurring_expenses()
+        self._reminders()
+
+    def _recurring_expenses(self) -> None:
+        rng = self.rng
+        owner = self.drivers[0]
+        start_day = datetime.fromtimestamp(self.start, tz=timezone.utc)
+        insurance = rng.uniform(700, 3200)
+        city_share = self.cycle_weights[0] / sum(self.cycle_weights)
+        highway_share = self.cycle_weights[2] / sum(self.cycle_weights)
+        cursor = datetime(start_day.year, start_day.month, 1, 12, tzinfo=timezone.utc)
+        while cursor.timestamp() < self.end:
+            month_start = cursor.timestamp()
+            nxt = datetime(cursor.year + cursor.month // 12, cursor.month % 12 + 1, 1, 12, tzinfo=timezone.utc)
+
+            def in_month() -> float:
+                return min(month_start + rng.uniform(0, nxt.timestamp() - month_start), self.end - DAY)
+
+            if cursor.month == start_day.month:
+                when = month_start + (start_day.day - 1) * DAY
+                self._expense(when, "INSURANCE", round(self.market.inflate(insurance, when), 2),
+                              "OC/AC policy", owner)
+            for category, lam, low, high in (
+                ("PARKING", 3.0 * city_share, 4, 40),
+                ("TOLLS", 2.5 * highway_share, 12, 70),
+                ("WASH", 0.8, 20, 70),
+                ("ACCESSORIES", 0.12, 30, 400),
+            ):
+                for _ in range(_poisson(rng, lam)):
+                    when = in_month()
+                    self._expense(when, category, round(self.market.inflate(rng.uniform(low, high), when), 2),
+                                  None, self._driver())
+            if rng.random() < 0.02:
+                when = in_month()
+                self._expense(when, "OTHER", round(self.market.inflate(rng.uniform(2500, 15000), when), 2),
+                              "Bodywork after collision", owner, "IRREGULAR_LARGE")
+            elif rng.random() < 0.03:
+                when = in_month()
+                self._expense(when, "OTHER", round(self.market.inflate(rng.uniform(700, 2000), when), 2),
+                              None, owner, "IRREGULAR_MEDIUM")
+            cursor = nxt
+
+    def _reminders(self) -> None:
+        now = self.end
+        rules = []
+        if self.last_oil is not None:
+            when, odo = self.last_oil
+            rules.append(("Oil change", "OIL_CHANGE", 365, 15000, when, odo))
+        if self.last_inspection is not None:
+            when, odo = self.last_inspection
+            rules.append(("Technical inspection", "INSPECTION", 365, None, when, odo))
+        for name, service_type, every_days, every_km, reset_at, reset_km in rules:
+            next_date = reset_at + every_days * DAY
+            next_km = reset_km + every_km if every_km else None
+            if next_date < now or (next_km is not None and self.odometer >= next_km):
+                status = "OVERDUE"
+            elif next_date < now + 7 * DAY:
+                status = "DUE"
+            else:
+                status = "ACTIVE"
+            self.out.add(
+                "reminder_rules",
+                f"{_uuid(self.rng)}\t{self.vehicle_id}\t{name}\t{NULL}\t{NULL}\t{service_type}\tt\t"
+                f"{every_days}\t{every_km if every_km else NULL}\t{_ts(reset_at)}\t{reset_km:.1f}\t"
+                f"{_day(next_date)}\t{f'{next_km:.1f}' if next_km is not None else NULL}\t{status}\tt\t"
+                f"{_ts(self.start)}\t{_ts(now)}\n",
+            )
+
+
+@dataclass
+class Partition:
+    dsn: str
+    seed: int
+    tag: str
+    first_user: int
+    last_user: int
+    vehicles_per_user: float
+    fleet_users: int
+    fleet_size: int
+    years: int
+    end: float
+    password_hash: str
+    flush_rows: int
+
+
+def _flush(conn: psycopg.Connection, buffers: Buffers) -> None:
+    with conn.cursor() as cur:
+        for table in LOAD_ORDER:
+            lines = buffers.lines[table]
+            if not lines:
+                continue
+            columns = ", ".join(COPY_COLUMNS[table])
+            with cur.copy(f"COPY car_app.{table} ({columns}) FROM STDIN") as copy:
+                for i in range(0, len(lines), 5000):
+                    copy.write("".join(lines[i:i + 5000]))
+            lines.clear()
+    conn.commit()
+
+
+def _load_partition(part: Partition) -> dict[str, int]:
+    end = part.end
+    start_period = end - part.years * 365.25 * DAY
+    market = Market(part.seed, start_period, int(part.years * 365.25) + 1)
+    buffers = Buffers()
+
+    with psycopg.connect(part.dsn) as conn:
+        conn.execute("SET session_replication_role = replica")
+        conn.execute("SET synchronous_commit = off")
+        for n in range(part.first_user, part.last_user):
+            rng = random.Random(part.seed * 1_000_003 + n)
+            user_id = _uuid(rng)
+            joined = start_period + rng.uniform(0, 0.3) * (end - start_period)
+            buffers.add(
+                "users",
+                f"{user_id}\tscale-{part.tag}-{n}@example.com\t{part.password_hash}\tScale user {n}\t"
+                f"{_ts(joined)}\t{_ts(joined)}\n",
+            )
+            if n < part.fleet_users:
+                vehicle_count = part.fleet_size
+            else:
+                vehicle_count = max(1, round(rng.expovariate(1 / part.vehicles_per_user)))
+
+            # Family members: every few users share their cars with the previous user.
+            drivers = [user_id]
+            if n > part.first_user and rng.random() < 0.2:
+                co_driver = _uuid(random.Random(part.seed * 1_000_003 + n - 1))
+                drivers.append(co_driver)
+
+            for _ in range(vehicle_count):
+                vehicle_id = _uuid(rng)
+                v_start = joined + rng.uniform(0, 0.4) * (end - joined)
+                sim = VehicleSimulator(rng, market, buffers, vehicle_id, drivers, v_start, end)
+                make, model = sim.model
+                tanks = sim.tanks
+                is_ev = sim.kind == "EV"
+                buffers.add(
+                    "vehicles",
+                    f"{vehicle_id}\t{user_id}\t{make} {model}\t{NULL}\t"
+                    f"{vehicle_id.replace('-', '')[:17].upper()}\t"
+                    f"W{rng.choice('AXYZ')} {rng.randint(10000, 99999)}\t{NULL}\t{model}\t"
+                    f"{datetime.fromtimestamp(v_start, tz=timezone.utc).year - rng.randint(0, 8)}\t"
+                    f"{'t' if len(tanks) > 1 else 'f'}\t"
+                    f"{NULL if is_ev else f'{tanks[-1].capacity:.2f}'}\t"
+                    f"{f'{tanks[0].capacity:.2f}' if len(tanks) > 1 else NULL}\t"
+                    f"{f'{tanks[0].capacity:.2f}' if is_ev else NULL}\t{sim.odometer:.1f}\t"
+                    f"{market.inflate(rng.uniform(25000, 180000), v_start):.2f}\t{_day(v_start)}\t{NULL}\t"
+                    f"{_ts(v_start)}\t{_ts(v_start)}\n",
+                )
+                for i, tank in enumerate(tanks):
+                    buffers.add("vehicle_fuels", f"{vehicle_id}\t{tank.fuel}\t{'t' if i == 0 else 'f'}\n")
+                for co_driver in drivers[1:]:
+                    buffers.add("vehicle_shares", f"{vehicle_id}\t{co_driver}\tEDITOR\t{_ts(v_start)}\n")
+                sim.run()
+
+            if buffers.pending() >= part.flush_rows:
+                _flush(conn, buffers)
+        _flush(conn, buffers)
+
+    return buffers.counts
+
+
+def _split(args: argparse.Namespace, dsn: str, password_hash: str) -> list[Partition]:
+    step = math.ceil(args.users / args.jobs)
+    end = time.time()
+    return [
+        Partition(
+            dsn=dsn,
+            seed=args.seed,
+            tag=args.tag,
+            first_user=first,
+            last_user=min(first + step, args.users),
+            vehicles_per_user=args.vehicles_per_user,
+            fleet_users=args.fleet_accounts,
+            fleet_size=args.fleet_size,
+            years=args.years,
+            end=end,
+            password_hash=password_hash,
+            flush_rows=args.flush_rows,
+        )
+        for first in range(0, args.users, step)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--dsn", default=None, help="libpq DSN; defaults to the API's DB_* settings")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--vehicles-per-user", type=float, default=2.0, help="mean number of vehicles")
+    parser.add_argument("--fleet-accounts", type=int, default=2, help="users owning a large fleet")
+    parser.add_argument("--fleet-size", type=int, default=200, help="vehicles per fleet account")
+    parser.add_argument("--years", type=int, default=20, help="length of the simulated history")
+    parser.add_argument("--jobs", type=int, default=max(multiprocessing.cpu_count() - 1, 1))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--tag", default=secrets.token_hex(3), help="suffix making generated emails unique")
+    parser.add_argument("--password", default="scale-test-password")
+    parser.add_argument("--flush-rows", type=int, default=200_000, help="rows buffered before each COPY")
+    args = parser.parse_args()
+
+    dsn = args.dsn or (
+        f"postgresql://{settings.db_user}:{settings.db_password}"
+        f"@{settings.db_host}:{settings.db_port}/{settings.db_name}"
+    )
+    partitions = _split(args, dsn, get_password_hash(args.password))
+
+    started = time.perf_counter()
+    totals = {t: 0 for t in COPY_COLUMNS}
+    with multiprocessing.Pool(processes=min(args.jobs, len(partitions))) as pool:
+        for counts in pool.imap_unordered(_load_partition, partitions):
+            for table, count in counts.items():
+                totals[table] += count
+    loaded = time.perf_counter() - started
+
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        for table in LOAD_ORDER:
+            conn.execute(f"ANALYZE car_app.{table}")
+        conn.execute("SELECT car_app.fn_refresh_mv_expenses_monthly()")
+        # The mileage model is maintained by triggers, which the load bypassed.
+        conn.execute("SELECT car_app.fn_refresh_mileage_rate(id) FROM car_app.vehicles")
+
+    rows = sum(totals.values())
+    for table in LOAD_ORDER:
+        print(f"{table:>18}: {totals[table]:>12,}")
+    print(f"{'total':>18}: {rows:>12,} rows in {loaded:.1f}s ({rows / max(loaded, 1e-9):,.0f} rows/s)")
+    print(f"login: scale-{args.tag}-<n>@example.com / {args.password}")
+
+
+if __name__ == "__main__":
+    main()
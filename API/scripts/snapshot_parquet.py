@@ -0,0 +1,194 @@
+"""
+Nightly Parquet snapshot for the analytics endpoints.
+
+Writes fuelings, expenses and services to year-partitioned Parquet files
+(``<table>/year=YYYY/*.parquet``) under ANALYTICS_DIR/snapshots/<timestamp>/,
+then atomically points ANALYTICS_DIR/current at the new snapshot. The
+/analytics/* endpoints read ``current`` through DuckDB and never query the
+tables below.
+
+All tables are read in one REPEATABLE READ snapshot through server-side
+cursors, batch by batch, so memory does not grow with the data volume.
+Older snapshots beyond --keep are removed.
+
+Usage (from the API/ directory, e.g. from cron at night):
+
+    python -m scripts.snapshot_parquet --keep 2
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import psycopg
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from app.config import settings
+
+BATCH_SIZE = 100_000
+SUCCESS_MARKER = "_SUCCESS"
+
+_TIMESTAMP = pa.timestamp("us", tz="UTC")
+
+# table -> (query, arrow schema); every query ends with the partition column.
+SNAPSHOT_TABLES: dict[str, tuple[str, pa.Schema]] = {
+    "fuelings": (
+        """
+        SELECT
+            id::text, vehicle_id::text, filled_at, fuel::text, driving_cycle::text, full_tank,
+            volume, price_per_unit, odometer_km,
+            extract(year FROM filled_at AT TIME ZONE 'UTC')::int2 AS year
+        FROM car_app.fuelings
+        """,
+        pa.schema([
+            ("id", pa.string()),
+            ("vehicle_id", pa.string()),
+            ("filled_at", _TIMESTAMP),
+            ("fuel", pa.string()),
+            ("driving_cycle", pa.string()),
+            ("full_tank", pa.bool_()),
+            ("volume", pa.decimal128(10, 3)),
+            ("price_per_unit", pa.decimal128(10, 3)),
+            ("odometer_km", pa.decimal128(10, 1)),
+            ("year", pa.int16()),
+        ]),
+    ),
+    "expenses": (
+        """
+        SELECT
+            id::text, vehicle_id::text, expense_date, category::text, amount, expense_type,
+            extract(year FROM expense_date)::int2 AS year
+        FROM car_app.expenses
+        """,
+        pa.schema([
+            ("id", pa.string()),
+            ("vehicle_id", pa.string()),
+            ("expense_date", pa.date32()),
+            ("category", pa.string()),
+            ("amount", pa.decimal128(12, 2)),
+            ("expense_type", pa.string()),
+            ("year", pa.int16()),
+        ]),
+    ),
+    "services": (
+        """
+        SELECT
+            id::text, vehicle_id::text, service_date, service_type::text, odometer_km, total_cost,
+            extract(year FROM service_date)::int2 AS year
+        FROM car_app.services
+        """,
+        pa.schema([
+            ("id", pa.string()),
+            ("vehicle_id", pa.string()),
+            ("service_date", pa.date32()),
+            ("service_type", pa.string()),
+            ("odometer_km", pa.decimal128(10, 1)),
+            ("total_cost", pa.decimal128(12, 2)),
+            ("year", pa.int16()),
+        ]),
+    ),
+}
+
+
+def _batches(conn: psycopg.Connection, table: str, query: str, schema: pa.Schema):
+    with conn.cursor(name=f"snapshot_{table}") as cur:
+        cur.itersize = BATCH_SIZE
+        cur.execute(query)
+        while rows := cur.fetchmany(BATCH_SIZE):
+            columns = zip(*rows)
+            yield pa.record_batch(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema,
+            )
+
+
+def write_snapshot(dsn: str, target: Path) -> dict[str, int]:
+    counts: dict[str, int] = {}
+    with psycopg.connect(dsn) as conn:
+        conn.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+        conn.execute("SET TIME ZONE 'UTC'")
+        snapshot_at = conn.execute("SELECT now()").fetchone()[0]
+
+        for table, (query, schema) in SNAPSHOT_TABLES.items():
+            count = 0
+
+            def counted(batches):
+                nonlocal count
+                for batch in batches:
+                    count += batch.num_rows
+                    yield batch
+
+            ds.write_dataset(
+                pa.RecordBatchReader.from_batches(schema, counted(_batches(conn, table, query, schema))),
+                target / table,
+                format="parquet",
+                partitioning=ds.partitioning(pa.schema([("year", pa.int16())]), flavor="hive"),
+                file_options=ds.ParquetFileFormat().make_write_options(compression="zstd"),
+                max_rows_per_group=BATCH_SIZE,
+                existing_data_behavior="error",
+            )
+            if count == 0:
+                # Keep the layout readable for DuckDB: one empty file in a dummy partition.
+                empty = target / table / "year=0"
+                empty.mkdir(parents=True)
+                pq.write_table(schema.remove(schema.get_field_index("year")).empty_table(), empty / "part-0.parquet")
+            counts[table] = count
+
+    (target / SUCCESS_MARKER).write_text(snapshot_at.astimezone(timezone.utc).isoformat())
+    return counts
+
+
+def publish(root: Path, target: Path) -> None:
+    """Point ``root/current`` at ``target`` (atomic rename of a new symlink)."""
+    link = root / "current"
+    tmp_link = root / f".current-{os.getpid()}"
+    tmp_link.unlink(missing_ok=True)
+    tmp_link.symlink_to(target.relative_to(root), target_is_directory=True)
+    os.replace(tmp_link, link)
+
+
+def prune(root: Path, keep: int) -> None:
+    current = (root / "current").resolve()
+    snapshots = sorted((root / "snapshots").iterdir(), reverse=True)
+    for path in snapshots[keep:]:
+        if path.resolve() != current:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--dsn", default=None, help="libpq DSN; defaults to the API's DB_* settings")
+    parser.add_argument("--dir", default=settings.analytics_dir, help="defaults to ANALYTICS_DIR")
+    parser.add_argument("--keep", type=int, default=2, help="snapshots to keep (running queries may use the previous one)")
+    args = parser.parse_args()
+
+    dsn = args.dsn or (
+        f"postgresql://{settings.db_user}:{settings.db_password}"
+        f"@{settings.db_host}:{settings.db_port}/{settings.db_name}"
+    )
+    root = Path(args.dir)
+    target = root / "snapshots" / datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    target.mkdir(parents=True)
+
+    started = time.perf_counter()
+    try:
+        counts = write_snapshot(dsn, target)
+    except BaseException:
+        shutil.rmtree(target, ignore_errors=True)
+        raise
+    publish(root, target)
+    prune(root, max(args.keep, 1))
+
+    for table, count in counts.items():
+        print(f"{table:>10}: {count:>12,}")
+    print(f"snapshot {target.name} written in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
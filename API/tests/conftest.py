@@ -0,0 +1,188 @@
+"""
+Route tests without a database.
+
+``stub_db`` replaces the sessions handed out by ``get_db`` / ``get_read_db``
+with ``StubSession``: every statement is recorded and answered from canned
+rows (matched by a substring of the SQL), the session's ``after_begin``
+listener runs when a transaction starts, as it does with a real session, and
+``SET TRANSACTION ISOLATION LEVEL`` after the first query of a transaction
+fails like it does in Postgres (SQLSTATE 25001).
+"""
+from __future__ import annotations
+
+import os
+import re
+from contextlib import contextmanager
+from uuid import UUID, uuid4
+
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("DB_PORT", "5432")
+os.environ.setdefault("DB_NAME", "car_app")
+os.environ.setdefault("DB_USER", "car_user")
+os.environ.setdefault("DB_PASSWORD", "test")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import DBAPIError
+
+from app.api import deps
+from app.core.security import create_access_token
+from app.db.session import _set_transaction_context, count_queries
+from app.main import app
+
+
+class StubRow(dict):
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+class StubResult:
+    def __init__(self, rows: list[dict]) -> None:
+        self._rows = [StubRow(row) for row in rows]
+
+    def mappings(self) -> StubResult:
+        return self
+
+    def all(self) -> list[StubRow]:
+        return self._rows
+
+    def first(self) -> StubRow | None:
+        return self._rows[0] if self._rows else None
+
+    def one(self) -> StubRow:
+        if len(self._rows) != 1:
+            raise AssertionError(f"expected one row, got {len(self._rows)}")
+        return self._rows[0]
+
+    def scalar_one(self):
+        return next(iter(self.one().values()))
+
+    def scalars(self) -> StubScalars:
+        return StubScalars([next(iter(row.values())) for row in self._rows])
+
+    def __iter__(self):
+        return iter(self._rows)
+
+
+class StubScalars(list):
+    def all(self) -> list:
+        return list(self)
+
+
+class ActiveSqlTransaction(Exception):
+    sqlstate = "25001"
+
+
+class StubConnection:
+    def __init__(self, session: StubSession) -> None:
+        self.session = session
+
+    def execute(self, statement, params=None):
+        return self.session.run(str(statement), params)
+
+
+class StubSession:
+    def __init__(self, db: StubDatabase) -> None:
+        self.db = db
+        self.info: dict = {}
+        self._transaction: list[str] | None = None
+
+    def _begin(self, isolation_level: str | None = None) -> None:
+        if self._transaction is not None:
+            return
+        self._transaction = []
+        self.db.isolation_levels.append(isolation_level)
+        _set_transaction_context(self, None, StubConnection(self))
+
+    def connection(self, bind_arguments=None, execution_options=None) -> StubConnection:
+        isolation_level = (execution_options or {}).get("isolation_level")
+        if isolation_level is not None and self._transaction is not None:
+            raise AssertionError("isolation_level requested inside a running transaction")
+        self._begin(isolation_level)
+        return StubConnection(self)
+
+    def execute(self, statement, params=None, **kwargs) -> StubResult:
+        self._begin()
+        count_queries(self)
+        return self.run(str(statement), params)
+
+    def run(self, sql: str, params) -> StubResult:
+        if re.match(r"\s*SET TRANSACTION ISOLATION LEVEL", sql, re.IGNORECASE) and self._transaction:
+            raise DBAPIError(
+                sql,
+                params,
+                ActiveSqlTransaction("SET TRANSACTION ISOLATION LEVEL must be called before any query"),
+            )
+        self._transaction.append(sql)
+        self.db.statements.append(sql)
+        self.db.params.append(params or {})
+        return StubResult(self.db.rows_for(sql))
+
+    @contextmanager
+    def begin_nested(self):
+        self._begin()
+        yield
+
+    def commit(self) -> None:
+        self._transaction = None
+
+    def rollback(self) -> None:
+        self._transaction = None
+
+    def close(self) -> None:
+        self._transaction = None
+
+
+class StubDatabase:
+    def __init__(self) -> None:
+        self.responses: list[tuple[str, list[dict]]] = []
+        self.statements: list[str] = []
+        self.params: list[dict] = []
+        self.isolation_levels: list[str | None] = []
+
+    def respond(self, fragment: str, rows: list[dict]) -> None:
+        """Answer statements containing ``fragment`` with ``rows``."""
+        self.responses.append((fragment, rows))
+
+    def rows_for(self, sql: str) -> list[dict]:
+        for fragment, rows in self.responses:
+            if fragment in sql:
+                return rows
+        return []
+
+
+def histogram_totals(client: TestClient, name: str, **labels: str) -> tuple[float, float]:
+    """(sum, count) of a histogram series, scraped from GET /meta/metrics."""
+    selector = ",".join(f'{key}="{value}"' for key, value in sorted(labels.items()))
+    totals = {}
+    for line in client.get("/meta/metrics").text.splitlines():
+        for part in ("sum", "count"):
+            prefix = f"{name}_{part}{{{selector}}} "
+            if line.startswith(prefix):
+                totals[part] = float(line[len(prefix):])
+    return totals.get("sum", 0.0), totals.get("count", 0.0)
+
+
+@pytest.fixture
+def stub_db(monkeypatch) -> StubDatabase:
+    db = StubDatabase()
+    monkeypatch.setattr(deps, "SessionLocal", lambda: StubSession(db))
+    monkeypatch.setattr(deps, "ReplicaSessionLocal", lambda: StubSession(db))
+    return db
+
+
+@pytest.fixture
+def user_id() -> UUID:
+    return uuid4()
+
+
+@pytest.fixture
+def client(user_id) -> TestClient:
+    client = TestClient(app)
+    client.headers["Authorization"] = f"Bearer {create_access_token(user_id)}"
+    return client
+
@@ -0,0 +1,24 @@
+from app.core.deadlines import ROUTE_DEADLINES_MS
+
+from .conftest import histogram_totals
+
+
+def test_account_zip_session_is_set_up_like_get_db(client, stub_db, user_id, monkeypatch):
+    monkeypatch.setattr("app.api.deps.settings.db_rls_enabled", True)
+    monkeypatch.setattr("app.api.export.routes.settings.export_stream_idle_timeout_seconds", 30)
+    before = histogram_totals(client, "db_queries_per_request", route="export_account_zip")
+
+    response = client.get("/users/me/export.zip")
+
+    assert response.status_code == 200, response.text
+    assert stub_db.isolation_levels == ["REPEATABLE READ"]
+    assert "set_config" in stub_db.statements[0]
+    configs = dict(
+        (stub_db.params[0][f"name_{i}"], stub_db.params[0][f"value_{i}"])
+        for i in range(len(stub_db.params[0]) // 2)
+    )
+    assert configs["app.current_user_id"] == str(user_id)
+    assert configs["statement_timeout"] == f"{ROUTE_DEADLINES_MS['export_account_zip']}ms"
+    assert configs["idle_in_transaction_session_timeout"] == "30000ms"
+    # the session is closed through close_session, which reports its queries
+    assert histogram_totals(client, "db_queries_per_request", route="export_account_zip")[1] == before[1] + 1
@@ -0,0 +1,33 @@
+from uuid import uuid4
+
+
+def _reminder_rule(vehicle_id, estimate):
+    return {
+        "id": uuid4(),
+        "vehicle_id": vehicle_id,
+        "name": "Oil change",
+        "due_every_km": 15000,
+        "estimated_days_until_due": estimate,
+    }
+
+
+def test_reminders_entry_follows_dependency_versions(client, stub_db):
+    vehicle_id = uuid4()
+    versions = [{"version": "v1"}]
+    rules = [_reminder_rule(vehicle_id, 40)]
+    stub_db.respond("fn_get_reminders_version(", versions)
+    stub_db.respond("fn_get_vehicle_reminder_rules(", rules)
+
+    first = client.get(f"/vehicles/{vehicle_id}/reminders")
+    cached = client.get(f"/vehicles/{vehicle_id}/reminders")
+    assert first.status_code == cached.status_code == 200
+    assert sum("fn_get_vehicle_reminder_rules(" in sql for sql in stub_db.statements) == 1
+
+    # e.g. PATCH /fuelings/{id}: no vehicle tag is invalidated, but the
+    # fuelings version (and with it the ETag) changes
+    versions[0] = {"version": "v2"}
+    rules[0] = _reminder_rule(vehicle_id, 12)
+    fresh = client.get(f"/vehicles/{vehicle_id}/reminders")
+
+    assert fresh.json()[0]["estimated_days_until_due"] == 12
+    assert fresh.headers["ETag"] != first.headers["ETag"]
@@ -0,0 +1,61 @@
+from uuid import uuid4
+
+from app.core.deadlines import ROUTE_DEADLINES_MS
+
+
+def _vehicle_changes(client, stub_db):
+    vehicle_id = uuid4()
+    stub_db.respond("fn_get_vehicle(", [{"id": vehicle_id}])
+    stub_db.respond("fn_get_sync_cursor()", [{"cursor": "1234", "full_resync": True}])
+    return client.get(f"/vehicles/{vehicle_id}/changes")
+
+
+def test_changes_snapshot_with_route_deadline(client, stub_db):
+    # the route has its own statement_timeout, set by the after_begin listener
+    assert "get_vehicle_changes" in ROUTE_DEADLINES_MS
+
+    response = _vehicle_changes(client, stub_db)
+
+    assert response.status_code == 200, response.text
+    assert response.json()["cursor"] == "1234"
+    assert stub_db.isolation_levels == ["REPEATABLE READ"]
+    assert "set_config" in stub_db.statements[0]
+    assert "SET TRANSACTION READ ONLY" in stub_db.statements
+
+
+def test_changes_snapshot_with_rls_context(client, stub_db, user_id, monkeypatch):
+    # RLS context alone, without the route deadline
+    monkeypatch.delitem(ROUTE_DEADLINES_MS, "get_vehicle_changes")
+    monkeypatch.setattr("app.api.deps.settings.db_rls_enabled", True)
+
+    response = _vehicle_changes(client, stub_db)
+
+    assert response.status_code == 200, response.text
+    assert stub_db.isolation_levels == ["REPEATABLE READ"]
+    assert "set_config" in stub_db.statements[0]
+
+
+def test_mutations_lock_each_vehicle_once_before_writing(client, stub_db, monkeypatch):
+    monkeypatch.setattr("app.db.locks.settings.vehicle_write_lock_enabled", True)
+    first, second = sorted((uuid4(), uuid4()), key=str)
+    entry = {"entry_date": "2026-10-01T08:00:00Z", "value_km": 120500}
+    mutations = [
+        {"idempotency_key": "a", "entity": "fuelings", "op": "create", "vehicle_id": str(second), "data": {}},
+        {"idempotency_key": "b", "entity": "odometer_entries", "op": "create", "vehicle_id": str(first), "data": entry},
+        {"idempotency_key": "c", "entity": "fuelings", "op": "create", "vehicle_id": str(second), "data": {}},
+        {"idempotency_key": "d", "entity": "expenses", "op": "create", "vehicle_id": str(uuid4()), "data": {}},
+    ]
+    stub_db.respond("INSERT INTO car_app.idempotency_keys", [{"key": f"sync:{m['idempotency_key']}"} for m in mutations])
+
+    stub_db.respond("fn_create_odometer_entry(", [{"id": uuid4(), "vehicle_id": first, **entry}])
+
+    response = client.post("/sync/mutations", json={"mutations": mutations})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["results"][1]["status_code"] == 201
+    calls = list(zip(stub_db.statements, stub_db.params))
+    locks = [i for i, (sql, _) in enumerate(calls) if "pg_advisory_xact_lock" in sql]
+    writes = [i for i, (sql, _) in enumerate(calls) if "fn_create_" in sql]
+    # one lock per vehicle, in a fixed order, before the first write
+    assert [calls[i][1]["vehicle_id"] for i in locks] == [str(first), str(second)]
+    assert writes and max(locks) < min(writes)
@@ -0,0 +1,49 @@
+from uuid import uuid4
+
+from app.core.deadlines import ROUTE_DEADLINES_MS
+
+from .conftest import histogram_totals
+
+_STATISTICS = {
+    "user_exists": True,
+    "role": "VIEWER",
+    "total_regular": 1200,
+    "total_irregular": 800,
+    "avg_regular": 100,
+    "avg_irregular": 20,
+    "largest_expense": 500,
+    "largest_category": "SERVICE",
+}
+
+
+def _statistics(client, stub_db, row):
+    stub_db.respond("fn_resolve_vehicle_access(", [row])
+    return client.get(f"/vehicles/{uuid4()}/budget/statistics")
+
+
+def test_statistics_resolve_access_in_the_main_query(client, stub_db, monkeypatch):
+    # without the route deadline, whose set_config would add a statement
+    monkeypatch.delitem(ROUTE_DEADLINES_MS, "get_budget_statistics")
+    before = histogram_totals(client, "db_queries_per_request", route="get_budget_statistics")
+
+    response = _statistics(client, stub_db, _STATISTICS)
+
+    assert response.status_code == 200, response.text
+    assert response.json()["largest_expense_category"] == "SERVICE"
+    # baseline: fn_get_vehicle, then the statistics query (2 statements)
+    total, count = histogram_totals(client, "db_queries_per_request", route="get_budget_statistics")
+    assert (total - before[0], count - before[1]) == (1, 1)
+    assert len(stub_db.statements) == 1
+    assert "fn_get_vehicle(" not in stub_db.statements[0]
+
+
+def test_statistics_without_access(client, stub_db):
+    response = _statistics(client, stub_db, {**_STATISTICS, "role": None, "total_regular": None})
+
+    assert response.status_code == 404
+
+
+def test_statistics_for_a_deleted_user(client, stub_db):
+    response = _statistics(client, stub_db, {"user_exists": False, "role": None})
+
+    assert response.status_code == 401
@@ -0,0 +1,22 @@
+from uuid import uuid4
+
+
+def test_add_fuels_checks_access_before_writing(client, stub_db):
+    response = client.post(f"/vehicles/{uuid4()}/fuels", json=[{"fuel": "Petrol", "is_primary": True}])
+
+    assert response.status_code == 404
+    assert not any("fn_add_vehicle_fuels" in sql for sql in stub_db.statements)
+
+
+def test_add_fuels(client, stub_db):
+    vehicle_id = uuid4()
+    stub_db.respond("fn_get_vehicle(", [{"id": vehicle_id}])
+    stub_db.respond("fn_add_vehicle_fuels(", [{"fuel": "Petrol", "is_primary": True}])
+
+    response = client.post(f"/vehicles/{vehicle_id}/fuels", json=[{"fuel": "Petrol", "is_primary": True}])
+
+    assert response.status_code == 201, response.text
+    assert response.json() == [{"fuel": "Petrol", "is_primary": True}]
+    calls = [sql for sql in stub_db.statements if "fn_" in sql]
+    assert len(calls) == 2
+    assert "fn_get_vehicle(" in calls[0] and "fn_add_vehicle_fuels(" in calls[1]
@@ -0,0 +1,161 @@
+SET search_path TO car_app, public;
+
+-- Wersje kolekcji per pojazd (ETag / If-None-Match dla list w API).
+-- Każdy zapis do śledzonej tabeli podbija wersję kolekcji danego pojazdu
+-- wartością z globalnej sekwencji, więc wersja nigdy się nie powtarza.
+
+CREATE SEQUENCE IF NOT EXISTS collection_version_seq;
+
+CREATE TABLE IF NOT EXISTS collection_versions (
+    vehicle_id  UUID NOT NULL,
+    collection  VARCHAR(32) NOT NULL,
+    version     BIGINT NOT NULL,
+    updated_at  TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (vehicle_id, collection)
+);
+
+COMMENT ON TABLE collection_versions IS
+'Change version of a vehicle-scoped collection (vehicle, fuelings, expenses, reminders), bumped by statement-level triggers';
+
+-- 1) Podbicie wersji dla zestawu pojazdów (posortowane - stała kolejność blokad)
+
+CREATE OR REPLACE FUNCTION fn_bump_collection_versions(
+    p_collection  varchar,
+    p_vehicle_ids uuid[]
+)
+RETURNS void
+LANGUAGE sql
+AS $$
+    INSERT INTO collection_versions (vehicle_id, collection, version, updated_at)
+    SELECT ids.vehicle_id, p_collection, nextval('car_app.collection_version_seq'), now()
+    FROM (
+        SELECT DISTINCT unnest(p_vehicle_ids) AS vehicle_id
+    ) ids
+    WHERE ids.vehicle_id IS NOT NULL
+    ORDER BY ids.vehicle_id
+    ON CONFLICT (vehicle_id, collection) DO UPDATE
+        SET version    = EXCLUDED.version,
+            updated_at = EXCLUDED.updated_at;
+$$;
+
+-- 2) Trigger (FOR EACH STATEMENT, tabele przejściowe)
+--    TG_ARGV[0] = nazwa kolekcji, TG_ARGV[1] = kolumna z id pojazdu
+
+CREATE OR REPLACE FUNCTION fn_trg_bump_collection_version()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_ids uuid[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        EXECUTE format('SELECT array_agg(DISTINCT %I) FROM new_rows', TG_ARGV[1]) INTO v_ids;
+    ELSIF TG_OP = 'UPDATE' THEN
+        EXECUTE format(
+            'SELECT array_agg(DISTINCT x) FROM (SELECT %1$I AS x FROM new_rows UNION SELECT %1$I FROM old_rows) t',
+            TG_ARGV[1]
+        ) INTO v_ids;
+    ELSE
+        EXECUTE format('SELECT array_agg(DISTINCT %I) FROM old_rows', TG_ARGV[1]) INTO v_ids;
+    END IF;
+
+    IF v_ids IS NOT NULL THEN
+        PERFORM car_app.fn_bump_collection_versions(TG_ARGV[0], v_ids);
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+
+DO $$
+DECLARE
+    v_target record;
+BEGIN
+    FOR v_target IN
+        SELECT *
+        FROM (VALUES
+            ('vehicles',       'vehicle',   'id'),
+            ('vehicle_shares', 'vehicle',   'vehicle_id'),
+            ('fuelings',       'fuelings',  'vehicle_id'),
+            ('expenses',       'expenses',  'vehicle_id'),
+            ('reminder_rules', 'reminders', 'vehicle_id')
+        ) AS t(table_name, collection, key_column)
+    LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_version_ins ON car_app.%I', v_target.table_name, v_target.table_name);
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_version_upd ON car_app.%I', v_target.table_name, v_target.table_name);
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_version_del ON car_app.%I', v_target.table_name, v_target.table_name);
+
+        EXECUTE format(
+            'CREATE TRIGGER trg_%1$s_version_ins AFTER INSERT ON car_app.%1$I
+             REFERENCING NEW TABLE AS new_rows
+             FOR EACH STATEMENT EXECUTE FUNCTION car_app.fn_trg_bump_collection_version(%2$L, %3$L)',
+            v_target.table_name, v_target.collection, v_target.key_column
+        );
+        EXECUTE format(
+            'CREATE TRIGGER trg_%1$s_version_upd AFTER UPDATE ON car_app.%1$I
+             REFERENCING NEW TABLE AS new_rows OLD TABLE AS old_rows
+             FOR EACH STATEMENT EXECUTE FUNCTION car_app.fn_trg_bump_collection_version(%2$L, %3$L)',
+            v_target.table_name, v_target.collection, v_target.key_column
+        );
+        EXECUTE format(
+            'CREATE TRIGGER trg_%1$s_version_del AFTER DELETE ON car_app.%1$I
+             REFERENCING OLD TABLE AS old_rows
+             FOR EACH STATEMENT EXECUTE FUNCTION car_app.fn_trg_bump_collection_version(%2$L, %3$L)',
+            v_target.table_name, v_target.collection, v_target.key_column
+        );
+    END LOOP;
+END
+$$;
+
+-- 3) Wersja kolekcji pojazdu (zwraca wiersz tylko gdy użytkownik ma dostęp:
+--    OWNER lub dowolna rola w vehicle_shares)
+
+CREATE OR REPLACE FUNCTION fn_get_collection_version(
+    p_user_id    uuid,
+    p_vehicle_id uuid,
+    p_collection varchar
+)
+RETURNS TABLE (
+    version bigint
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT COALESCE(cv.version, 0)
+    FROM vehicles v
+    LEFT JOIN vehicle_shares s
+      ON s.vehicle_id = v.id
+     AND s.user_id = p_user_id
+    LEFT JOIN collection_versions cv
+      ON cv.vehicle_id = v.id
+     AND cv.collection = p_collection
+    WHERE v.id = p_vehicle_id
+      AND (
+            v.owner_id = p_user_id
+         OR s.user_id IS NOT NULL
+      )
+$$;
+
+-- 4) Skrót wersji listy pojazdów użytkownika (zbiór pojazdów + rola + wersja)
+
+CREATE OR REPLACE FUNCTION fn_get_user_vehicles_version(
+    p_user_id uuid
+)
+RETURNS text
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT md5(COALESCE(string_agg(
+        v.id::text || ':' || COALESCE(s.role::text, 'OWNER') || ':' || COALESCE(cv.version, 0)::text,
+        ',' ORDER BY v.id
+    ), ''))
+    FROM vehicles v
+    LEFT JOIN vehicle_shares s
+      ON s.vehicle_id = v.id
+     AND s.user_id = p_user_id
+    LEFT JOIN collection_versions cv
+      ON cv.vehicle_id = v.id
+     AND cv.collection = 'vehicle'
+    WHERE v.owner_id = p_user_id
+       OR s.user_id IS NOT NULL
+$$;
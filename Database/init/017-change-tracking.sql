@@ -0,0 +1,172 @@
+SET search_path TO car_app, public;
+
+-- Śledzenie zmian dla synchronizacji przyrostowej (GET /vehicles/{id}/changes).
+--
+-- Każdy wiersz śledzonych tabel ma change_xid = id transakcji, która go
+-- ostatnio zapisała (xid8, rośnie monotonicznie). Usunięcia trafiają do
+-- deleted_records (tombstones). Kursor zwracany klientowi to xmin migawki
+-- odczytu: wszystkie transakcje z xid < xmin były już zakończone i widoczne,
+-- więc następne pobranie zwraca wiersze z change_xid >= kursor.
+
+CREATE TABLE IF NOT EXISTS deleted_records (
+    id          BIGSERIAL PRIMARY KEY,
+    entity      VARCHAR(32) NOT NULL,
+    record_id   UUID NOT NULL,
+    vehicle_id  UUID NOT NULL,
+    parent_id   UUID,
+    deleted_xid xid8 NOT NULL DEFAULT pg_current_xact_id(),
+    deleted_at  TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_deleted_records_vehicle_xid
+    ON deleted_records(vehicle_id, deleted_xid);
+
+CREATE INDEX IF NOT EXISTS idx_deleted_records_deleted_at
+    ON deleted_records(deleted_at);
+
+-- Najstarszy kursor, dla którego tombstones są kompletne (po czyszczeniu).
+CREATE TABLE IF NOT EXISTS sync_horizon (
+    id                BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    pruned_before_xid xid8 NOT NULL DEFAULT '0'::xid8
+);
+
+INSERT INTO sync_horizon (id) VALUES (TRUE) ON CONFLICT (id) DO NOTHING;
+
+-- 1) Kolumna change_xid + trigger aktualizacji
+
+CREATE OR REPLACE FUNCTION fn_trg_touch_change_xid()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    NEW.change_xid := pg_current_xact_id();
+    RETURN NEW;
+END;
+$$;
+
+-- 2) Tombstones (FOR EACH STATEMENT, tabela przejściowa old_rows).
+--    Pozycje serwisu usunięte kaskadowo razem z serwisem nie dostają
+--    własnych tombstones - tombstone serwisu obejmuje jego pozycje.
+
+CREATE OR REPLACE FUNCTION fn_trg_log_deleted_records()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'service_items' THEN
+        INSERT INTO car_app.deleted_records (entity, record_id, vehicle_id, parent_id)
+        SELECT TG_ARGV[0], o.id, s.vehicle_id, o.service_id
+        FROM old_rows o
+        JOIN car_app.services s ON s.id = o.service_id;
+    ELSE
+        INSERT INTO car_app.deleted_records (entity, record_id, vehicle_id)
+        SELECT TG_ARGV[0], o.id, o.vehicle_id
+        FROM old_rows o;
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+
+DO $$
+DECLARE
+    v_target record;
+BEGIN
+    FOR v_target IN
+        SELECT *
+        FROM (VALUES
+            ('fuelings',         'fuelings',         'vehicle_id'),
+            ('services',         'services',         'vehicle_id'),
+            ('service_items',    'service_items',    'service_id'),
+            ('expenses',         'expenses',         'vehicle_id'),
+            ('issues',           'issues',           'vehicle_id'),
+            ('reminder_rules',   'reminders',        'vehicle_id'),
+            ('odometer_entries', 'odometer_entries', 'vehicle_id')
+        ) AS t(table_name, entity, scope_column)
+    LOOP
+        EXECUTE format(
+            'ALTER TABLE car_app.%I ADD COLUMN IF NOT EXISTS change_xid xid8 NOT NULL DEFAULT pg_current_xact_id()',
+            v_target.table_name
+        );
+        EXECUTE format(
+            'CREATE INDEX IF NOT EXISTS idx_%1$s_change_xid ON car_app.%1$I(%2$I, change_xid)',
+            v_target.table_name, v_target.scope_column
+        );
+
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_change_xid ON car_app.%I', v_target.table_name, v_target.table_name);
+        EXECUTE format(
+            'CREATE TRIGGER trg_%1$s_change_xid BEFORE UPDATE ON car_app.%1$I
+             FOR EACH ROW EXECUTE FUNCTION car_app.fn_trg_touch_change_xid()',
+            v_target.table_name
+        );
+
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_tombstone ON car_app.%I', v_target.table_name, v_target.table_name);
+        EXECUTE format(
+            'CREATE TRIGGER trg_%1$s_tombstone AFTER DELETE ON car_app.%1$I
+             REFERENCING OLD TABLE AS old_rows
+             FOR EACH STATEMENT EXECUTE FUNCTION car_app.fn_trg_log_deleted_records(%2$L)',
+            v_target.table_name, v_target.entity
+        );
+    END LOOP;
+END
+$$;
+
+-- 3) Bieżący kursor synchronizacji (xmin migawki bieżącego zapytania)
+
+CREATE OR REPLACE FUNCTION fn_get_sync_cursor()
+RETURNS TABLE (
+    sync_cursor       xid8,
+    pruned_before_xid xid8
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT pg_snapshot_xmin(pg_current_snapshot()), h.pruned_before_xid
+    FROM sync_horizon h
+$$;
+
+-- 4) Czyszczenie starych tombstones; przesuwa horyzont, klient ze starszym
+--    kursorem musi wykonać pełną synchronizację.
+
+CREATE OR REPLACE FUNCTION fn_prune_deleted_records(
+    p_keep interval DEFAULT interval '90 days'
+)
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_horizon xid8;
+    v_count   integer;
+BEGIN
+    SELECT max(deleted_xid)
+    INTO v_horizon
+    FROM deleted_records
+    WHERE deleted_at < now() - p_keep;
+
+    IF v_horizon IS NULL THEN
+        RETURN 0;
+    END IF;
+
+    UPDATE sync_horizon
+    SET pruned_before_xid = GREATEST(pruned_before_xid, v_horizon);
+
+    DELETE FROM deleted_records
+    WHERE deleted_xid <= v_horizon;
+
+    GET DIAGNOSTICS v_count = ROW_COUNT;
+    RETURN v_count;
+END;
+$$;
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_cron') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_cron;
+        PERFORM cron.schedule(
+            'daily_prune_deleted_records',
+            '30 3 * * *',
+            $SQL$SELECT car_app.fn_prune_deleted_records();$SQL$
+        );
+    END IF;
+END;
+$$;
@@ -0,0 +1,18 @@
+SET search_path TO car_app, public;
+
+-- Klucze idempotencji (POST /sync/mutations).
+-- Klucz jest rezerwowany (INSERT ... ON CONFLICT DO NOTHING) w tej samej
+-- transakcji co zapis danych, a wynik operacji zapisywany obok - ponowiona
+-- paczka dostaje zapisane wyniki bez ponownego wykonania operacji.
+
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    user_id         UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    key             VARCHAR(128) NOT NULL,
+    status_code     INT,
+    response        JSONB,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (user_id, key)
+);
+
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_created_at
+    ON idempotency_keys(created_at);
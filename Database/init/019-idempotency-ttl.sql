@@ -0,0 +1,49 @@
+SET search_path TO car_app, public;
+
+-- Nagłówek Idempotency-Key na endpointach tworzenia (POST).
+-- Klucze z nagłówka trafiają do tej samej tabeli co klucze /sync/mutations,
+-- z prefiksem endpointu ("create_fueling:<klucz>"), stąd dłuższa kolumna.
+-- request_hash wykrywa użycie tego samego klucza z inną treścią żądania,
+-- expires_at ogranicza czas przechowywania (czyszczenie co godzinę).
+
+ALTER TABLE idempotency_keys
+    ALTER COLUMN key TYPE VARCHAR(255);
+
+ALTER TABLE idempotency_keys
+    ADD COLUMN IF NOT EXISTS request_hash CHAR(64);
+
+ALTER TABLE idempotency_keys
+    ADD COLUMN IF NOT EXISTS expires_at TIMESTAMPTZ NOT NULL DEFAULT now() + interval '24 hours';
+
+DROP INDEX IF EXISTS idx_idempotency_keys_created_at;
+
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires_at
+    ON idempotency_keys(expires_at);
+
+CREATE OR REPLACE FUNCTION fn_prune_idempotency_keys()
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_count integer;
+BEGIN
+    DELETE FROM idempotency_keys
+    WHERE expires_at < now();
+
+    GET DIAGNOSTICS v_count = ROW_COUNT;
+    RETURN v_count;
+END;
+$$;
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_cron') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_cron;
+        PERFORM cron.schedule(
+            'hourly_prune_idempotency_keys',
+            '15 * * * *',
+            $SQL$SELECT car_app.fn_prune_idempotency_keys();$SQL$
+        );
+    END IF;
+END;
+$$;
@@ -0,0 +1,68 @@
+SET search_path TO car_app, public;
+
+-- Import kopii zapasowych z innych aplikacji (Fuelio, aCar, Drivvo).
+-- Plik jest przetwarzany w tle, strumieniowo i paczkami; postęp i wynik
+-- zadania są zapisywane w import_jobs (odczyt przez GET /import-jobs/{id}).
+
+CREATE TABLE IF NOT EXISTS import_jobs (
+    id                          UUID PRIMARY KEY,
+    user_id                     UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    vehicle_id                  UUID NOT NULL REFERENCES vehicles(id) ON DELETE CASCADE,
+    source                      VARCHAR(32) NOT NULL,
+    file_name                   VARCHAR(255),
+    status                      VARCHAR(16) NOT NULL DEFAULT 'PENDING',
+    total_bytes                 BIGINT,
+    processed_bytes             BIGINT NOT NULL DEFAULT 0,
+    processed_rows              INT NOT NULL DEFAULT 0,
+    fuelings_imported           INT NOT NULL DEFAULT 0,
+    services_imported           INT NOT NULL DEFAULT 0,
+    expenses_imported           INT NOT NULL DEFAULT 0,
+    odometer_entries_imported   INT NOT NULL DEFAULT 0,
+    skipped_rows                INT NOT NULL DEFAULT 0,
+    errors                      JSONB NOT NULL DEFAULT '[]'::jsonb,
+    error                       TEXT,
+    created_at                  TIMESTAMPTZ NOT NULL DEFAULT now(),
+    started_at                  TIMESTAMPTZ,
+    finished_at                 TIMESTAMPTZ,
+    updated_at                  TIMESTAMPTZ,
+    CONSTRAINT chk_import_job_status CHECK (status IN ('PENDING', 'RUNNING', 'COMPLETED', 'FAILED'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_import_jobs_user_created_at
+    ON import_jobs(user_id, created_at DESC);
+
+-- Zadania przerwane restartem API nie zostaną dokończone - oznaczamy je jako FAILED.
+CREATE OR REPLACE FUNCTION fn_fail_stale_import_jobs(
+    p_older_than interval DEFAULT interval '1 hour'
+)
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_count integer;
+BEGIN
+    UPDATE import_jobs
+    SET status = 'FAILED',
+        error = 'Import interrupted.',
+        finished_at = now(),
+        updated_at = now()
+    WHERE status IN ('PENDING', 'RUNNING')
+      AND COALESCE(updated_at, created_at) < now() - p_older_than;
+
+    GET DIAGNOSTICS v_count = ROW_COUNT;
+    RETURN v_count;
+END;
+$$;
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_cron') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_cron;
+        PERFORM cron.schedule(
+            'hourly_fail_stale_import_jobs',
+            '30 * * * *',
+            $SQL$SELECT car_app.fn_fail_stale_import_jobs();$SQL$
+        );
+    END IF;
+END;
+$$;
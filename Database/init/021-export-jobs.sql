@@ -0,0 +1,60 @@
+SET search_path TO car_app, public;
+
+-- Asynchroniczny eksport (POST /vehicles/{id}/export-jobs).
+-- Wynik trafia do lokalnego magazynu plików adresowanego treścią (SHA-256);
+-- tutaj zapisujemy tylko status zadania i skrót pliku. Pobieranie obsługuje
+-- nagłówki Range / If-Range, więc przerwane pobieranie nie uruchamia
+-- ponownie zapytania. Zadania (i pliki) wygasają po expires_at.
+
+CREATE TABLE IF NOT EXISTS export_jobs (
+    id              UUID PRIMARY KEY,
+    user_id         UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    vehicle_id      UUID NOT NULL REFERENCES vehicles(id) ON DELETE CASCADE,
+    data_type       VARCHAR(16) NOT NULL,
+    format          VARCHAR(16) NOT NULL,
+    start_date      DATE NOT NULL,
+    end_date        DATE NOT NULL,
+    status          VARCHAR(16) NOT NULL DEFAULT 'PENDING',
+    file_sha256     CHAR(64),
+    file_size       BIGINT,
+    error           TEXT,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT now(),
+    finished_at     TIMESTAMPTZ,
+    expires_at      TIMESTAMPTZ NOT NULL DEFAULT now() + interval '7 days',
+    CONSTRAINT chk_export_job_status CHECK (status IN ('PENDING', 'RUNNING', 'COMPLETED', 'FAILED')),
+    CONSTRAINT chk_export_job_dates CHECK (start_date <= end_date)
+);
+
+CREATE INDEX IF NOT EXISTS idx_export_jobs_user_created_at
+    ON export_jobs(user_id, created_at DESC);
+
+CREATE INDEX IF NOT EXISTS idx_export_jobs_expires_at
+    ON export_jobs(expires_at);
+
+CREATE OR REPLACE FUNCTION fn_prune_export_jobs()
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_count integer;
+BEGIN
+    DELETE FROM export_jobs
+    WHERE expires_at < now();
+
+    GET DIAGNOSTICS v_count = ROW_COUNT;
+    RETURN v_count;
+END;
+$$;
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_cron') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_cron;
+        PERFORM cron.schedule(
+            'hourly_prune_export_jobs',
+            '45 * * * *',
+            $SQL$SELECT car_app.fn_prune_export_jobs();$SQL$
+        );
+    END IF;
+END;
+$$;
@@ -0,0 +1,145 @@
+SET search_path TO car_app, public;
+
+-- Podsumowanie floty: KPI wszystkich pojazdów użytkownika (OWNER + shares)
+-- w jednym zapytaniu zbiorczym zamiast wywołań per pojazd.
+--
+-- - latest_odometer_km: największy przebieg z tankowań, serwisów i wpisów
+--   licznika (LATERAL ... ORDER BY odometer_km DESC LIMIT 1 po indeksach
+--   (vehicle_id, odometer_km)),
+-- - avg_monthly_spend: średnia z 12 pełnych miesięcy z mv_expenses_monthly
+--   (odświeżany nocą, więc zamknięte miesiące są w nim kompletne),
+-- - month_to_date_spend: bieżący miesiąc liczony z expenses (jeszcze nie
+--   ma go w widoku),
+-- - due/overdue_reminders: aktywne przypomnienia wymagalne w ciągu
+--   p_days_ahead dni albo po przekroczeniu przebiegu.
+
+CREATE OR REPLACE FUNCTION car_app.fn_get_fleet_summary(
+    p_user_id    uuid,
+    p_days_ahead int DEFAULT 30
+)
+RETURNS TABLE (
+    vehicle_id          uuid,
+    name                varchar,
+    plate               varchar,
+    model               varchar,
+    production_year     integer,
+    user_role           varchar,
+    latest_odometer_km  numeric(10,1),
+    last_activity_at    timestamptz,
+    month_to_date_spend numeric,
+    avg_monthly_spend   numeric,
+    due_reminders       integer,
+    overdue_reminders   integer,
+    next_due_date       date
+)
+LANGUAGE sql
+STABLE
+AS $$
+    WITH fleet AS (
+        SELECT
+            v.id,
+            v.name,
+            v.plate,
+            v.model,
+            v.production_year,
+            v.initial_odometer_km,
+            CASE
+                WHEN v.owner_id = p_user_id THEN 'OWNER'
+                ELSE COALESCE(s.role::varchar, 'VIEWER')
+            END::varchar AS user_role
+        FROM vehicles v
+        LEFT JOIN vehicle_shares s
+          ON s.vehicle_id = v.id
+         AND s.user_id = p_user_id
+        WHERE v.owner_id = p_user_id
+           OR s.user_id IS NOT NULL
+    ),
+    odometer AS (
+        SELECT
+            f.id AS vehicle_id,
+            GREATEST(fu.odometer_km, se.odometer_km, oe.value_km, f.initial_odometer_km) AS latest_odometer_km,
+            GREATEST(fu_last.filled_at, se_last.service_date::timestamptz, oe_last.entry_date) AS last_activity_at
+        FROM fleet f
+        LEFT JOIN LATERAL (
+            SELECT x.odometer_km FROM fuelings x
+            WHERE x.vehicle_id = f.id AND x.odometer_km IS NOT NULL
+            ORDER BY x.odometer_km DESC LIMIT 1
+        ) fu ON TRUE
+        LEFT JOIN LATERAL (
+            SELECT x.odometer_km FROM services x
+            WHERE x.vehicle_id = f.id AND x.odometer_km IS NOT NULL
+            ORDER BY x.odometer_km DESC LIMIT 1
+        ) se ON TRUE
+        LEFT JOIN LATERAL (
+            SELECT x.value_km FROM odometer_entries x
+            WHERE x.vehicle_id = f.id
+            ORDER BY x.value_km DESC LIMIT 1
+        ) oe ON TRUE
+        LEFT JOIN LATERAL (
+            SELECT x.filled_at FROM fuelings x
+            WHERE x.vehicle_id = f.id
+            ORDER BY x.filled_at DESC LIMIT 1
+        ) fu_last ON TRUE
+        LEFT JOIN LATERAL (
+            SELECT x.service_date FROM services x
+            WHERE x.vehicle_id = f.id
+            ORDER BY x.service_date DESC LIMIT 1
+        ) se_last ON TRUE
+        LEFT JOIN LATERAL (
+            SELECT x.entry_date FROM odometer_entries x
+            WHERE x.vehicle_id = f.id
+            ORDER BY x.entry_date DESC LIMIT 1
+        ) oe_last ON TRUE
+    ),
+    history AS (
+        SELECT m.vehicle_id, SUM(m.total_amount) / 12 AS avg_monthly_spend
+        FROM mv_expenses_monthly m
+        WHERE m.vehicle_id IN (SELECT id FROM fleet)
+          AND m.month >= (date_trunc('month', current_date) - interval '12 months')::date
+          AND m.month <  date_trunc('month', current_date)::date
+        GROUP BY m.vehicle_id
+    ),
+    current_month AS (
+        SELECT e.vehicle_id, SUM(e.amount) AS month_to_date_spend
+        FROM expenses e
+        WHERE e.vehicle_id IN (SELECT id FROM fleet)
+          AND e.expense_date >= date_trunc('month', current_date)::date
+        GROUP BY e.vehicle_id
+    ),
+    reminders AS (
+        SELECT
+            r.vehicle_id,
+            COUNT(*) FILTER (
+                WHERE r.next_due_date <= current_date + p_days_ahead
+                   OR r.next_due_odometer_km <= o.latest_odometer_km
+            )::int AS due_reminders,
+            COUNT(*) FILTER (
+                WHERE r.next_due_date < current_date
+                   OR r.next_due_odometer_km <= o.latest_odometer_km
+            )::int AS overdue_reminders,
+            MIN(r.next_due_date) AS next_due_date
+        FROM reminder_rules r
+        JOIN odometer o ON o.vehicle_id = r.vehicle_id
+        WHERE r.status = 'ACTIVE'
+        GROUP BY r.vehicle_id
+    )
+    SELECT
+        f.id,
+        f.name,
+        f.plate,
+        f.model,
+        f.production_year,
+        f.user_role,
+        o.latest_odometer_km,
+        o.last_activity_at,
+        COALESCE(c.month_to_date_spend, 0),
+        ROUND(COALESCE(h.avg_monthly_spend, 0), 2),
+        COALESCE(r.due_reminders, 0),
+        COALESCE(r.overdue_reminders, 0),
+        r.next_due_date
+    FROM fleet f
+    JOIN odometer o ON o.vehicle_id = f.id
+    LEFT JOIN history h ON h.vehicle_id = f.id
+    LEFT JOIN current_month c ON c.vehicle_id = f.id
+    LEFT JOIN reminders r ON r.vehicle_id = f.id
+$$;
@@ -0,0 +1,175 @@
+SET search_path TO car_app, public;
+
+-- Prognoza budżetu dla wszystkich pojazdów użytkownika w jednym wywołaniu,
+-- z cache prognoz per pojazd.
+--
+-- Prognoza pojazdu zależy od wydatków, tankowań (przebieg), przypomnień,
+-- serwisów (koszty) i wpisów licznika (aktualny przebieg) oraz od bieżącej
+-- daty. Wpis w cache jest ważny, dopóki zgadzają się wersje tych kolekcji
+-- (collection_versions) i data wyliczenia.
+
+-- 1) Wersje kolekcji także dla serwisów i wpisów licznika
+
+DO $$
+DECLARE
+    v_target record;
+BEGIN
+    FOR v_target IN
+        SELECT *
+        FROM (VALUES
+            ('services',         'services', 'vehicle_id'),
+            ('odometer_entries', 'odometer', 'vehicle_id')
+        ) AS t(table_name, collection, key_column)
+    LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_version_ins ON car_app.%I', v_target.table_name, v_target.table_name);
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_version_upd ON car_app.%I', v_target.table_name, v_target.table_name);
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_version_del ON car_app.%I', v_target.table_name, v_target.table_name);
+
+        EXECUTE format(
+            'CREATE TRIGGER trg_%1$s_version_ins AFTER INSERT ON car_app.%1$I
+             REFERENCING NEW TABLE AS new_rows
+             FOR EACH STATEMENT EXECUTE FUNCTION car_app.fn_trg_bump_collection_version(%2$L, %3$L)',
+            v_target.table_name, v_target.collection, v_target.key_column
+        );
+        EXECUTE format(
+            'CREATE TRIGGER trg_%1$s_version_upd AFTER UPDATE ON car_app.%1$I
+             REFERENCING NEW TABLE AS new_rows OLD TABLE AS old_rows
+             FOR EACH STATEMENT EXECUTE FUNCTION car_app.fn_trg_bump_collection_version(%2$L, %3$L)',
+            v_target.table_name, v_target.collection, v_target.key_column
+        );
+        EXECUTE format(
+            'CREATE TRIGGER trg_%1$s_version_del AFTER DELETE ON car_app.%1$I
+             REFERENCING OLD TABLE AS old_rows
+             FOR EACH STATEMENT EXECUTE FUNCTION car_app.fn_trg_bump_collection_version(%2$L, %3$L)',
+            v_target.table_name, v_target.collection, v_target.key_column
+        );
+    END LOOP;
+END
+$$;
+
+COMMENT ON TABLE collection_versions IS
+'Change version of a vehicle-scoped collection (vehicle, fuelings, expenses, reminders, services, odometer), bumped by statement-level triggers';
+
+-- 2) Cache prognoz
+
+CREATE TABLE IF NOT EXISTS budget_forecast_cache (
+    vehicle_id          UUID NOT NULL REFERENCES vehicles(id) ON DELETE CASCADE,
+    months_ahead        INT NOT NULL,
+    include_irregular   BOOLEAN NOT NULL,
+    computed_on         DATE NOT NULL,
+    source_versions     TEXT NOT NULL,
+    avg_monthly_mileage NUMERIC NOT NULL,
+    forecast            JSONB NOT NULL,
+    computed_at         TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (vehicle_id, months_ahead, include_irregular)
+);
+
+COMMENT ON TABLE budget_forecast_cache IS
+'Cached fn_predict_monthly_budget result per vehicle; valid while computed_on = current_date and source_versions match';
+
+-- 3) Odcisk wersji kolekcji, od których zależy prognoza
+
+CREATE OR REPLACE FUNCTION fn_get_budget_source_versions(
+    p_vehicle_id uuid
+)
+RETURNS text
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT string_agg(c.collection || ':' || COALESCE(cv.version, 0)::text, ',' ORDER BY c.collection)
+    FROM (VALUES ('expenses'), ('fuelings'), ('odometer'), ('reminders'), ('services')) AS c(collection)
+    LEFT JOIN collection_versions cv
+      ON cv.vehicle_id = p_vehicle_id
+     AND cv.collection = c.collection
+$$;
+
+-- 4) Prognoza dla wszystkich pojazdów użytkownika (OWNER + shares).
+--    Pojazdy bez ważnego wpisu w cache są przeliczane jednym INSERT ... SELECT
+--    i zapisywane w cache; pozostałe są zwracane z cache.
+
+CREATE OR REPLACE FUNCTION fn_predict_user_budget(
+    p_user_id           uuid,
+    p_months_ahead      int DEFAULT 6,
+    p_include_irregular boolean DEFAULT FALSE
+)
+RETURNS TABLE (
+    vehicle_id          uuid,
+    vehicle_name        varchar,
+    avg_monthly_mileage numeric,
+    forecast            jsonb,
+    from_cache          boolean
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_recomputed uuid[];
+BEGIN
+    WITH fleet AS (
+        SELECT v.id AS fleet_vehicle_id,
+               car_app.fn_get_budget_source_versions(v.id) AS fleet_versions
+        FROM vehicles v
+        LEFT JOIN vehicle_shares s
+          ON s.vehicle_id = v.id
+         AND s.user_id = p_user_id
+        WHERE v.owner_id = p_user_id
+           OR s.user_id IS NOT NULL
+    ),
+    recomputed AS (
+        INSERT INTO budget_forecast_cache AS c (
+            vehicle_id, months_ahead, include_irregular, computed_on,
+            source_versions, avg_monthly_mileage, forecast, computed_at
+        )
+        SELECT
+            f.fleet_vehicle_id,
+            p_months_ahead,
+            p_include_irregular,
+            current_date,
+            f.fleet_versions,
+            car_app.fn_get_avg_monthly_mileage(f.fleet_vehicle_id),
+            (
+                SELECT COALESCE(jsonb_agg(to_jsonb(b) ORDER BY b.month), '[]'::jsonb)
+                FROM car_app.fn_predict_monthly_budget(f.fleet_vehicle_id, p_months_ahead, p_include_irregular) b
+            ),
+            now()
+        FROM fleet f
+        LEFT JOIN budget_forecast_cache cached
+          ON cached.vehicle_id = f.fleet_vehicle_id
+         AND cached.months_ahead = p_months_ahead
+         AND cached.include_irregular = p_include_irregular
+        WHERE cached.vehicle_id IS NULL
+           OR cached.computed_on <> current_date
+           OR cached.source_versions <> f.fleet_versions
+        ORDER BY f.fleet_vehicle_id
+        ON CONFLICT ON CONSTRAINT budget_forecast_cache_pkey DO UPDATE
+            SET computed_on         = EXCLUDED.computed_on,
+                source_versions     = EXCLUDED.source_versions,
+                avg_monthly_mileage = EXCLUDED.avg_monthly_mileage,
+                forecast            = EXCLUDED.forecast,
+                computed_at         = EXCLUDED.computed_at
+        RETURNING c.vehicle_id
+    )
+    SELECT array_agg(r.vehicle_id) INTO v_recomputed FROM recomputed r;
+
+    RETURN QUERY
+    SELECT
+        v.id,
+        v.name,
+        c.avg_monthly_mileage,
+        c.forecast,
+        NOT (v.id = ANY(COALESCE(v_recomputed, '{}')))
+    FROM vehicles v
+    LEFT JOIN vehicle_shares s
+      ON s.vehicle_id = v.id
+     AND s.user_id = p_user_id
+    JOIN budget_forecast_cache c
+      ON c.vehicle_id = v.id
+     AND c.months_ahead = p_months_ahead
+     AND c.include_irregular = p_include_irregular
+    WHERE v.owner_id = p_user_id
+       OR s.user_id IS NOT NULL
+    ORDER BY v.name, v.id;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION car_app.fn_get_budget_source_versions TO car_user;
+GRANT EXECUTE ON FUNCTION car_app.fn_predict_user_budget TO car_user;
@@ -0,0 +1,343 @@
+SET search_path TO car_app, public;
+
+-- Wspólny model przebiegu: jedna, odporna na błędy odczytów estymata km/dzień
+-- per pojazd, używana przez budżet (fn_get_avg_monthly_mileage),
+-- przypomnienia (fn_estimate_days_until_km_reminder, fn_is_reminder_due_soon)
+-- i endpoint przebiegu.
+--
+-- Model: oś czasu odczytów licznika (tankowania, serwisy, wpisy licznika)
+-- dzielona jest na odcinki między kolejnymi odczytami (co najmniej 1 dzień,
+-- licznik nie może się cofnąć). Tempo odcinka (km/dzień) wchodzi do średniej
+-- wykładniczej z wagą zależną od długości odcinka (okres półtrwania 90 dni),
+-- a po kilku odcinkach jest przycinane do średnia ± 3 * średnie odchylenie.
+-- Odcinek daleko poza tym pasmem (np. literówka w przebiegu) jest odrzucany
+-- bez przesuwania punktu odniesienia - najwyżej dwa razy z rzędu, żeby
+-- rzeczywista zmiana stylu jazdy w końcu została uwzględniona.
+--
+-- Stan modelu jest trzymany w vehicle_mileage_rates i aktualizowany
+-- przyrostowo przez triggery: nowe odczyty późniejsze niż ostatni
+-- uwzględniony są dokładane do stanu, pozostałe zmiany (odczyt wsteczny,
+-- UPDATE, DELETE) przeliczają model od początku.
+
+CREATE TABLE IF NOT EXISTS vehicle_mileage_rates (
+    vehicle_id      UUID PRIMARY KEY REFERENCES vehicles(id) ON DELETE CASCADE,
+    km_per_day      NUMERIC NOT NULL,
+    deviation       NUMERIC NOT NULL,
+    segments        INT NOT NULL,
+    anchor_at       TIMESTAMPTZ NOT NULL,
+    anchor_km       NUMERIC(10,1) NOT NULL,
+    updated_at      TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+COMMENT ON TABLE vehicle_mileage_rates IS
+'Incrementally maintained robust EWMA of km/day per vehicle; anchor_* is the last odometer reading folded into the estimate';
+
+-- 1) Oś czasu odczytów licznika pojazdu
+
+CREATE OR REPLACE FUNCTION fn_get_odometer_timeline(
+    p_vehicle_id uuid,
+    p_after      timestamptz DEFAULT NULL
+)
+RETURNS TABLE (
+    entry_at    timestamptz,
+    odometer_km numeric
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT t.entry_at, t.odometer_km
+    FROM (
+        SELECT f.filled_at AS entry_at, f.odometer_km
+        FROM fuelings f
+        WHERE f.vehicle_id = p_vehicle_id
+          AND f.odometer_km IS NOT NULL
+        UNION ALL
+        SELECT s.service_date::timestamptz, s.odometer_km
+        FROM services s
+        WHERE s.vehicle_id = p_vehicle_id
+          AND s.odometer_km IS NOT NULL
+        UNION ALL
+        SELECT e.entry_date, e.value_km
+        FROM odometer_entries e
+        WHERE e.vehicle_id = p_vehicle_id
+    ) t
+    WHERE p_after IS NULL OR t.entry_at > p_after
+    ORDER BY t.entry_at, t.odometer_km
+$$;
+
+-- 2) Aktualizacja modelu pojazdu
+--    p_changed_from = najwcześniejszy nowy odczyt (INSERT); NULL = pełne przeliczenie
+
+CREATE OR REPLACE FUNCTION fn_refresh_mileage_rate(
+    p_vehicle_id   uuid,
+    p_changed_from timestamptz DEFAULT NULL
+)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    c_half_life_days CONSTANT numeric := 90;
+    c_min_segment_days CONSTANT numeric := 1;
+    c_robust_after CONSTANT int := 3;
+    c_max_rejected CONSTANT int := 2;
+    v_state vehicle_mileage_rates%ROWTYPE;
+    v_point record;
+    v_days numeric;
+    v_rate numeric;
+    v_alpha numeric;
+    v_band numeric;
+    v_after timestamptz;
+    v_rejected int := 0;
+BEGIN
+    SELECT * INTO v_state
+    FROM vehicle_mileage_rates
+    WHERE vehicle_id = p_vehicle_id
+    FOR UPDATE;
+
+    IF FOUND AND p_changed_from IS NOT NULL AND p_changed_from > v_state.anchor_at THEN
+        v_after := v_state.anchor_at;
+    ELSE
+        v_state := NULL;
+        v_after := NULL;
+    END IF;
+
+    FOR v_point IN
+        SELECT * FROM car_app.fn_get_odometer_timeline(p_vehicle_id, v_after)
+    LOOP
+        IF v_state.anchor_at IS NULL THEN
+            v_state.vehicle_id := p_vehicle_id;
+            v_state.segments := 0;
+            v_state.km_per_day := 0;
+            v_state.deviation := 0;
+            v_state.anchor_at := v_point.entry_at;
+            v_state.anchor_km := v_point.odometer_km;
+            CONTINUE;
+        END IF;
+
+        -- licznik się cofnął (błędny odczyt) - pomijamy
+        IF v_point.odometer_km < v_state.anchor_km THEN
+            CONTINUE;
+        END IF;
+
+        v_days := EXTRACT(EPOCH FROM (v_point.entry_at - v_state.anchor_at)) / 86400.0;
+        -- zbyt krótki odcinek - przebieg doliczy się do następnego
+        IF v_days < c_min_segment_days THEN
+            CONTINUE;
+        END IF;
+
+        v_rate := (v_point.odometer_km - v_state.anchor_km) / v_days;
+
+        IF v_state.segments = 0 THEN
+            v_state.km_per_day := v_rate;
+            v_state.deviation := 0;
+        ELSE
+            IF v_state.segments >= c_robust_after THEN
+                v_band := 3 * GREATEST(v_state.deviation, 0.1 * v_state.km_per_day, 1);
+                IF abs(v_rate - v_state.km_per_day) > 3 * v_band AND v_rejected < c_max_rejected THEN
+                    v_rejected := v_rejected + 1;
+                    CONTINUE;
+                END IF;
+                v_rate := LEAST(GREATEST(v_rate, v_state.km_per_day - v_band), v_state.km_per_day + v_band);
+            END IF;
+
+            v_alpha := 1 - exp(-LEAST(v_days, 3650) * ln(2) / c_half_life_days);
+            v_state.deviation := (1 - v_alpha) * v_state.deviation + v_alpha * abs(v_rate - v_state.km_per_day);
+            v_state.km_per_day := (1 - v_alpha) * v_state.km_per_day + v_alpha * v_rate;
+        END IF;
+
+        v_state.segments := v_state.segments + 1;
+        v_rejected := 0;
+        v_state.anchor_at := v_point.entry_at;
+        v_state.anchor_km := v_point.odometer_km;
+    END LOOP;
+
+    IF v_state.anchor_at IS NULL THEN
+        DELETE FROM vehicle_mileage_rates WHERE vehicle_id = p_vehicle_id;
+        RETURN;
+    END IF;
+
+    INSERT INTO vehicle_mileage_rates AS r (
+        vehicle_id, km_per_day, deviation, segments, anchor_at, anchor_km, updated_at
+    )
+    VALUES (
+        p_vehicle_id, v_state.km_per_day, v_state.deviation, v_state.segments,
+        v_state.anchor_at, v_state.anchor_km, now()
+    )
+    ON CONFLICT ON CONSTRAINT vehicle_mileage_rates_pkey DO UPDATE
+        SET km_per_day = EXCLUDED.km_per_day,
+            deviation  = EXCLUDED.deviation,
+            segments   = EXCLUDED.segments,
+            anchor_at  = EXCLUDED.anchor_at,
+            anchor_km  = EXCLUDED.anchor_km,
+            updated_at = EXCLUDED.updated_at;
+END;
+$$;
+
+-- 3) Trigger (FOR EACH STATEMENT, tabele przejściowe)
+--    TG_ARGV[0] = kolumna z datą odczytu, TG_ARGV[1] = kolumna z przebiegiem
+
+CREATE OR REPLACE FUNCTION fn_trg_refresh_mileage_rate()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_changed record;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        FOR v_changed IN EXECUTE format(
+            'SELECT vehicle_id, MIN(%1$I)::timestamptz AS changed_from
+             FROM new_rows WHERE %2$I IS NOT NULL
+             GROUP BY vehicle_id ORDER BY vehicle_id',
+            TG_ARGV[0], TG_ARGV[1]
+        )
+        LOOP
+            PERFORM car_app.fn_refresh_mileage_rate(v_changed.vehicle_id, v_changed.changed_from);
+        END LOOP;
+    ELSE
+        FOR v_changed IN EXECUTE
+            CASE TG_OP
+                WHEN 'UPDATE' THEN 'SELECT vehicle_id FROM new_rows UNION SELECT vehicle_id FROM old_rows ORDER BY 1'
+                ELSE 'SELECT DISTINCT vehicle_id FROM old_rows ORDER BY 1'
+            END
+        LOOP
+            PERFORM car_app.fn_refresh_mileage_rate(v_changed.vehicle_id, NULL);
+        END LOOP;
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+
+DO $$
+DECLARE
+    v_target record;
+BEGIN
+    FOR v_target IN
+        SELECT *
+        FROM (VALUES
+            ('fuelings',         'filled_at',    'odometer_km'),
+            ('services',         'service_date', 'odometer_km'),
+            ('odometer_entries', 'entry_date',   'value_km')
+        ) AS t(table_name, date_column, km_column)
+    LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_mileage_ins ON car_app.%I', v_target.table_name, v_target.table_name);
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_mileage_upd ON car_app.%I', v_target.table_name, v_target.table_name);
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_mileage_del ON car_app.%I', v_target.table_name, v_target.table_name);
+
+        EXECUTE format(
+            'CREATE TRIGGER trg_%1$s_mileage_ins AFTER INSERT ON car_app.%1$I
+             REFERENCING NEW TABLE AS new_rows
+             FOR EACH STATEMENT EXECUTE FUNCTION car_app.fn_trg_refresh_mileage_rate(%2$L, %3$L)',
+            v_target.table_name, v_target.date_column, v_target.km_column
+        );
+        EXECUTE format(
+            'CREATE TRIGGER trg_%1$s_mileage_upd AFTER UPDATE ON car_app.%1$I
+             REFERENCING NEW TABLE AS new_rows OLD TABLE AS old_rows
+             FOR EACH STATEMENT EXECUTE FUNCTION car_app.fn_trg_refresh_mileage_rate(%2$L, %3$L)',
+            v_target.table_name, v_target.date_column, v_target.km_column
+        );
+        EXECUTE format(
+            'CREATE TRIGGER trg_%1$s_mileage_del AFTER DELETE ON car_app.%1$I
+             REFERENCING OLD TABLE AS old_rows
+             FOR EACH STATEMENT EXECUTE FUNCTION car_app.fn_trg_refresh_mileage_rate(%2$L, %3$L)',
+            v_target.table_name, v_target.date_column, v_target.km_column
+        );
+    END LOOP;
+END
+$$;
+
+-- 4) Odczyt estymaty (NULL = za mało danych)
+
+CREATE OR REPLACE FUNCTION fn_get_mileage_rate(
+    p_vehicle_id uuid
+)
+RETURNS numeric
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT r.km_per_day
+    FROM vehicle_mileage_rates r
+    WHERE r.vehicle_id = p_vehicle_id
+      AND r.segments > 0
+      AND r.km_per_day > 0
+$$;
+
+-- 5) Dotychczasowe estymatory korzystają ze wspólnego modelu
+
+CREATE OR REPLACE FUNCTION car_app.fn_get_avg_monthly_mileage(p_vehicle_id UUID)
+RETURNS NUMERIC AS $$
+    SELECT COALESCE(car_app.fn_get_mileage_rate(p_vehicle_id) * 30.44, 0);
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION car_app.fn_estimate_days_until_km_reminder(
+	p_vehicle_id uuid,
+	p_next_due_odometer_km numeric(10,1)
+)
+RETURNS int
+LANGUAGE plpgsql
+STABLE
+AS $$
+DECLARE
+	v_current_odometer numeric(10,1);
+	v_km_per_day numeric;
+BEGIN
+	v_current_odometer := car_app.fn_get_latest_odometer(p_vehicle_id);
+
+	-- If we're already past the due point, return 0
+	IF v_current_odometer >= p_next_due_odometer_km THEN
+		RETURN 0;
+	END IF;
+
+	v_km_per_day := car_app.fn_get_mileage_rate(p_vehicle_id);
+	IF v_km_per_day IS NULL THEN
+		RETURN NULL;
+	END IF;
+
+	RETURN CEIL((p_next_due_odometer_km - v_current_odometer) / v_km_per_day)::int;
+END;
+$$;
+
+-- 6) Estymata dla API (OWNER + shares)
+
+CREATE OR REPLACE FUNCTION fn_get_vehicle_mileage_rate(
+    p_user_id    uuid,
+    p_vehicle_id uuid
+)
+RETURNS TABLE (
+    vehicle_id         uuid,
+    km_per_day         numeric,
+    km_per_month       numeric,
+    deviation          numeric,
+    segments           int,
+    last_reading_at    timestamptz,
+    last_reading_km    numeric(10,1),
+    updated_at         timestamptz
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        v.id,
+        ROUND(r.km_per_day, 2),
+        ROUND(r.km_per_day * 30.44, 1),
+        ROUND(r.deviation, 2),
+        COALESCE(r.segments, 0),
+        r.anchor_at,
+        r.anchor_km,
+        r.updated_at
+    FROM vehicles v
+    LEFT JOIN vehicle_shares s
+      ON s.vehicle_id = v.id
+     AND s.user_id = p_user_id
+    LEFT JOIN vehicle_mileage_rates r
+      ON r.vehicle_id = v.id
+    WHERE v.id = p_vehicle_id
+      AND (v.owner_id = p_user_id OR s.user_id IS NOT NULL)
+$$;
+
+-- 7) Wypełnienie modelu dla istniejących danych
+
+SELECT car_app.fn_refresh_mileage_rate(v.id) FROM vehicles v ORDER BY v.id;
+
+GRANT EXECUTE ON FUNCTION car_app.fn_get_mileage_rate TO car_user;
+GRANT EXECUTE ON FUNCTION car_app.fn_get_vehicle_mileage_rate TO car_user;
@@ -0,0 +1,202 @@
+SET search_path TO car_app, public;
+
+-- Row-level security dla danych pojazdów.
+--
+-- API z DB_RLS_ENABLED=true na początku każdej transakcji ustawia
+-- app.current_user_id (id zalogowanego użytkownika) i przełącza się na rolę
+-- car_app_rls (SET LOCAL ROLE). Dla tej roli tabele pojazdów są filtrowane
+-- politykami: odczyt - OWNER i wszystkie role z vehicle_shares, zapis -
+-- OWNER/EDITOR, zarządzanie pojazdem i udostępnieniami - właściciel.
+-- Właściciel tabel (car_user: zadania w tle, skrypty, pg_cron) nie podlega
+-- politykom, bo RLS nie jest wymuszane (brak FORCE ROW LEVEL SECURITY).
+--
+-- Tabele pomocnicze bez danych użytkownika (collection_versions,
+-- deleted_records, idempotency_keys, sync_horizon) nie mają polityk.
+-- mv_expenses_monthly (widok zmaterializowany - RLS go nie obejmuje) jest
+-- czytany tylko przez funkcje filtrujące po pojazdach użytkownika.
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'car_app_rls') THEN
+        CREATE ROLE car_app_rls NOLOGIN;
+    END IF;
+END
+$$;
+
+GRANT car_app_rls TO car_user;
+GRANT USAGE ON SCHEMA car_app TO car_app_rls;
+GRANT SELECT, INSERT, UPDATE, DELETE ON ALL TABLES IN SCHEMA car_app TO car_app_rls;
+GRANT USAGE, SELECT, UPDATE ON ALL SEQUENCES IN SCHEMA car_app TO car_app_rls;
+GRANT EXECUTE ON ALL FUNCTIONS IN SCHEMA car_app TO car_app_rls;
+ALTER DEFAULT PRIVILEGES IN SCHEMA car_app GRANT SELECT, INSERT, UPDATE, DELETE ON TABLES TO car_app_rls;
+ALTER DEFAULT PRIVILEGES IN SCHEMA car_app GRANT USAGE, SELECT, UPDATE ON SEQUENCES TO car_app_rls;
+
+-- 1) Kontekst użytkownika i zbiory pojazdów
+--    (SECURITY DEFINER - czytają vehicles/vehicle_shares z pominięciem polityk,
+--    więc polityki nie odwołują się rekurencyjnie same do siebie)
+
+CREATE OR REPLACE FUNCTION fn_rls_user_id()
+RETURNS uuid
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT NULLIF(current_setting('app.current_user_id', true), '')::uuid
+$$;
+
+CREATE OR REPLACE FUNCTION fn_rls_readable_vehicle_ids()
+RETURNS SETOF uuid
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = car_app, public
+AS $$
+    SELECT v.id FROM vehicles v WHERE v.owner_id = car_app.fn_rls_user_id()
+    UNION
+    SELECT s.vehicle_id FROM vehicle_shares s WHERE s.user_id = car_app.fn_rls_user_id()
+$$;
+
+CREATE OR REPLACE FUNCTION fn_rls_writable_vehicle_ids()
+RETURNS SETOF uuid
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = car_app, public
+AS $$
+    SELECT v.id FROM vehicles v WHERE v.owner_id = car_app.fn_rls_user_id()
+    UNION
+    SELECT s.vehicle_id FROM vehicle_shares s
+    WHERE s.user_id = car_app.fn_rls_user_id()
+      AND s.role IN ('OWNER', 'EDITOR')
+$$;
+
+CREATE OR REPLACE FUNCTION fn_rls_owned_vehicle_ids()
+RETURNS SETOF uuid
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = car_app, public
+AS $$
+    SELECT v.id FROM vehicles v WHERE v.owner_id = car_app.fn_rls_user_id()
+$$;
+
+-- 2) Pojazdy i udostępnienia
+--    (warunek owner_id na samym wierszu - nowy pojazd jest widoczny
+--    w RETURNING tego samego INSERT-a)
+
+ALTER TABLE vehicles ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS rls_vehicles_select ON vehicles;
+CREATE POLICY rls_vehicles_select ON vehicles FOR SELECT TO car_app_rls
+    USING (owner_id = car_app.fn_rls_user_id() OR id IN (SELECT car_app.fn_rls_readable_vehicle_ids()));
+
+DROP POLICY IF EXISTS rls_vehicles_insert ON vehicles;
+CREATE POLICY rls_vehicles_insert ON vehicles FOR INSERT TO car_app_rls
+    WITH CHECK (owner_id = car_app.fn_rls_user_id());
+
+DROP POLICY IF EXISTS rls_vehicles_update ON vehicles;
+CREATE POLICY rls_vehicles_update ON vehicles FOR UPDATE TO car_app_rls
+    USING (id IN (SELECT car_app.fn_rls_writable_vehicle_ids()));
+
+DROP POLICY IF EXISTS rls_vehicles_delete ON vehicles;
+CREATE POLICY rls_vehicles_delete ON vehicles FOR DELETE TO car_app_rls
+    USING (owner_id = car_app.fn_rls_user_id());
+
+ALTER TABLE vehicle_shares ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS rls_vehicle_shares_select ON vehicle_shares;
+CREATE POLICY rls_vehicle_shares_select ON vehicle_shares FOR SELECT TO car_app_rls
+    USING (vehicle_id IN (SELECT car_app.fn_rls_readable_vehicle_ids()));
+
+DROP POLICY IF EXISTS rls_vehicle_shares_modify ON vehicle_shares;
+CREATE POLICY rls_vehicle_shares_modify ON vehicle_shares FOR ALL TO car_app_rls
+    USING (vehicle_id IN (SELECT car_app.fn_rls_owned_vehicle_ids()))
+    WITH CHECK (vehicle_id IN (SELECT car_app.fn_rls_owned_vehicle_ids()));
+
+-- 3) Dane pojazdu: odczyt dla wszystkich ról, zapis OWNER/EDITOR
+
+DO $$
+DECLARE
+    v_table text;
+BEGIN
+    FOREACH v_table IN ARRAY ARRAY[
+        'vehicle_fuels', 'fuelings', 'services', 'issues', 'odometer_entries',
+        'expenses', 'reminder_rules', 'import_jobs'
+    ]
+    LOOP
+        EXECUTE format('ALTER TABLE car_app.%I ENABLE ROW LEVEL SECURITY', v_table);
+
+        EXECUTE format('DROP POLICY IF EXISTS rls_%1$s_select ON car_app.%1$I', v_table);
+        EXECUTE format(
+            'CREATE POLICY rls_%1$s_select ON car_app.%1$I FOR SELECT TO car_app_rls
+             USING (vehicle_id IN (SELECT car_app.fn_rls_readable_vehicle_ids()))',
+            v_table
+        );
+
+        EXECUTE format('DROP POLICY IF EXISTS rls_%1$s_insert ON car_app.%1$I', v_table);
+        EXECUTE format(
+            'CREATE POLICY rls_%1$s_insert ON car_app.%1$I FOR INSERT TO car_app_rls
+             WITH CHECK (vehicle_id IN (SELECT car_app.fn_rls_writable_vehicle_ids()))',
+            v_table
+        );
+
+        EXECUTE format('DROP POLICY IF EXISTS rls_%1$s_update ON car_app.%1$I', v_table);
+        EXECUTE format(
+            'CREATE POLICY rls_%1$s_update ON car_app.%1$I FOR UPDATE TO car_app_rls
+             USING (vehicle_id IN (SELECT car_app.fn_rls_writable_vehicle_ids()))
+             WITH CHECK (vehicle_id IN (SELECT car_app.fn_rls_writable_vehicle_ids()))',
+            v_table
+        );
+
+        EXECUTE format('DROP POLICY IF EXISTS rls_%1$s_delete ON car_app.%1$I', v_table);
+        EXECUTE format(
+            'CREATE POLICY rls_%1$s_delete ON car_app.%1$I FOR DELETE TO car_app_rls
+             USING (vehicle_id IN (SELECT car_app.fn_rls_writable_vehicle_ids()))',
+            v_table
+        );
+    END LOOP;
+END
+$$;
+
+-- 4) Dane pochodne, które może zapisywać każdy czytający
+--    (cache prognoz, model przebiegu, eksport)
+
+DO $$
+DECLARE
+    v_table text;
+BEGIN
+    FOREACH v_table IN ARRAY ARRAY['budget_forecast_cache', 'vehicle_mileage_rates', 'export_jobs']
+    LOOP
+        EXECUTE format('ALTER TABLE car_app.%I ENABLE ROW LEVEL SECURITY', v_table);
+        EXECUTE format('DROP POLICY IF EXISTS rls_%1$s_all ON car_app.%1$I', v_table);
+        EXECUTE format(
+            'CREATE POLICY rls_%1$s_all ON car_app.%1$I FOR ALL TO car_app_rls
+             USING (vehicle_id IN (SELECT car_app.fn_rls_readable_vehicle_ids()))
+             WITH CHECK (vehicle_id IN (SELECT car_app.fn_rls_readable_vehicle_ids()))',
+            v_table
+        );
+    END LOOP;
+END
+$$;
+
+-- 5) Tabele podrzędne (przez rodzica, którego polityki już obowiązują)
+
+ALTER TABLE service_items ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS rls_service_items_all ON service_items;
+CREATE POLICY rls_service_items_all ON service_items FOR ALL TO car_app_rls
+    USING (service_id IN (SELECT s.id FROM car_app.services s))
+    WITH CHECK (service_id IN (SELECT s.id FROM car_app.services s
+                               WHERE s.vehicle_id IN (SELECT car_app.fn_rls_writable_vehicle_ids())));
+
+ALTER TABLE reminder_events ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS rls_reminder_events_all ON reminder_events;
+CREATE POLICY rls_reminder_events_all ON reminder_events FOR ALL TO car_app_rls
+    USING (rule_id IN (SELECT r.id FROM car_app.reminder_rules r))
+    WITH CHECK (rule_id IN (SELECT r.id FROM car_app.reminder_rules r
+                            WHERE r.vehicle_id IN (SELECT car_app.fn_rls_writable_vehicle_ids())));
+
+GRANT EXECUTE ON FUNCTION car_app.fn_rls_user_id TO car_user;
+GRANT EXECUTE ON FUNCTION car_app.fn_rls_readable_vehicle_ids TO car_user;
+GRANT EXECUTE ON FUNCTION car_app.fn_rls_writable_vehicle_ids TO car_user;
+GRANT EXECUTE ON FUNCTION car_app.fn_rls_owned_vehicle_ids TO car_user;
@@ -0,0 +1,37 @@
+SET search_path TO car_app, public;
+
+-- Rozwiązanie dostępu do pojazdu jednym zapytaniem (get_vehicle_access w API):
+-- czy użytkownik z tokenu nadal istnieje i jaką ma rolę w pojeździe
+-- (OWNER dla właściciela, rola z vehicle_shares dla udostępnień,
+-- NULL gdy nie ma dostępu). Zawsze zwraca dokładnie jeden wiersz.
+-- Oba podzapytania o rolę idą po kluczach głównych (vehicles.id,
+-- vehicle_shares (vehicle_id, user_id)).
+
+CREATE OR REPLACE FUNCTION fn_resolve_vehicle_access(
+    p_user_id    uuid,
+    p_vehicle_id uuid
+)
+RETURNS TABLE (
+    user_exists boolean,
+    role        role_type
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        EXISTS (SELECT 1 FROM users u WHERE u.id = p_user_id),
+        COALESCE(
+            (
+                SELECT 'OWNER'::role_type
+                FROM vehicles v
+                WHERE v.id = p_vehicle_id
+                  AND v.owner_id = p_user_id
+            ),
+            (
+                SELECT s.role
+                FROM vehicle_shares s
+                WHERE s.vehicle_id = p_vehicle_id
+                  AND s.user_id = p_user_id
+            )
+        );
+$$;
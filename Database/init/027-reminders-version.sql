@@ -0,0 +1,40 @@
+SET search_path TO car_app, public;
+
+-- Wersja listy przypomnień pojazdu (ETag GET /vehicles/{id}/reminders).
+--
+-- Lista zawiera estimated_days_until_due (fn_estimate_days_until_km_reminder),
+-- które zależy od ostatniego przebiegu i tempa jazdy, więc zmienia się także
+-- z tankowaniami, serwisami i wpisami licznika, a do tego z upływem dni.
+-- Wersja składa się z wersji tych kolekcji (jak fn_get_budget_source_versions)
+-- i bieżącej daty. Zwraca wiersz tylko, gdy użytkownik ma dostęp do pojazdu
+-- (OWNER lub dowolna rola w vehicle_shares).
+
+CREATE OR REPLACE FUNCTION fn_get_reminders_version(
+    p_user_id    uuid,
+    p_vehicle_id uuid
+)
+RETURNS TABLE (
+    version text
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT md5(
+        current_date::text || ';' || (
+            SELECT string_agg(c.collection || ':' || COALESCE(cv.version, 0)::text, ',' ORDER BY c.collection)
+            FROM (VALUES ('fuelings'), ('odometer'), ('reminders'), ('services')) AS c(collection)
+            LEFT JOIN collection_versions cv
+              ON cv.vehicle_id = v.id
+             AND cv.collection = c.collection
+        )
+    )
+    FROM vehicles v
+    LEFT JOIN vehicle_shares s
+      ON s.vehicle_id = v.id
+     AND s.user_id = p_user_id
+    WHERE v.id = p_vehicle_id
+      AND (
+            v.owner_id = p_user_id
+         OR s.user_id IS NOT NULL
+      )
+$$;